@@ -0,0 +1,45 @@
+"""adding tagging jobs
+
+Revision ID: 4f2b9c1d7e3a
+Revises: 1ca8bd8b2ea2
+Create Date: 2025-10-02 10:14:52.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f2b9c1d7e3a'
+down_revision: Union[str, None] = '1ca8bd8b2ea2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('tagging_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('text', sa.Text(), nullable=True),
+    sa.Column('progress_done', sa.Integer(), nullable=False),
+    sa.Column('progress_total', sa.Integer(), nullable=False),
+    sa.Column('sentences_created', sa.Integer(), nullable=False),
+    sa.Column('tokens_created', sa.Integer(), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_by', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['created_by'], ['users.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_tagging_jobs_id'), 'tagging_jobs', ['id'], unique=False)
+    op.create_index(op.f('ix_tagging_jobs_status'), 'tagging_jobs', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_tagging_jobs_status'), table_name='tagging_jobs')
+    op.drop_index(op.f('ix_tagging_jobs_id'), table_name='tagging_jobs')
+    op.drop_table('tagging_jobs')
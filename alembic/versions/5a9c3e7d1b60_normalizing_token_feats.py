@@ -0,0 +1,119 @@
+"""normalizing token feats into feature bundles
+
+Revision ID: 5a9c3e7d1b60
+Revises: e2b6d4a8f913
+Create Date: 2025-10-13 11:48:33.610872
+
+"""
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5a9c3e7d1b60'
+down_revision: Union[str, None] = 'e2b6d4a8f913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH = 20000
+
+
+def _canonical(feats):
+    names = sorted(feats, key=str.lower)
+    return "|".join(f"{name}={feats[name]}" for name in names), {name: feats[name] for name in names}
+
+
+def upgrade() -> None:
+    op.create_table('feature_bundles',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('key', sa.String(), nullable=False),
+    sa.Column('feats', sa.JSON(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('key')
+    )
+    op.create_table('feature_bundle_items',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('value', sa.String(length=50), nullable=False),
+    sa.Column('bundle_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['bundle_id'], ['feature_bundles.id'], ),
+    sa.PrimaryKeyConstraint('name', 'value', 'bundle_id'),
+    sqlite_with_rowid=False
+    )
+    op.create_index(op.f('ix_feature_bundle_items_bundle_id'), 'feature_bundle_items', ['bundle_id'], unique=False)
+    op.add_column('tokens', sa.Column('feats_id', sa.Integer(), nullable=True))
+
+    # переносим feats в наборы пачками по диапазонам id
+    bind = op.get_bind()
+    bundle_ids = {}
+    max_id = bind.execute(sa.text("SELECT COALESCE(MAX(id), 0) FROM tokens")).scalar()
+    for start in range(0, max_id + 1, BACKFILL_BATCH):
+        rows = bind.execute(
+            sa.text(
+                "SELECT id, feats FROM tokens "
+                "WHERE id > :start AND id <= :end AND json_type(feats) = 'object'"
+            ),
+            {"start": start, "end": start + BACKFILL_BATCH},
+        ).fetchall()
+        updates = []
+        for token_id, raw in rows:
+            feats = json.loads(raw)
+            if not feats:
+                continue
+            key, canonical = _canonical(feats)
+            if key not in bundle_ids:
+                bundle_id = bind.execute(
+                    sa.text("INSERT INTO feature_bundles (key, feats) VALUES (:key, :feats) RETURNING id"),
+                    {"key": key, "feats": json.dumps(canonical, ensure_ascii=False)},
+                ).scalar()
+                bind.execute(
+                    sa.text("INSERT INTO feature_bundle_items (name, value, bundle_id) VALUES (:name, :value, :bundle_id)"),
+                    [{"name": name, "value": value, "bundle_id": bundle_id} for name, value in canonical.items()],
+                )
+                bundle_ids[key] = bundle_id
+            updates.append({"feats_id": bundle_ids[key], "id": token_id})
+        if updates:
+            bind.execute(sa.text("UPDATE tokens SET feats_id = :feats_id WHERE id = :id"), updates)
+
+    with op.batch_alter_table('tokens') as batch_op:
+        batch_op.drop_column('feats')
+        batch_op.create_index(batch_op.f('ix_tokens_feats_id'), ['feats_id'], unique=False)
+        batch_op.create_foreign_key('fk_tokens_feats_id_feature_bundles', 'feature_bundles', ['feats_id'], ['id'])
+
+    op.drop_index(op.f('ix_token_feats_token_id'), table_name='token_feats')
+    op.drop_table('token_feats')
+
+
+def downgrade() -> None:
+    op.create_table('token_feats',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('value', sa.String(length=50), nullable=False),
+    sa.Column('token_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['token_id'], ['tokens.id'], ),
+    sa.PrimaryKeyConstraint('name', 'value', 'token_id'),
+    sqlite_with_rowid=False
+    )
+    op.create_index(op.f('ix_token_feats_token_id'), 'token_feats', ['token_id'], unique=False)
+
+    with op.batch_alter_table('tokens') as batch_op:
+        batch_op.add_column(sa.Column('feats', sa.JSON(), nullable=True))
+
+    op.execute(
+        "UPDATE tokens SET feats = (SELECT feats FROM feature_bundles WHERE feature_bundles.id = tokens.feats_id) "
+        "WHERE feats_id IS NOT NULL"
+    )
+    op.execute(
+        "INSERT INTO token_feats (name, value, token_id) "
+        "SELECT i.name, i.value, t.id FROM tokens t JOIN feature_bundle_items i ON i.bundle_id = t.feats_id"
+    )
+
+    with op.batch_alter_table('tokens') as batch_op:
+        batch_op.drop_constraint('fk_tokens_feats_id_feature_bundles', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_tokens_feats_id'))
+        batch_op.drop_column('feats_id')
+
+    op.drop_index(op.f('ix_feature_bundle_items_bundle_id'), table_name='feature_bundle_items')
+    op.drop_table('feature_bundle_items')
+    op.drop_table('feature_bundles')
@@ -0,0 +1,36 @@
+"""adding sentences full-text index
+
+Revision ID: 8d3e5a6b2c41
+Revises: 4f2b9c1d7e3a
+Create Date: 2025-10-06 15:42:07.551930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.database.fts import SENTENCES_FTS_DDL, SENTENCES_FTS_DROP_DDL, SENTENCES_FTS_REBUILD
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d3e5a6b2c41'
+down_revision: Union[str, None] = '4f2b9c1d7e3a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for ddl in SENTENCES_FTS_DDL:
+        op.execute(ddl)
+    # индексируем уже существующие предложения
+    op.execute(SENTENCES_FTS_REBUILD)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for ddl in SENTENCES_FTS_DROP_DDL:
+        op.execute(ddl)
@@ -0,0 +1,65 @@
+"""adding sentence content hash
+
+Revision ID: 9e5b1f3c8a72
+Revises: f1c4a7e2d935
+Create Date: 2025-10-16 10:52:19.083641
+
+"""
+import hashlib
+import re
+import unicodedata
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e5b1f3c8a72'
+down_revision: Union[str, None] = 'f1c4a7e2d935'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH = 20000
+
+_SPACES_RE = re.compile(r"\s+")
+
+
+def _content_hash(text):
+    normalized = _SPACES_RE.sub(" ", unicodedata.normalize("NFC", text or "")).strip()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def upgrade() -> None:
+    op.add_column('sentences', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.add_column('sentences', sa.Column('occurrences', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('tagging_jobs', sa.Column('duplicates', sa.String(length=10), server_default='skip', nullable=False))
+    op.add_column('tagging_jobs', sa.Column('sentences_skipped', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('tagging_jobs', sa.Column('sentences_replaced', sa.Integer(), server_default='0', nullable=False))
+
+    # хэши существующих предложений пачками по диапазонам id
+    bind = op.get_bind()
+    max_id = bind.execute(sa.text("SELECT COALESCE(MAX(id), 0) FROM sentences")).scalar()
+    for start in range(0, max_id + 1, BACKFILL_BATCH):
+        rows = bind.execute(
+            sa.text("SELECT id, text FROM sentences WHERE id > :start AND id <= :end"),
+            {"start": start, "end": start + BACKFILL_BATCH},
+        ).fetchall()
+        if rows:
+            bind.execute(
+                sa.text("UPDATE sentences SET content_hash = :content_hash WHERE id = :id"),
+                [{"content_hash": _content_hash(text), "id": sentence_id} for sentence_id, text in rows],
+            )
+
+    op.create_index(op.f('ix_sentences_content_hash'), 'sentences', ['content_hash'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_sentences_content_hash'), table_name='sentences')
+    with op.batch_alter_table('tagging_jobs') as batch_op:
+        batch_op.drop_column('sentences_replaced')
+        batch_op.drop_column('sentences_skipped')
+        batch_op.drop_column('duplicates')
+    # без batch: пересоздание sentences удалило бы триггеры FTS (нужен SQLite >= 3.35)
+    op.drop_column('sentences', 'occurrences')
+    op.drop_column('sentences', 'content_hash')
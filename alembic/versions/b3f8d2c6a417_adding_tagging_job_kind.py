@@ -0,0 +1,29 @@
+"""adding tagging job kind
+
+Revision ID: b3f8d2c6a417
+Revises: 5a9c3e7d1b60
+Create Date: 2025-10-14 09:27:41.205836
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3f8d2c6a417'
+down_revision: Union[str, None] = '5a9c3e7d1b60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('tagging_jobs', sa.Column('kind', sa.String(length=20), server_default='tag', nullable=False))
+    op.add_column('tagging_jobs', sa.Column('source_path', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('tagging_jobs') as batch_op:
+        batch_op.drop_column('source_path')
+        batch_op.drop_column('kind')
@@ -0,0 +1,37 @@
+"""adding corpus counters
+
+Revision ID: c7a1f0e94b25
+Revises: 8d3e5a6b2c41
+Create Date: 2025-10-08 09:27:40.902114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7a1f0e94b25'
+down_revision: Union[str, None] = '8d3e5a6b2c41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('corpus_counters',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('value', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    # начальные значения по существующим данным
+    op.execute(
+        "INSERT INTO corpus_counters (name, value) "
+        "SELECT 'sentences:' || COALESCE(CAST(is_corrected AS TEXT), 'null'), COUNT(*) "
+        "FROM sentences GROUP BY is_corrected"
+    )
+    op.execute("INSERT INTO corpus_counters (name, value) SELECT 'tokens', COUNT(*) FROM tokens")
+
+
+def downgrade() -> None:
+    op.drop_table('corpus_counters')
@@ -0,0 +1,61 @@
+"""adding token search indexes
+
+Revision ID: e2b6d4a8f913
+Revises: c7a1f0e94b25
+Create Date: 2025-10-10 13:05:18.274661
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b6d4a8f913'
+down_revision: Union[str, None] = 'c7a1f0e94b25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH = 50000
+
+
+def upgrade() -> None:
+    op.drop_index('ix_tokens_form', table_name='tokens')
+    op.create_index('ix_tokens_form_pos', 'tokens', ['form', 'pos'], unique=False)
+    op.create_index('ix_tokens_lemma_pos_xpos', 'tokens', ['lemma', 'pos', 'xpos'], unique=False)
+    op.create_index('ix_tokens_pos_xpos', 'tokens', ['pos', 'xpos'], unique=False)
+    op.create_index(op.f('ix_tokens_sentence_id'), 'tokens', ['sentence_id'], unique=False)
+
+    op.create_table('token_feats',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('value', sa.String(length=50), nullable=False),
+    sa.Column('token_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['token_id'], ['tokens.id'], ),
+    sa.PrimaryKeyConstraint('name', 'value', 'token_id'),
+    sqlite_with_rowid=False
+    )
+    op.create_index(op.f('ix_token_feats_token_id'), 'token_feats', ['token_id'], unique=False)
+
+    # раскладываем существующие feats на пары пачками по диапазонам id
+    bind = op.get_bind()
+    max_id = bind.execute(sa.text("SELECT COALESCE(MAX(id), 0) FROM tokens")).scalar()
+    for start in range(0, max_id + 1, BACKFILL_BATCH):
+        bind.execute(
+            sa.text(
+                "INSERT INTO token_feats (name, value, token_id) "
+                "SELECT j.key, j.value, t.id FROM tokens t, json_each(t.feats) j "
+                "WHERE t.id > :start AND t.id <= :end AND json_type(t.feats) = 'object'"
+            ),
+            {"start": start, "end": start + BACKFILL_BATCH},
+        )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_token_feats_token_id'), table_name='token_feats')
+    op.drop_table('token_feats')
+    op.drop_index(op.f('ix_tokens_sentence_id'), table_name='tokens')
+    op.drop_index('ix_tokens_pos_xpos', table_name='tokens')
+    op.drop_index('ix_tokens_lemma_pos_xpos', table_name='tokens')
+    op.drop_index('ix_tokens_form_pos', table_name='tokens')
+    op.create_index('ix_tokens_form', 'tokens', ['form'], unique=False)
@@ -0,0 +1,36 @@
+"""adding tagger cache
+
+Revision ID: f1c4a7e2d935
+Revises: b3f8d2c6a417
+Create Date: 2025-10-15 16:03:12.447190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1c4a7e2d935'
+down_revision: Union[str, None] = 'b3f8d2c6a417'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('tagger_cache',
+    sa.Column('key', sa.String(length=64), nullable=False),
+    sa.Column('conllu', sa.Text(), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.Column('hits', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('last_used_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index(op.f('ix_tagger_cache_last_used_at'), 'tagger_cache', ['last_used_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_tagger_cache_last_used_at'), table_name='tagger_cache')
+    op.drop_table('tagger_cache')
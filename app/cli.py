@@ -0,0 +1,129 @@
+"""
+Служебные команды.
+
+    python -m app.cli rebuild-counters
+    python -m app.cli import-conllu corpus.conllu [other.conllu.gz ...] [--duplicates skip]
+    python -m app.cli dedup-sentences
+    python -m app.cli generate-corpus --tokens 1000000 [--seed 42]
+"""
+import argparse
+import sys
+import time
+
+from app.database.config import SessionLocal, engine
+from app.database.models import Base
+from app.internal.tagging import counters, dedup, synthetic
+from app.internal.tagging.service import TaggingService, TAGGING_BATCH_SIZE
+
+
+def rebuild_counters(args: argparse.Namespace) -> int:
+    """Пересчитать счётчики корпуса с нуля"""
+    db = SessionLocal()
+    try:
+        result = counters.rebuild(db)
+        db.commit()
+    finally:
+        db.close()
+    for name, value in sorted(result.items()):
+        print(f"{name} = {value}")
+    return 0
+
+
+def import_conllu(args: argparse.Namespace) -> int:
+    """Импортировать готовые conllu-файлы (.conllu, .conllu.gz) без теггера"""
+    db = SessionLocal()
+    try:
+        for path in args.paths:
+            started = time.perf_counter()
+
+            def on_progress(done: int, total: int) -> None:
+                percent = done * 100 / total if total else 100
+                print(f"\r{path}: {percent:5.1f}%", end="", file=sys.stderr, flush=True)
+
+            service = TaggingService(db, duplicates=args.duplicates)
+            sentences, tokens = service.import_conllu(path, on_progress=on_progress, batch_size=args.batch_size)
+            elapsed = time.perf_counter() - started
+            print(file=sys.stderr)
+            print(
+                f"{path}: {sentences} sentences, {tokens} tokens, "
+                f"{service.sentences_skipped} skipped, {service.sentences_replaced} replaced in {elapsed:.1f} s"
+            )
+    finally:
+        db.close()
+    return 0
+
+
+def dedup_sentences(args: argparse.Namespace) -> int:
+    """Заполнить content_hash и удалить неисправленные дубликаты предложений"""
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        result = dedup.dedup_existing(db, batch_size=args.batch_size)
+    finally:
+        db.close()
+    for name, value in result.items():
+        print(f"{name} = {value}")
+    print(f"done in {time.perf_counter() - started:.1f} s")
+    return 0
+
+
+def generate_corpus(args: argparse.Namespace) -> int:
+    """Сгенерировать синтетический корпус заданного объёма (для замеров)"""
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+
+        def on_progress(done: int, total: int) -> None:
+            print(f"\r{done}/{total} tokens", end="", file=sys.stderr, flush=True)
+
+        sentences, tokens = synthetic.generate_corpus(
+            db,
+            args.tokens,
+            seed=args.seed,
+            batch_size=args.batch_size,
+            corrected_fraction=args.corrected,
+            on_progress=on_progress,
+        )
+        elapsed = time.perf_counter() - started
+    finally:
+        db.close()
+    print(file=sys.stderr)
+    print(f"{sentences} sentences, {tokens} tokens in {elapsed:.1f} s ({tokens / elapsed:.0f} tokens/s)")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    cmd = commands.add_parser("rebuild-counters", help=rebuild_counters.__doc__)
+    cmd.set_defaults(func=rebuild_counters)
+
+    cmd = commands.add_parser("import-conllu", help=import_conllu.__doc__)
+    cmd.add_argument("paths", nargs="+", help="файлы .conllu или .conllu.gz")
+    cmd.add_argument("--batch-size", type=int, default=TAGGING_BATCH_SIZE, help="предложений в одной транзакции")
+    cmd.add_argument("--duplicates", choices=dedup.DUPLICATE_MODES, default=dedup.INGEST_DUPLICATES, help="что делать с дубликатами")
+    cmd.set_defaults(func=import_conllu)
+
+    cmd = commands.add_parser("dedup-sentences", help=dedup_sentences.__doc__)
+    cmd.add_argument("--batch-size", type=int, default=1000, help="групп дубликатов в одной транзакции")
+    cmd.set_defaults(func=dedup_sentences)
+
+    cmd = commands.add_parser("generate-corpus", help=generate_corpus.__doc__)
+    cmd.add_argument("--tokens", type=int, required=True, help="сколько токенов сгенерировать")
+    cmd.add_argument("--seed", type=int, default=42)
+    cmd.add_argument("--batch-size", type=int, default=TAGGING_BATCH_SIZE, help="предложений в одной транзакции")
+    cmd.add_argument("--corrected", type=float, default=0.1, help="доля исправленных предложений")
+    cmd.set_defaults(func=generate_corpus)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    Base.metadata.create_all(bind=engine)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,22 +1,176 @@
-from sqlalchemy import create_engine
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from typing import Any, Callable, Dict, TypeVar
 import os
 
-DATABASE_URL = "sqlite:///./app.db"
+from app.shared import metrics, profiling
 
-engine = create_engine(
-    DATABASE_URL, 
-    connect_args={"check_same_thread": False}
-)
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./app.db")
+
+# Обработчики запросов по умолчанию выполняют синхронный код БД в пуле потоков.
+# ASYNC_DB_ENABLED=1 — тот же код через async-движок (AsyncSession.run_sync); выигрыша
+# в benchmarks/bench_concurrency.py он не показал, поэтому выключен.
+ASYNC_DB_ENABLED = os.getenv("ASYNC_DB_ENABLED", "0") == "1"
+
+# Синхронный драйвер -> асинхронный для той же БД
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "mysql+mysqldb": "mysql+aiomysql",
+}
+_ASYNC_DRIVER_NAMES = {"sqlite+aiosqlite", "postgresql+asyncpg", "postgresql+psycopg", "mysql+aiomysql", "mysql+asyncmy"}
+
+
+def _async_url(url: str) -> str:
+    """URL с асинхронным драйвером для той же БД (sqlite -> aiosqlite, postgresql -> asyncpg, mysql -> aiomysql)."""
+    parsed = make_url(url)
+    if parsed.drivername in _ASYNC_DRIVER_NAMES:
+        return url
+    driver = _ASYNC_DRIVERS.get(parsed.drivername)
+    if driver is None:
+        raise ValueError(
+            f"No async driver known for DATABASE_URL driver '{parsed.drivername}'; set ASYNC_DATABASE_URL"
+        )
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+# Пул соединений
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))  # секунды ожидания свободного соединения
+
+# Настройки SQLite, применяются к каждому новому соединению
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))  # < 0 — размер в KiB (64 MiB)
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_TEMP_STORE = os.getenv("SQLITE_TEMP_STORE", "MEMORY")
+
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+_IS_SQLITE_MEMORY = IS_SQLITE and (":memory:" in DATABASE_URL or DATABASE_URL.rstrip("/") in ("sqlite:", "sqlite://"))
+
+
+def _engine_kwargs() -> Dict[str, Any]:
+    kwargs: Dict[str, Any] = {}
+    if IS_SQLITE:
+        kwargs["connect_args"] = {
+            "check_same_thread": False,
+            "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000,
+        }
+    if not _IS_SQLITE_MEMORY:
+        # in-memory SQLite использует SingletonThreadPool без этих параметров
+        kwargs.update(
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+        )
+    return kwargs
+
+
+engine = create_engine(DATABASE_URL, **_engine_kwargs())
+
+
+async_engine = None
+if ASYNC_DB_ENABLED:
+    _async_engine_kwargs = _engine_kwargs()
+    if IS_SQLITE and not _IS_SQLITE_MEMORY:
+        # по умолчанию aiosqlite открывает соединение на каждый запрос (NullPool)
+        _async_engine_kwargs["poolclass"] = AsyncAdaptedQueuePool
+    async_engine = create_async_engine(
+        os.getenv("ASYNC_DATABASE_URL") or _async_url(DATABASE_URL), **_async_engine_kwargs
+    )
+
+
+def _sqlite_pragmas() -> Dict[str, Any]:
+    return {
+        "journal_mode": SQLITE_JOURNAL_MODE,
+        "synchronous": SQLITE_SYNCHRONOUS,
+        "busy_timeout": SQLITE_BUSY_TIMEOUT_MS,
+        "cache_size": SQLITE_CACHE_SIZE,
+        "mmap_size": SQLITE_MMAP_SIZE,
+        "temp_store": SQLITE_TEMP_STORE,
+    }
+
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record=None) -> None:
+    """Выставляет PRAGMA на новом соединении SQLite (WAL, synchronous, кэш и т.д.)."""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in _sqlite_pragmas().items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+_engines = [engine] if async_engine is None else [engine, async_engine.sync_engine]
+for _engine in _engines:
+    if IS_SQLITE:
+        event.listen(_engine, "connect", apply_sqlite_pragmas)
+    # число и время запросов к БД для /metrics и профилировщик SQL
+    metrics.instrument_engine(_engine)
+    profiling.instrument_engine(_engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = None
+if async_engine is not None:
+    # expire_on_commit=False: после commit атрибуты не перечитываются неявно (в async это недопустимо)
+    AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
+
+def describe_engine() -> Dict[str, Any]:
+    """Фактические настройки движка и соединения — для отчёта при старте."""
+    pool = engine.pool
+    report: Dict[str, Any] = {
+        "url": engine.url.render_as_string(hide_password=True),
+        "pool": pool.__class__.__name__,
+    }
+    if isinstance(pool, QueuePool):
+        report["pool_size"] = pool.size()
+        report["max_overflow"] = pool._max_overflow
+        report["pool_timeout"] = pool.timeout()
+    if IS_SQLITE:
+        with engine.connect() as conn:
+            for name in _sqlite_pragmas():
+                report[name] = conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+    return report
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+T = TypeVar("T")
+
+
+async def run_db(fn: Callable[..., T], *args: Any) -> T:
+    """
+    fn(db, *args) в новой сессии, как AsyncSession.run_sync: по умолчанию — синхронная
+    сессия в пуле потоков (event loop не ждёт БД), при ASYNC_DB_ENABLED — через async-движок.
+    Коммитит сама fn.
+    """
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as db:
+            return await db.run_sync(fn, *args)
+    return await run_in_threadpool(_run_in_session, fn, *args)
+
+
+def _run_in_session(fn: Callable[..., T], *args: Any) -> T:
+    with SessionLocal() as db:
+        return fn(db, *args)
@@ -0,0 +1,79 @@
+"""
+Полнотекстовый индекс FTS5 по тексту предложений (только SQLite).
+
+sentences_fts — external content таблица над sentences: текст хранится
+один раз, в индексе только токены. Синхронизация делается триггерами,
+поэтому индекс актуален при любой записи (ORM, Core-вставки, PATCH, удаление).
+"""
+import re
+from typing import List, Optional
+
+from sqlalchemy import column, table
+
+SENTENCES_FTS_TABLE = "sentences_fts"
+
+# Лёгкое описание виртуальной таблицы для запросов (в metadata она не входит)
+sentences_fts = table(SENTENCES_FTS_TABLE, column("rowid"), column("rank"))
+
+# remove_diacritics 0: иначе «й» сворачивается в «и»
+SENTENCES_FTS_DDL: List[str] = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {SENTENCES_FTS_TABLE} USING fts5(
+        text, content='sentences', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 0'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS sentences_fts_ai AFTER INSERT ON sentences BEGIN
+        INSERT INTO {SENTENCES_FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS sentences_fts_ad AFTER DELETE ON sentences BEGIN
+        INSERT INTO {SENTENCES_FTS_TABLE}({SENTENCES_FTS_TABLE}, rowid, text) VALUES ('delete', old.id, old.text);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS sentences_fts_au AFTER UPDATE OF text ON sentences BEGIN
+        INSERT INTO {SENTENCES_FTS_TABLE}({SENTENCES_FTS_TABLE}, rowid, text) VALUES ('delete', old.id, old.text);
+        INSERT INTO {SENTENCES_FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END""",
+]
+
+SENTENCES_FTS_DROP_DDL: List[str] = [
+    "DROP TRIGGER IF EXISTS sentences_fts_au",
+    "DROP TRIGGER IF EXISTS sentences_fts_ad",
+    "DROP TRIGGER IF EXISTS sentences_fts_ai",
+    f"DROP TABLE IF EXISTS {SENTENCES_FTS_TABLE}",
+]
+
+SENTENCES_FTS_REBUILD = f"INSERT INTO {SENTENCES_FTS_TABLE}({SENTENCES_FTS_TABLE}) VALUES ('rebuild')"
+
+
+def create_sentences_fts(target, connection, **kw) -> None:
+    """
+    Обработчик after_create для Base.metadata: создаёт индекс и триггеры,
+    а если индекс создан впервые на непустой таблице — перестраивает его.
+    """
+    if connection.dialect.name != "sqlite":
+        return
+    exists = connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (SENTENCES_FTS_TABLE,)
+    ).first()
+    for ddl in SENTENCES_FTS_DDL:
+        connection.exec_driver_sql(ddl)
+    if not exists:
+        connection.exec_driver_sql(SENTENCES_FTS_REBUILD)
+
+
+_QUERY_TERM_RE = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def build_match_query(search: str) -> Optional[str]:
+    """
+    Переводит пользовательскую строку поиска в выражение FTS5 MATCH:
+    «в кавычках» — фраза, остальные слова — поиск по префиксу; всё через AND.
+    Спецсимволы FTS экранируются, поэтому ввод пользователя не ломает запрос.
+    """
+    parts: List[str] = []
+    for phrase, word in _QUERY_TERM_RE.findall(search or ""):
+        if phrase.strip():
+            parts.append('"' + phrase.strip() + '"')
+        elif word:
+            word = word.replace('"', "")
+            if word and any(ch.isalnum() for ch in word):
+                parts.append('"' + word + '"*')
+    return " AND ".join(parts) if parts else None
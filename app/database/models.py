@@ -1,8 +1,9 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Index, event
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from sqlalchemy.types import JSON
 from .config import Base
+from .fts import create_sentences_fts
 
 class User(Base):
     __tablename__ = "users"
@@ -22,8 +23,10 @@ class Sentence(Base):
     id = Column(Integer, primary_key=True, index=True)
     text = Column(String, index=True)  # Текст предложения
     is_corrected = Column(Integer, default=0)  # 0 - не исправлено, 1 - исправлено
+    content_hash = Column(String(64), index=True, nullable=True)  # sha256 нормализованного текста — поиск дубликатов
+    occurrences = Column(Integer, nullable=False, default=1, server_default="1")  # Сколько раз предложение встретилось при загрузках
     
-    tokens = relationship("Token", back_populates="sentence")
+    tokens = relationship("Token", back_populates="sentence", order_by="Token.id")
 
 class Token(Base):
     __tablename__ = 'tokens'
@@ -31,11 +34,90 @@ class Token(Base):
     id = Column(Integer, primary_key=True, index=True)
     # Новое поле для хранения индекса токена в предложении, поддерживает диапазоны
     token_index = Column(String, index=True)  # Индекс токена в предложении (например, "3-5" или "1")
-    form = Column(String, index=True)  # Форма токена (например, слово)
+    form = Column(String)  # Форма токена (например, слово)
     lemma = Column(String)  # Лемма токена
     pos = Column(String)  # Часть речи
     xpos = Column(String)  # Точная часть речи
-    feats = Column(JSON)  # Характеристики токена (например, морфологические признаки)
-    sentence_id = Column(Integer, ForeignKey("sentences.id"))
+    # Характеристики токена (морфологические признаки) — ссылка на общий набор признаков
+    feats_id = Column(Integer, ForeignKey("feature_bundles.id"), index=True, nullable=True)
+    sentence_id = Column(Integer, ForeignKey("sentences.id"), index=True)
     sentence = relationship("Sentence", back_populates="tokens")
-    
\ No newline at end of file
+    feature_bundle = relationship("FeatureBundle", lazy="joined")
+
+    @property
+    def feats(self):
+        """Признаки в прежнем виде: dict или None"""
+        return self.feature_bundle.feats if self.feature_bundle is not None else None
+
+    # Индексы для поиска по токенам (конкорданс)
+    __table_args__ = (
+        Index("ix_tokens_form_pos", "form", "pos"),
+        Index("ix_tokens_lemma_pos_xpos", "lemma", "pos", "xpos"),
+        Index("ix_tokens_pos_xpos", "pos", "xpos"),
+    )
+
+
+class FeatureBundle(Base):
+    __tablename__ = 'feature_bundles'
+
+    # Уникальный набор признаков, общий для всех токенов с такими же feats
+    id = Column(Integer, primary_key=True)
+    key = Column(String, unique=True, nullable=False)  # Канонический вид "Case=Nom|Number=Sing"
+    feats = Column(JSON, nullable=False)
+
+
+class FeatureBundleItem(Base):
+    __tablename__ = 'feature_bundle_items'
+
+    # Пары признак=значение каждого набора — для индексного поиска по признакам
+    name = Column(String(50), primary_key=True)
+    value = Column(String(50), primary_key=True)
+    bundle_id = Column(Integer, ForeignKey("feature_bundles.id"), primary_key=True, index=True)
+
+    __table_args__ = {"sqlite_with_rowid": False}
+
+
+class TaggingJob(Base):
+    __tablename__ = 'tagging_jobs'
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(20), nullable=False, default="tag", server_default="tag")  # tag - теггинг текста, import - загрузка conllu
+    status = Column(String(20), nullable=False, default="queued", index=True)  # queued, running, completed, failed, cancelled
+    text = Column(Text, nullable=True)  # Исходный текст для теггинга
+    source_path = Column(String, nullable=True)  # Загруженный файл conllu для импорта
+    duplicates = Column(String(10), nullable=False, default="skip", server_default="skip")  # Что делать с дубликатами: skip, link, replace, allow
+    progress_done = Column(Integer, nullable=False, default=0)  # Обработано частей (для импорта — байт файла)
+    progress_total = Column(Integer, nullable=False, default=0)  # Всего частей (0 - ещё неизвестно)
+    sentences_created = Column(Integer, nullable=False, default=0)
+    tokens_created = Column(Integer, nullable=False, default=0)
+    sentences_skipped = Column(Integer, nullable=False, default=0, server_default="0")
+    sentences_replaced = Column(Integer, nullable=False, default=0, server_default="0")
+    error = Column(Text, nullable=True)
+    created_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class CorpusCounter(Base):
+    __tablename__ = 'corpus_counters'
+
+    # sentences:<is_corrected> — число предложений по статусу, tokens — число токенов
+    name = Column(String(50), primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
+
+
+class TaggerCacheEntry(Base):
+    __tablename__ = 'tagger_cache'
+
+    # Ответ теггера для части текста: ключ — sha256(версия теггера + нормализованный текст)
+    key = Column(String(64), primary_key=True)
+    conllu = Column(Text, nullable=False)
+    size = Column(Integer, nullable=False)  # Размер conllu в байтах — для ограничения объёма кэша
+    hits = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    last_used_at = Column(DateTime(timezone=True), nullable=False, index=True)  # Для вытеснения LRU
+
+
+# Полнотекстовый индекс по sentences создаётся вместе с таблицами (см. fts.py)
+event.listen(Base.metadata, "after_create", create_sentences_fts)
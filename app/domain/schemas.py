@@ -40,3 +40,15 @@ class PageMeta(BaseModel):
 class PaginatedUsersResponse(BaseModel):
     meta: PageMeta
     items: List[UserResponse]
+
+
+class CursorPageMeta(BaseModel):
+    page_size: int
+    next_cursor: Optional[str] = None
+    has_more: bool
+    total_items: Optional[int] = None
+
+
+class CursorUsersResponse(BaseModel):
+    meta: CursorPageMeta
+    items: List[UserResponse]
@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from datetime import datetime
 from typing import List, Optional
 
 
@@ -10,6 +11,22 @@ class TagTextResponse(BaseModel):
     message: str
     sentences_created: int
     tokens_created: int
+    sentences_skipped: int = 0  # дубликаты, уже бывшие в корпусе (или в той же загрузке)
+    sentences_replaced: int = 0  # неисправленные предложения с заменённой разметкой (duplicates=replace)
+
+
+class TaggingJobResponse(BaseModel):
+    id: int
+    kind: str = "tag"  # tag - теггинг текста, import - импорт conllu
+    status: str  # queued, running, completed, failed, cancelled
+    progress_done: int
+    progress_total: int
+    progress: float
+    result: Optional[TagTextResponse] = None
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
 
 
 class TokenResponse(BaseModel):
@@ -38,6 +55,11 @@ class SentenceWithTokensResponse(SentenceResponse):
     tokens: List[TokenResponse]
 
 
+class SentencesWithTokensResponse(BaseModel):
+    items: List[SentenceWithTokensResponse]
+    missing: List[int]  # запрошенные id, которых нет в корпусе
+
+
 class PageMeta(BaseModel):
     current_page: int
     page_size: int
@@ -50,6 +72,36 @@ class PaginatedSentencesResponse(BaseModel):
     items: List[SentenceResponse]
 
 
+class CursorPageMeta(BaseModel):
+    page_size: int
+    next_cursor: Optional[str] = None
+    has_more: bool
+    total_items: Optional[int] = None
+
+
+class CursorSentencesResponse(BaseModel):
+    meta: CursorPageMeta
+    items: List[SentenceResponse]
+
+
+class KwicTokenResponse(BaseModel):
+    token_id: int
+    sentence_id: int
+    token_index: str
+    form: str
+    lemma: str
+    pos: str
+    xpos: str
+    feats: Optional[dict] = None
+    left: str   # левый контекст
+    right: str  # правый контекст
+
+
+class TokenSearchResponse(BaseModel):
+    meta: CursorPageMeta
+    items: List[KwicTokenResponse]
+
+
 class TokenUpdate(BaseModel):
     id: int
     token_index: Optional[str] = None
@@ -64,3 +116,24 @@ class UpdateSentenceRequest(BaseModel):
     sentence_text: Optional[str] = None
     is_corrected: Optional[int] = None
     tokens: Optional[List[TokenUpdate]] = None
+
+
+class BatchSentenceUpdate(UpdateSentenceRequest):
+    id: int
+
+
+class BatchUpdateRequest(BaseModel):
+    items: List[BatchSentenceUpdate]
+
+
+class BatchUpdateItemResult(BaseModel):
+    id: int
+    status: str  # updated, not_found, invalid
+    tokens_updated: int = 0
+    error: Optional[str] = None
+
+
+class BatchUpdateResponse(BaseModel):
+    updated: int
+    failed: int
+    items: List[BatchUpdateItemResult]
@@ -1,34 +1,60 @@
+from sqlalchemy import select, update
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from datetime import timedelta
+from typing import Optional, Tuple
+from app.database.config import run_db
 from app.database.models import User
 from app.domain.schemas import UserLogin, Token
-from app.shared.dependencies import verify_password, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
+from app.shared.dependencies import verify_and_update_password, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
 
-class AuthService:
-    def __init__(self, db: Session):
-        self.db = db
+def _find_user(db: Session, username: str) -> Optional[Tuple[int, str, bool, str, str]]:
+    """(id, password, is_active, username, role) или None"""
+    user = db.scalars(select(User).where(User.username == username)).first()
+    return (user.id, user.password, user.is_active, user.username, user.role) if user else None
+
+
+def _update_password_hash(db: Session, user_id: int, old_hash: str, new_hash: str) -> None:
+    db.execute(
+        update(User)
+        .where(User.id == user_id, User.password == old_hash)
+        .values(password=new_hash)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
 
+
+class AuthService:
     async def authenticate_user(self, user_data: UserLogin) -> Token:
         """Аутентификация пользователя"""
-        user = self.db.query(User).filter(User.username == user_data.username).first()
-        
-        if not user or not verify_password(user_data.password, user.password):
+        # Сессия закрывается до проверки пароля: соединение не держится, пока пароль ждёт в очереди на хэширование
+        user = await run_db(_find_user, user_data.username)
+        user_id, hashed_password, is_active, username, role = user or (None, None, None, None, None)
+
+        verified, new_hash = (False, None)
+        if user_id is not None:
+            verified, new_hash = await verify_and_update_password(user_data.password, hashed_password)
+
+        if not verified:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect username or password",
                 headers={"WWW-Authenticate": "Bearer"},
             )
 
-        if not user.is_active:
+        if not is_active:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Inactive user"
             )
 
+        # Прозрачный перевод хэша на текущую схему
+        if new_hash:
+            await run_db(_update_password_hash, user_id, hashed_password, new_hash)
+
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
         access_token = create_access_token(
-            data={"sub": user.username, "role": user.role}, expires_delta=access_token_expires
+            data={"sub": username, "role": role}, expires_delta=access_token_expires
         )
         
         return Token(access_token=access_token, token_type="bearer")
@@ -0,0 +1,73 @@
+"""
+Счётчики корпуса: число предложений по статусу исправления и число токенов.
+
+Обновляются в той же транзакции, что и сами данные, поэтому списки
+без поиска берут total_items отсюда за O(1) вместо COUNT(*) по таблице.
+Если счётчики разошлись с данными — rebuild() (python -m app.cli rebuild-counters).
+"""
+from typing import Dict, Optional
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.database.models import CorpusCounter, Sentence, Token
+
+TOKENS = "tokens"
+SENTENCES_PREFIX = "sentences:"
+
+
+def sentences_key(is_corrected: Optional[int]) -> str:
+    return f"{SENTENCES_PREFIX}{'null' if is_corrected is None else int(is_corrected)}"
+
+
+def increment(db: Session, deltas: Dict[str, int]) -> None:
+    """Прибавляет дельты к счётчикам (без commit — в транзакции вызывающего)."""
+    for name, delta in deltas.items():
+        if not delta:
+            continue
+        result = db.execute(
+            update(CorpusCounter)
+            .where(CorpusCounter.name == name)
+            .values(value=CorpusCounter.value + delta)
+        )
+        if result.rowcount == 0:
+            db.execute(insert(CorpusCounter).values(name=name, value=delta))
+
+
+def get_all(db: Session) -> Dict[str, int]:
+    return {name: value for name, value in db.execute(select(CorpusCounter.name, CorpusCounter.value))}
+
+
+def sentence_total(db: Session, status_filter: Optional[int] = None) -> int:
+    """Число предложений (всех или с данным is_corrected) по счётчикам."""
+    if status_filter is not None:
+        value = db.execute(
+            select(CorpusCounter.value).where(CorpusCounter.name == sentences_key(status_filter))
+        ).scalar()
+        return value or 0
+    value = db.execute(
+        select(func.sum(CorpusCounter.value)).where(CorpusCounter.name.like(f"{SENTENCES_PREFIX}%"))
+    ).scalar()
+    return value or 0
+
+
+def rebuild(db: Session) -> Dict[str, int]:
+    """Пересчитывает все счётчики по таблицам (без commit)."""
+    counters = {
+        sentences_key(is_corrected): count
+        for is_corrected, count in db.execute(
+            select(Sentence.is_corrected, func.count()).group_by(Sentence.is_corrected)
+        )
+    }
+    counters[TOKENS] = db.execute(select(func.count()).select_from(Token)).scalar() or 0
+
+    db.execute(delete(CorpusCounter))
+    db.execute(insert(CorpusCounter), [{"name": name, "value": value} for name, value in counters.items()])
+    return counters
+
+
+def ensure_initialized(db: Session) -> None:
+    """Заполняет счётчики при первом запуске на существующей БД."""
+    if db.execute(select(CorpusCounter.name).limit(1)).first() is None:
+        rebuild(db)
+        db.commit()
@@ -0,0 +1,155 @@
+"""
+Поиск дубликатов предложений по content_hash (sha256 нормализованного текста).
+
+Режимы записи (duplicates) для bulk_store:
+  skip    — дубликат не записывается;
+  link    — не записывается, у существующего предложения растёт occurrences;
+  replace — токены неисправленного предложения заменяются новой разметкой
+            (исправленные аннотатором не трогаются и считаются пропущенными);
+  allow   — без проверки, как раньше.
+"""
+import hashlib
+import os
+from typing import Dict, Iterable, List, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import bindparam, delete, func, select
+from sqlalchemy.orm import Session
+
+from app.database.models import Sentence, Token
+from app.internal.tagging import counters
+from app.internal.tagging.tagger_cache import normalize_segment
+
+DUPLICATES_SKIP = "skip"
+DUPLICATES_LINK = "link"
+DUPLICATES_REPLACE = "replace"
+DUPLICATES_ALLOW = "allow"
+DUPLICATE_MODES = (DUPLICATES_SKIP, DUPLICATES_LINK, DUPLICATES_REPLACE, DUPLICATES_ALLOW)
+
+# Режим по умолчанию для теггинга и импорта
+INGEST_DUPLICATES = os.getenv("INGEST_DUPLICATES", DUPLICATES_SKIP)
+
+_LOOKUP_CHUNK = 500
+
+_sentences = Sentence.__table__
+
+# executemany-обновления по id
+_SET_HASH = _sentences.update().where(_sentences.c.id == bindparam("sid")).values(content_hash=bindparam("content_hash"))
+_ADD_OCCURRENCES = (
+    _sentences.update()
+    .where(_sentences.c.id == bindparam("sid"))
+    .values(occurrences=_sentences.c.occurrences + bindparam("extra"))
+)
+
+
+def validate_mode(mode: str) -> str:
+    if mode not in DUPLICATE_MODES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"duplicates must be one of: {', '.join(DUPLICATE_MODES)}",
+        )
+    return mode
+
+
+def sentence_hash(text: str) -> str:
+    return hashlib.sha256(normalize_segment(text or "").encode("utf-8")).hexdigest()
+
+
+def existing_sentences(db: Session, hashes: Iterable[str]) -> Dict[str, Tuple[int, int]]:
+    """hash -> (id, is_corrected) уже записанных предложений; из нескольких — исправленное, иначе меньший id."""
+    hashes = list(set(hashes))
+    found: Dict[str, Tuple[int, int]] = {}
+    for start in range(0, len(hashes), _LOOKUP_CHUNK):
+        rows = db.execute(
+            select(Sentence.content_hash, Sentence.id, Sentence.is_corrected)
+            .where(Sentence.content_hash.in_(hashes[start:start + _LOOKUP_CHUNK]))
+            .order_by(Sentence.id.asc())
+        )
+        for content_hash, sentence_id, is_corrected in rows:
+            current = found.get(content_hash)
+            if current is None or (is_corrected == 1 and current[1] != 1):
+                found[content_hash] = (sentence_id, is_corrected or 0)
+    return found
+
+
+def add_occurrences(db: Session, extra_by_id: Dict[int, int]) -> None:
+    if extra_by_id:
+        db.execute(_ADD_OCCURRENCES, [{"sid": sid, "extra": extra} for sid, extra in extra_by_id.items()])
+
+
+def backfill_hashes(db: Session, batch_size: int = 5000) -> int:
+    """Заполняет content_hash там, где его нет (keyset по id, commit на пачку)."""
+    filled = 0
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(Sentence.id, Sentence.text)
+            .where(Sentence.id > last_id, Sentence.content_hash.is_(None))
+            .order_by(Sentence.id.asc())
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return filled
+        db.execute(_SET_HASH, [{"sid": sentence_id, "content_hash": sentence_hash(text)} for sentence_id, text in rows])
+        db.commit()
+        filled += len(rows)
+        last_id = rows[-1][0]
+
+
+def dedup_existing(db: Session, batch_size: int = 1000) -> Dict[str, int]:
+    """
+    Разовая чистка уже записанных дубликатов пачками по batch_size групп.
+    В группе остаётся исправленное предложение (или с меньшим id), неисправленные
+    копии удаляются вместе с токенами, их occurrences переносятся на оставшееся.
+    Исправленные аннотатором копии не удаляются.
+    """
+    result = {"hashed": backfill_hashes(db), "groups": 0, "sentences_removed": 0, "tokens_removed": 0}
+    last_hash = ""
+    while True:
+        hashes: List[str] = db.execute(
+            select(Sentence.content_hash)
+            .where(Sentence.content_hash > last_hash)
+            .group_by(Sentence.content_hash)
+            .having(func.count() > 1)
+            .order_by(Sentence.content_hash.asc())
+            .limit(batch_size)
+        ).scalars().all()
+        if not hashes:
+            return result
+        last_hash = hashes[-1]
+
+        groups: Dict[str, List[Tuple[int, int, int]]] = {}
+        for content_hash, sentence_id, is_corrected, occurrences in db.execute(
+            select(Sentence.content_hash, Sentence.id, Sentence.is_corrected, Sentence.occurrences)
+            .where(Sentence.content_hash.in_(hashes))
+            .order_by(Sentence.id.asc())
+        ):
+            groups.setdefault(content_hash, []).append((sentence_id, is_corrected or 0, occurrences or 1))
+
+        removed: List[int] = []
+        removed_by_status: Dict[int, int] = {}
+        extra: Dict[int, int] = {}
+        for rows in groups.values():
+            keeper = next((row for row in rows if row[1] == 1), rows[0])
+            for sentence_id, is_corrected, occurrences in rows:
+                if sentence_id == keeper[0] or is_corrected == 1:
+                    continue
+                removed.append(sentence_id)
+                removed_by_status[is_corrected] = removed_by_status.get(is_corrected, 0) + 1
+                extra[keeper[0]] = extra.get(keeper[0], 0) + occurrences
+
+        tokens_removed = 0
+        for start in range(0, len(removed), _LOOKUP_CHUNK):
+            ids = removed[start:start + _LOOKUP_CHUNK]
+            tokens_removed += db.execute(delete(Token).where(Token.sentence_id.in_(ids))).rowcount
+            db.execute(delete(Sentence).where(Sentence.id.in_(ids)))
+        add_occurrences(db, extra)
+
+        deltas = {counters.sentences_key(is_corrected): -count for is_corrected, count in removed_by_status.items()}
+        deltas[counters.TOKENS] = -tokens_removed
+        counters.increment(db, deltas)
+        db.commit()
+
+        result["groups"] += len(groups)
+        result["sentences_removed"] += len(removed)
+        result["tokens_removed"] += tokens_removed
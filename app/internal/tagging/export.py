@@ -0,0 +1,149 @@
+"""
+Экспорт корпуса в CoNLL-U — обратная операция к TaggingService._parse_conllu.
+
+MISC токенов не хранится: SpaceAfter=No восстанавливается по тексту предложения,
+поэтому экспорт и повторный импорт дают тот же текст.
+
+Корпус читается одним запросом sentences ⟕ tokens ⟕ feature_bundles в порядке
+(sentence_id, token id) через серверный курсор пачками по EXPORT_BATCH_SIZE строк:
+память не зависит от размера корпуса, первые байты уходят клиенту сразу.
+"""
+import os
+import zlib
+from typing import Iterator, List, Optional, Sequence
+
+from fastapi import HTTPException, status
+from sqlalchemy import Select, literal_column, select
+
+from app.database.config import IS_SQLITE, SessionLocal
+from app.database.fts import build_match_query, sentences_fts, SENTENCES_FTS_TABLE
+from app.database.models import FeatureBundle, Sentence, Token
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "5000"))  # строк за одну выборку курсора
+EXPORT_CHUNK_BYTES = 64 * 1024  # размер куска ответа
+
+
+def export_query(
+    is_corrected: Optional[int] = None,
+    id_from: Optional[int] = None,
+    id_to: Optional[int] = None,
+    search: Optional[str] = None,
+) -> Select:
+    """Строки экспорта: предложение и его токены (без токенов — одна строка с NULL)."""
+    query = (
+        select(
+            Sentence.id,
+            Sentence.text,
+            Token.id.label("token_id"),
+            Token.token_index,
+            Token.form,
+            Token.lemma,
+            Token.pos,
+            Token.xpos,
+            FeatureBundle.key,
+        )
+        .select_from(Sentence)
+        .outerjoin(Token, Token.sentence_id == Sentence.id)
+        .outerjoin(FeatureBundle, FeatureBundle.id == Token.feats_id)
+    )
+    if is_corrected is not None:
+        query = query.where(Sentence.is_corrected == is_corrected)
+    if id_from is not None:
+        query = query.where(Sentence.id >= id_from)
+    if id_to is not None:
+        query = query.where(Sentence.id <= id_to)
+    if search:
+        if IS_SQLITE:
+            match_query = build_match_query(search)
+            if match_query is None:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Search query has no searchable terms")
+            query = (
+                query.join(sentences_fts, sentences_fts.c.rowid == Sentence.id)
+                .where(literal_column(SENTENCES_FTS_TABLE).op("MATCH")(match_query))
+            )
+        else:
+            query = query.where(Sentence.text.ilike(f"%{search}%"))
+    return query.order_by(Sentence.id.asc(), Token.id.asc())
+
+
+def _field(value: Optional[str]) -> str:
+    return value if value else "_"
+
+
+def space_after(text: str, forms: Sequence[Optional[str]]) -> List[bool]:
+    """
+    Есть ли пробел после каждой формы в тексте предложения. Формы ищутся
+    по порядку; не найденную (текст правили отдельно от токенов) считаем
+    отделённой пробелом, как и последнюю.
+    """
+    flags = []
+    position = 0
+    for form in forms:
+        found = text.find(form, position) if form else -1
+        if found < 0:
+            flags.append(True)
+            continue
+        position = found + len(form)
+        flags.append(position >= len(text) or text[position].isspace())
+    return flags
+
+
+def format_sentence(sentence_id: int, text: Optional[str], token_rows: Sequence) -> str:
+    """Одно предложение в CoNLL-U: sent_id, text, строки токенов и пустая строка."""
+    text = " ".join((text or "").split())
+    lines = [f"# sent_id = {sentence_id}", f"# text = {text}"]
+    for row, spaced in zip(token_rows, space_after(text, [row.form for row in token_rows])):
+        lines.append("\t".join((
+            _field(row.token_index),
+            _field(row.form),
+            _field(row.lemma),
+            _field(row.pos),
+            _field(row.xpos),
+            _field(row.key),
+            "_", "_", "_",
+            "_" if spaced else "SpaceAfter=No",
+        )))
+    return "\n".join(lines) + "\n\n"
+
+
+def stream_conllu(query: Select, compress: bool = False) -> Iterator[bytes]:
+    """
+    Отдаёт корпус кусками по ~EXPORT_CHUNK_BYTES (gzip при compress).
+    Сессия открывается внутри генератора и живёт, пока идёт ответ;
+    StreamingResponse читает генератор в пуле потоков.
+    """
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    buffer: List[str] = []
+    buffered = 0
+
+    def encode(data: str) -> bytes:
+        raw = data.encode("utf-8")
+        return compressor.compress(raw) if compressor else raw
+
+    with SessionLocal() as db:
+        result = db.execute(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        current_id, current_text, token_rows = None, None, []
+        for partition in result.partitions():
+            for row in partition:
+                if row.id != current_id:
+                    if current_id is not None:
+                        block = format_sentence(current_id, current_text, token_rows)
+                        buffer.append(block)
+                        buffered += len(block)
+                    current_id, current_text, token_rows = row.id, row.text, []
+                # предложение без токенов — одна строка с NULL из внешнего соединения
+                if row.token_id is not None:
+                    token_rows.append(row)
+            if buffered >= EXPORT_CHUNK_BYTES:
+                chunk = encode("".join(buffer))
+                buffer, buffered = [], 0
+                if chunk:
+                    yield chunk
+        if current_id is not None:
+            buffer.append(format_sentence(current_id, current_text, token_rows))
+
+    tail = encode("".join(buffer))
+    if compressor:
+        tail += compressor.flush()
+    if tail:
+        yield tail
@@ -0,0 +1,73 @@
+"""
+Интернирование морфологических признаков.
+
+Каждый уникальный набор feats хранится один раз в feature_bundles
+(плюс его пары в feature_bundle_items для поиска), токены ссылаются
+на него через tokens.feats_id.
+"""
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from app.database.models import FeatureBundle, FeatureBundleItem
+
+
+def bundle_key(feats: Optional[Dict[str, str]]) -> Optional[str]:
+    """Канонический ключ набора: пары name=value через '|', отсортированные по имени."""
+    if not feats:
+        return None
+    return "|".join(f"{name}={feats[name]}" for name in sorted(feats, key=str.lower))
+
+
+def resolve_bundle_ids(db: Session, feats_list: Iterable[Optional[Dict[str, str]]]) -> List[Optional[int]]:
+    """
+    Возвращает feats_id для каждого набора признаков (None для пустых),
+    создавая недостающие наборы. Без commit — в транзакции вызывающего.
+    """
+    feats_list = list(feats_list)
+    keys = [bundle_key(feats) for feats in feats_list]
+    wanted = {key: feats for key, feats in zip(keys, feats_list) if key is not None}
+    if not wanted:
+        return [None] * len(keys)
+
+    ids = _select_bundle_ids(db, wanted)
+    missing = [key for key in wanted if key not in ids]
+    if missing:
+        db.execute(
+            insert(FeatureBundle.__table__).prefix_with("OR IGNORE", dialect="sqlite"),
+            [
+                {"key": key, "feats": {name: wanted[key][name] for name in sorted(wanted[key], key=str.lower)}}
+                for key in missing
+            ],
+        )
+        created = _select_bundle_ids(db, missing)
+        db.execute(
+            insert(FeatureBundleItem.__table__).prefix_with("OR IGNORE", dialect="sqlite"),
+            [
+                {"bundle_id": created[key], "name": name, "value": value}
+                for key in missing
+                for name, value in wanted[key].items()
+            ],
+        )
+        ids.update(created)
+
+    return [ids[key] if key is not None else None for key in keys]
+
+
+def _select_bundle_ids(db: Session, keys: Iterable[str]) -> Dict[str, int]:
+    # по 500 ключей: ограничение SQLite на число параметров запроса
+    keys = list(keys)
+    ids: Dict[str, int] = {}
+    for start in range(0, len(keys), 500):
+        ids.update(db.execute(
+            select(FeatureBundle.key, FeatureBundle.id).where(FeatureBundle.key.in_(keys[start:start + 500]))
+        ).all())
+    return ids
+
+
+def bundles_with_feature(name: str, value: str):
+    """Подзапрос id наборов, содержащих пару name=value."""
+    return select(FeatureBundleItem.bundle_id).where(
+        FeatureBundleItem.name == name, FeatureBundleItem.value == value
+    )
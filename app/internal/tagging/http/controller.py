@@ -1,51 +1,144 @@
-from fastapi import Depends, HTTPException, status
+import os
+from fastapi import HTTPException, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import bindparam, func, literal_column, select
 from sqlalchemy.orm import Session
-from typing import Optional
-from app.database.config import get_db
-from app.database.models import Sentence, Token
+from typing import Optional, Dict, List, Tuple
+from app.database.config import IS_SQLITE, run_db
+from app.database.fts import sentences_fts, build_match_query, SENTENCES_FTS_TABLE
+from app.database.models import FeatureBundle, Sentence, Token, TaggingJob
 from app.domain.tagging_schemas import (
     TagTextRequest,
     TagTextResponse,
-    PaginatedSentencesResponse,
-    PageMeta,
-    SentenceResponse,
-    SentenceWithTokensResponse,
+    TaggingJobResponse,
     UpdateSentenceRequest,
+    BatchSentenceUpdate,
+    BatchUpdateRequest,
+    BatchUpdateItemResult,
+    BatchUpdateResponse,
 )
-from app.internal.tagging.service import TaggingService
+from app.internal.tagging import counters, dedup, tagger_cache
+from app.internal.tagging.export import export_query, stream_conllu
+from app.internal.tagging.features import resolve_bundle_ids, bundles_with_feature
+from app.internal.tagging.jobs import tagging_jobs, save_import_upload, JOB_COMPLETED, JOB_KIND_IMPORT
+from app.shared.pagination import encode_cursor, decode_cursor
+from app.shared.responses import FastJSONResponse
+
+# Максимум предложений в одном PATCH /tagging/sentences
+BATCH_UPDATE_MAX_ITEMS = int(os.getenv("BATCH_UPDATE_MAX_ITEMS", "1000"))
+# Максимум id в GET /tagging/sentences/multi
+MULTI_GET_MAX_IDS = int(os.getenv("MULTI_GET_MAX_IDS", "1000"))
+
+_TOKEN_FIELDS = ("token_index", "form", "lemma", "pos", "xpos")
 
 
 class TaggingController:
     def __init__(self):
         pass
 
-    async def tag_text(self, payload: TagTextRequest, db: Session = Depends(get_db)) -> TagTextResponse:
-        service = TaggingService(db)
-        s_count, t_count = service.tag_and_store(payload.text)
-        return TagTextResponse(message="Теггинг выполнен", sentences_created=s_count, tokens_created=t_count)
+    def tag_text(self, db: Session, payload: TagTextRequest, created_by: Optional[int] = None, duplicates: Optional[str] = None) -> TaggingJobResponse:
+        """Ставит текст в очередь теггинга и сразу возвращает задачу"""
+        duplicates = dedup.validate_mode(duplicates or dedup.INGEST_DUPLICATES)
+        job = tagging_jobs.submit(db, payload.text, created_by, duplicates)
+        return self._job_response(job)
+
+    async def import_conllu(self, file: UploadFile, created_by: Optional[int] = None, duplicates: Optional[str] = None) -> TaggingJobResponse:
+        """Ставит в очередь импорт готового conllu (.conllu или .conllu.gz) без теггера"""
+        duplicates = dedup.validate_mode(duplicates or dedup.INGEST_DUPLICATES)
+        filename = (file.filename or "").lower()
+        if not filename.endswith((".conllu", ".conllu.gz", ".conll", ".conll.gz")):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Only .conllu or .conllu.gz files are supported")
+        suffix = ".conllu.gz" if filename.endswith(".gz") else ".conllu"
+        path = await run_in_threadpool(save_import_upload, file.file, suffix)
+        job = await run_db(tagging_jobs.submit_import, path, created_by, duplicates)
+        return self._job_response(job)
+
+    def get_job(self, db: Session, job_id: int) -> TaggingJobResponse:
+        return self._job_response(tagging_jobs.get(db, job_id))
+
+    def cancel_job(self, db: Session, job_id: int) -> TaggingJobResponse:
+        return self._job_response(tagging_jobs.cancel(db, job_id))
+
+    def get_tagger_cache_stats(self, db: Session) -> dict:
+        """Попадания, промахи, сэкономленные байты и объём кэша ответов теггера"""
+        return tagger_cache.stats(db)
+
+    def _job_response(self, job: TaggingJob) -> TaggingJobResponse:
+        done, total = tagging_jobs.live_progress(job.id) or (job.progress_done, job.progress_total)
+        if job.status == JOB_COMPLETED:
+            progress = 1.0
+        else:
+            progress = round(done / total, 4) if total else 0.0
+
+        result = None
+        if job.status == JOB_COMPLETED:
+            result = TagTextResponse(
+                message="Импорт выполнен" if job.kind == JOB_KIND_IMPORT else "Теггинг выполнен",
+                sentences_created=job.sentences_created,
+                tokens_created=job.tokens_created,
+                sentences_skipped=job.sentences_skipped,
+                sentences_replaced=job.sentences_replaced,
+            )
+
+        return TaggingJobResponse(
+            id=job.id,
+            kind=job.kind,
+            status=job.status,
+            progress_done=done,
+            progress_total=total,
+            progress=progress,
+            result=result,
+            error=job.error,
+            created_at=job.created_at,
+            started_at=job.started_at,
+            finished_at=job.finished_at,
+        )
+
+    def _filtered_sentences_query(self, search: Optional[str], status_filter: Optional[int]):
+        """Запрос предложений (id, text, is_corrected) с фильтрами; второй элемент — есть ли ранжирование FTS."""
+        query = select(Sentence.id, Sentence.text, Sentence.is_corrected)
+
+        # Фильтр по статусу
+        if status_filter is not None:
+            query = query.where(Sentence.is_corrected == status_filter)
 
-    async def list_sentences(
+        # Поиск по тексту: FTS5 (префиксы, "фразы"), результаты по релевантности
+        ranked = False
+        if search:
+            if IS_SQLITE:
+                match_query = build_match_query(search)
+                if match_query is None:
+                    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Search query has no searchable terms")
+                query = (
+                    query.join(sentences_fts, sentences_fts.c.rowid == Sentence.id)
+                    .where(literal_column(SENTENCES_FTS_TABLE).op("MATCH")(match_query))
+                )
+                ranked = True
+            else:
+                query = query.where(Sentence.text.ilike(f"%{search}%"))
+        return query, ranked
+
+    def _count_sentences(self, db: Session, query, search: Optional[str], status_filter: Optional[int]) -> int:
+        # без поиска total берётся из счётчиков корпуса, с поиском — COUNT по индексу FTS
+        if search:
+            return db.execute(select(func.count()).select_from(query.subquery())).scalar_one()
+        return counters.sentence_total(db, status_filter)
+
+    def list_sentences(
     self,
+    db: Session,
     page: int,
     page_size: int,
     search: Optional[str],
-    status: Optional[int],
-    db: Session = Depends(get_db)
-) -> PaginatedSentencesResponse:
+    status_filter: Optional[int],
+) -> FastJSONResponse:
         if page < 1 or page_size < 1:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="page and page_size must be >= 1")
 
-        query = db.query(Sentence)
-
-        # Фильтр по статусу
-        if status is not None:
-            query = query.filter(Sentence.is_corrected == status)
-
-        # Поиск по тексту
-        if search:
-            query = query.filter(Sentence.text.ilike(f"%{search}%"))
+        query, ranked = self._filtered_sentences_query(search, status_filter)
 
-        total_items = query.count()
+        total_items = self._count_sentences(db, query, search, status_filter)
         total_pages = (total_items + page_size - 1) // page_size
         if total_pages == 0:
             total_pages = 1
@@ -53,83 +146,350 @@ class TaggingController:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Page out of range")
 
         offset = (page - 1) * page_size
-        sentences = (
-            query.order_by(Sentence.id.asc())
+        order_by = (sentences_fts.c.rank, Sentence.id.asc()) if ranked else (Sentence.id.asc(),)
+        rows = db.execute(
+            query.order_by(*order_by)
             .limit(page_size)
             .offset(offset)
-            .all()
+        ).all()
+
+        return FastJSONResponse({
+            "meta": {
+                "current_page": page,
+                "page_size": page_size,
+                "total_pages": total_pages,
+                "total_items": total_items,
+            },
+            "items": [self._sentence_item(row) for row in rows],
+        })
+
+    def _sentence_item(self, row) -> dict:
+        """Строка (id, text, is_corrected) в форме SentenceResponse."""
+        return {"id": row.id, "text": row.text, "is_corrected": row.is_corrected}
+
+    def list_sentences_by_cursor(
+        self,
+        db: Session,
+        cursor: Optional[str],
+        page_size: int,
+        search: Optional[str],
+        status_filter: Optional[int],
+        with_total: bool = False,
+    ) -> FastJSONResponse:
+        """Keyset-пагинация по id: стоимость страницы не зависит от её глубины, count — по запросу."""
+        if page_size < 1:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="page_size must be >= 1")
+
+        filters = {"search": search, "status": status_filter}
+        after_id = decode_cursor(cursor, filters)
+        query, _ = self._filtered_sentences_query(search, status_filter)
+
+        total_items = self._count_sentences(db, query, search, status_filter) if with_total else None
+
+        if after_id is not None:
+            query = query.where(Sentence.id > after_id)
+        rows = db.execute(query.order_by(Sentence.id.asc()).limit(page_size + 1)).all()
+
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(rows[-1].id, filters) if has_more else None
+
+        return FastJSONResponse({
+            "meta": {
+                "page_size": page_size,
+                "next_cursor": next_cursor,
+                "has_more": has_more,
+                "total_items": total_items,
+            },
+            "items": [self._sentence_item(row) for row in rows],
+        })
+
+    def search_tokens(
+        self,
+        db: Session,
+        form: Optional[str],
+        lemma: Optional[str],
+        pos: Optional[str],
+        xpos: Optional[str],
+        feats: Optional[str],
+        context: int,
+        cursor: Optional[str],
+        page_size: int,
+    ) -> FastJSONResponse:
+        """
+        Конкорданс (KWIC): токены по форме/лемме/POS/XPOS/признакам с контекстом.
+        Фильтры идут по составным индексам tokens и по парам наборов признаков, страницы — keyset по id токена.
+        """
+        if page_size < 1 or context < 0:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="page_size must be >= 1 and context >= 0")
+
+        feats_filter = self._parse_feats_filter(feats)
+        if not any((form, lemma, pos, xpos, feats_filter)):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Provide at least one of form, lemma, pos, xpos, feats")
+
+        filters = {"form": form, "lemma": lemma, "pos": pos, "xpos": xpos, "feats": feats_filter}
+        after_id = decode_cursor(cursor, filters)
+
+        query = select(Token)
+        if form:
+            query = query.where(Token.form == form)
+        if lemma:
+            query = query.where(Token.lemma == lemma)
+        if pos:
+            query = query.where(Token.pos == pos)
+        if xpos:
+            query = query.where(Token.xpos == xpos)
+        for name, value in feats_filter.items():
+            query = query.where(Token.feats_id.in_(bundles_with_feature(name, value)))
+        if after_id is not None:
+            query = query.where(Token.id > after_id)
+
+        hits = db.scalars(query.order_by(Token.id.asc()).limit(page_size + 1)).unique().all()
+        has_more = len(hits) > page_size
+        hits = hits[:page_size]
+
+        # контекст: все токены затронутых предложений одним запросом
+        sentence_ids = {t.sentence_id for t in hits}
+        by_sentence: Dict[int, List[Token]] = {}
+        if sentence_ids:
+            for t in db.scalars(
+                select(Token)
+                .where(Token.sentence_id.in_(sentence_ids))
+                .order_by(Token.sentence_id.asc(), Token.id.asc())
+            ).unique():
+                by_sentence.setdefault(t.sentence_id, []).append(t)
+
+        items = []
+        for hit in hits:
+            sentence_tokens = by_sentence.get(hit.sentence_id, [])
+            position = next(i for i, t in enumerate(sentence_tokens) if t.id == hit.id)
+            left = sentence_tokens[max(0, position - context):position] if context else []
+            right = sentence_tokens[position + 1:position + 1 + context]
+            items.append({
+                "token_id": hit.id,
+                "sentence_id": hit.sentence_id,
+                "token_index": hit.token_index,
+                "form": hit.form,
+                "lemma": hit.lemma,
+                "pos": hit.pos,
+                "xpos": hit.xpos,
+                "feats": hit.feats,
+                "left": " ".join(t.form for t in left),
+                "right": " ".join(t.form for t in right),
+            })
+
+        # форма TokenSearchResponse, без повторной проверки по response_model
+        return FastJSONResponse({
+            "meta": {
+                "page_size": page_size,
+                "next_cursor": encode_cursor(hits[-1].id, filters) if has_more else None,
+                "has_more": has_more,
+                "total_items": None,
+            },
+            "items": items,
+        })
+
+    def export_conllu(
+        self,
+        is_corrected: Optional[int],
+        id_from: Optional[int],
+        id_to: Optional[int],
+        search: Optional[str],
+        compress: bool = False,
+    ) -> StreamingResponse:
+        """Потоковая выгрузка корпуса в CoNLL-U (опционально gzip)"""
+        if id_from is not None and id_to is not None and id_from > id_to:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="id_from must be <= id_to")
+        # запрос строится до начала ответа, чтобы ошибки фильтров вернулись как 400
+        query = export_query(is_corrected=is_corrected, id_from=id_from, id_to=id_to, search=search)
+        filename = "corpus.conllu.gz" if compress else "corpus.conllu"
+        return StreamingResponse(
+            stream_conllu(query, compress=compress),
+            media_type="application/gzip" if compress else "text/plain; charset=utf-8",
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'},
         )
 
-        items = [SentenceResponse.model_validate(s) for s in sentences]
+    def _parse_feats_filter(self, feats: Optional[str]) -> Dict[str, str]:
+        """Фильтр признаков в формате conllu: Tense=Past|Person=1"""
+        result: Dict[str, str] = {}
+        if not feats:
+            return result
+        for item in feats.split('|'):
+            item = item.strip()
+            if not item:
+                continue
+            if '=' not in item:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid feats filter: {item}")
+            k, v = item.split('=', 1)
+            result[k.strip()] = v.strip()
+        return result
 
-        return PaginatedSentencesResponse(
-            meta=PageMeta(
-                current_page=page,
-                page_size=page_size,
-                total_pages=total_pages,
-                total_items=total_items
-            ),
-            items=items,
+    def _sentences_with_tokens_query(self, sentence_ids: List[int]):
+        """Предложения с токенами (по порядку) и признаками — одним запросом, без ORM-объектов."""
+        return (
+            select(
+                Sentence.id,
+                Sentence.text,
+                Sentence.is_corrected,
+                Token.id.label("token_id"),
+                Token.token_index,
+                Token.form,
+                Token.lemma,
+                Token.pos,
+                Token.xpos,
+                FeatureBundle.feats,
+            )
+            .select_from(Sentence)
+            .outerjoin(Token, Token.sentence_id == Sentence.id)
+            .outerjoin(FeatureBundle, FeatureBundle.id == Token.feats_id)
+            .where(Sentence.id.in_(sentence_ids))
+            .order_by(Sentence.id, Token.id)
         )
 
+    def _load_sentences_with_tokens(self, db: Session, sentence_ids: List[int]) -> Dict[int, dict]:
+        """id -> готовый к отдаче dict в форме SentenceWithTokensResponse (строки сразу в JSON, без повторной валидации)."""
+        sentences: Dict[int, dict] = {}
+        for row in db.execute(self._sentences_with_tokens_query(sentence_ids)):
+            sentence = sentences.get(row.id)
+            if sentence is None:
+                sentence = sentences[row.id] = {"id": row.id, "text": row.text, "is_corrected": row.is_corrected, "tokens": []}
+            if row.token_id is not None:
+                sentence["tokens"].append({
+                    "id": row.token_id,
+                    "token_index": row.token_index,
+                    "form": row.form,
+                    "lemma": row.lemma,
+                    "pos": row.pos,
+                    "xpos": row.xpos,
+                    "feats": row.feats,
+                })
+        return sentences
 
-    async def get_sentence_with_tokens(self, sentence_id: int, db: Session = Depends(get_db)) -> SentenceWithTokensResponse:
-        sentence = db.query(Sentence).filter(Sentence.id == sentence_id).first()
+    def get_sentence_with_tokens(self, db: Session, sentence_id: int) -> FastJSONResponse:
+        sentence = self._load_sentences_with_tokens(db, [sentence_id]).get(sentence_id)
         if not sentence:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Sentence not found")
-        # ensure tokens are loaded
-        _ = sentence.tokens  # access relationship
-        return SentenceWithTokensResponse(
-            id=sentence.id,
-            text=sentence.text,
-            is_corrected=sentence.is_corrected,
-            tokens=[
-                {
-                    "id": t.id,
-                    "token_index": t.token_index,
-                    "form": t.form,
-                    "lemma": t.lemma,
-                    "pos": t.pos,
-                    "xpos": t.xpos,
-                    "feats": t.feats,
-                }
-                for t in sentence.tokens
-            ],
-        )
+        return FastJSONResponse(sentence)
 
-    async def update_sentence_and_tokens(self, sentence_id: int, payload: UpdateSentenceRequest, db: Session = Depends(get_db)) -> SentenceWithTokensResponse:
-        sentence = db.query(Sentence).filter(Sentence.id == sentence_id).first()
-        if not sentence:
+    def get_sentences_with_tokens(self, db: Session, ids: List[str]) -> FastJSONResponse:
+        """Несколько предложений с токенами одним запросом; ids — повторяющийся параметр или через запятую"""
+        try:
+            sentence_ids = list(dict.fromkeys(int(i) for value in ids for i in value.split(",") if i.strip()))
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="ids must be integers")
+        if not sentence_ids:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="ids must not be empty")
+        if len(sentence_ids) > MULTI_GET_MAX_IDS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Too many ids: at most {MULTI_GET_MAX_IDS} per request",
+            )
+        sentences = self._load_sentences_with_tokens(db, sentence_ids)
+        return FastJSONResponse({
+            "items": [sentences[i] for i in sentence_ids if i in sentences],
+            "missing": [i for i in sentence_ids if i not in sentences],
+        })
+
+    def update_sentence_and_tokens(self, db: Session, sentence_id: int, payload: UpdateSentenceRequest) -> FastJSONResponse:
+        """Одно предложение через пакетный путь: проверка и UPDATE без загрузки ORM-объектов"""
+        result = self.update_sentences_batch(
+            db, BatchUpdateRequest(items=[BatchSentenceUpdate(id=sentence_id, **payload.model_dump())])
+        )
+        item = result.items[0]
+        if item.status == "not_found":
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Sentence not found")
+        if item.status != "updated":
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=item.error)
+        return self.get_sentence_with_tokens(db, sentence_id)
+
+    def update_sentences_batch(self, db: Session, payload: BatchUpdateRequest) -> BatchUpdateResponse:
+        """
+        Исправление многих предложений одной транзакцией: проверка — двумя запросами
+        на всю пачку, изменения — executemany-UPDATE, сгруппированные по набору полей.
+        Ошибочные элементы (нет предложения, чужой токен) пропускаются и возвращаются в ответе.
+        """
+        if len(payload.items) > BATCH_UPDATE_MAX_ITEMS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Too many items: at most {BATCH_UPDATE_MAX_ITEMS} per request",
+            )
 
-        if payload.sentence_text is not None:
-            sentence.text = payload.sentence_text
-        if payload.is_corrected is not None:
-            sentence.is_corrected = 1
-
-        if payload.tokens:
-            # Update provided tokens by id
-            token_ids = [t.id for t in payload.tokens]
-            db_tokens = db.query(Token).filter(Token.id.in_(token_ids), Token.sentence_id == sentence.id).all()
-            db_tokens_by_id = {t.id: t for t in db_tokens}
-            for t_update in payload.tokens:
-                db_t = db_tokens_by_id.get(t_update.id)
-                if not db_t:
-                    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Token id {t_update.id} not found for sentence")
-                if t_update.token_index is not None:
-                    db_t.token_index = t_update.token_index
-                if t_update.form is not None:
-                    db_t.form = t_update.form
-                if t_update.lemma is not None:
-                    db_t.lemma = t_update.lemma
-                if t_update.pos is not None:
-                    db_t.pos = t_update.pos
-                if t_update.xpos is not None:
-                    db_t.xpos = t_update.xpos
+        sentence_ids = [item.id for item in payload.items]
+        statuses = dict(db.execute(
+            select(Sentence.id, Sentence.is_corrected).where(Sentence.id.in_(sentence_ids))
+        ).all())
+        token_ids = [t.id for item in payload.items for t in item.tokens or ()]
+        token_owner = dict(db.execute(
+            select(Token.id, Token.sentence_id).where(Token.id.in_(token_ids))
+        ).all()) if token_ids else {}
+
+        results: List[BatchUpdateItemResult] = []
+        valid = []
+        seen = set()
+        for item in payload.items:
+            if item.id in seen:
+                results.append(BatchUpdateItemResult(id=item.id, status="invalid", error="Duplicate sentence id in batch"))
+                continue
+            seen.add(item.id)
+            if item.id not in statuses:
+                results.append(BatchUpdateItemResult(id=item.id, status="not_found", error="Sentence not found"))
+                continue
+            foreign = next((t.id for t in item.tokens or () if token_owner.get(t.id) != item.id), None)
+            if foreign is not None:
+                results.append(BatchUpdateItemResult(id=item.id, status="invalid", error=f"Token id {foreign} not found for sentence"))
+                continue
+            valid.append(item)
+            results.append(BatchUpdateItemResult(id=item.id, status="updated", tokens_updated=len(item.tokens or ())))
+
+        feats_list = [t.feats for item in valid for t in item.tokens or () if t.feats is not None]
+        feats_ids = iter(resolve_bundle_ids(db, feats_list)) if feats_list else iter(())
+
+        sentence_rows: List[Dict] = []
+        token_rows: List[Dict] = []
+        deltas: Dict[str, int] = {}
+        for item in valid:
+            row: Dict = {"id": item.id}
+            if item.sentence_text is not None:
+                row["text"] = item.sentence_text
+                row["content_hash"] = dedup.sentence_hash(item.sentence_text)
+            if item.is_corrected is not None:
+                row["is_corrected"] = 1
+                if statuses[item.id] != 1:
+                    key = counters.sentences_key(statuses[item.id])
+                    deltas[key] = deltas.get(key, 0) - 1
+                    deltas[counters.sentences_key(1)] = deltas.get(counters.sentences_key(1), 0) + 1
+            if len(row) > 1:
+                sentence_rows.append(row)
+            for t_update in item.tokens or ():
+                token_row: Dict = {"id": t_update.id}
+                for field in _TOKEN_FIELDS:
+                    value = getattr(t_update, field)
+                    if value is not None:
+                        token_row[field] = value
                 if t_update.feats is not None:
-                    db_t.feats = t_update.feats
+                    token_row["feats_id"] = next(feats_ids)
+                if len(token_row) > 1:
+                    token_rows.append(token_row)
 
+        self._update_by_id(db, Sentence.__table__, sentence_rows)
+        self._update_by_id(db, Token.__table__, token_rows)
+        if deltas:
+            counters.increment(db, deltas)
         db.commit()
-        db.refresh(sentence)
-        _ = sentence.tokens
-        return await self.get_sentence_with_tokens(sentence.id, db)
+
+        updated = len(valid)
+        return BatchUpdateResponse(updated=updated, failed=len(results) - updated, items=results)
+
+    def _update_by_id(self, db: Session, table, rows: List[Dict]) -> None:
+        """executemany UPDATE ... WHERE id = ?: по одному запросу на каждый набор изменяемых колонок."""
+        groups: Dict[Tuple[str, ...], List[Dict]] = {}
+        for row in rows:
+            groups.setdefault(tuple(sorted(k for k in row if k != "id")), []).append(row)
+        for columns, group in groups.items():
+            stmt = (
+                table.update()
+                .where(table.c.id == bindparam("b_id"))
+                .values({column: bindparam(f"b_{column}") for column in columns})
+            )
+            db.execute(stmt, [{f"b_{key}": value for key, value in row.items()} for row in group])
+
@@ -0,0 +1,265 @@
+import logging
+import os
+import shutil
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import BinaryIO, Dict, Optional, Set, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.database.config import SessionLocal
+from app.database.models import TaggingJob
+from app.internal.tagging.dedup import INGEST_DUPLICATES
+from app.internal.tagging.service import TaggingService, TaggingCancelled
+from app.shared.metrics import JOBS_FINISHED, JOBS_RUNNING
+
+logger = logging.getLogger(__name__)
+
+# Количество фоновых воркеров теггинга
+TAGGING_WORKERS = int(os.getenv("TAGGING_WORKERS", "2"))
+# Куда сохраняются загруженные conllu-файлы до окончания импорта
+IMPORT_DIR = os.getenv("IMPORT_DIR", "./imports")
+
+JOB_KIND_TAG = "tag"
+JOB_KIND_IMPORT = "import"
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+FINISHED_STATUSES = (JOB_COMPLETED, JOB_FAILED, JOB_CANCELLED)
+
+INTERRUPTED_ERROR = (
+    "Interrupted by server restart; batches stored before the restart are kept, submit the rest again"
+)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _remove_file(path: Optional[str]) -> None:
+    if path:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def save_import_upload(upload: BinaryIO, suffix: str = ".conllu") -> str:
+    """Копирует загруженный файл в IMPORT_DIR потоково, возвращает путь."""
+    os.makedirs(IMPORT_DIR, exist_ok=True)
+    path = os.path.join(IMPORT_DIR, f"{uuid.uuid4().hex}{suffix}")
+    with open(path, "wb") as out:
+        shutil.copyfileobj(upload, out, length=1024 * 1024)
+    return path
+
+
+class TaggingJobQueue:
+    """
+    Очередь задач теггинга. Задачи хранятся в таблице tagging_jobs,
+    выполняются ограниченным пулом потоков. После рестарта задачи queued
+    снова ставятся в очередь, а прерванные (running) помечаются failed:
+    их пачки уже записаны, и повторный прогон с начала задвоил бы корпус.
+    """
+
+    def __init__(self, session_factory=SessionLocal, max_workers: int = TAGGING_WORKERS):
+        self._session_factory = session_factory
+        self._max_workers = max(1, max_workers)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._cancel_requested: Set[int] = set()
+        # живой прогресс выполняющихся задач: job_id -> (done, total)
+        self._progress: Dict[int, Tuple[int, int]] = {}
+
+    def start(self) -> None:
+        """Запускает воркеры и восстанавливает незавершённые задачи из БД."""
+        if self._executor is not None:
+            return
+        self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="tagging-job")
+
+        db = self._session_factory()
+        try:
+            interrupted = db.execute(
+                select(TaggingJob.id, TaggingJob.source_path).where(TaggingJob.status == JOB_RUNNING)
+            ).all()
+            if interrupted:
+                db.execute(
+                    update(TaggingJob)
+                    .where(TaggingJob.id.in_([job_id for job_id, _ in interrupted]))
+                    .values(status=JOB_FAILED, error=INTERRUPTED_ERROR, finished_at=_utcnow(), text=None, source_path=None)
+                )
+            job_ids = db.execute(
+                select(TaggingJob.id).where(TaggingJob.status == JOB_QUEUED).order_by(TaggingJob.id.asc())
+            ).scalars().all()
+            db.commit()
+        finally:
+            db.close()
+
+        for _, source_path in interrupted:
+            _remove_file(source_path)
+        for job_id in job_ids:
+            self._executor.submit(self._run, job_id)
+        if interrupted:
+            logger.warning("Marked %d tagging job(s) interrupted by restart as failed", len(interrupted))
+        if job_ids:
+            logger.info("Re-queued %d tagging job(s) after restart", len(job_ids))
+
+    def shutdown(self, wait: bool = False) -> None:
+        """Останавливает воркеры. Невыполненные задачи остаются в БД как queued."""
+        if self._executor is None:
+            return
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+        self._executor = None
+
+    def submit(
+        self,
+        db: Session,
+        text: str,
+        created_by: Optional[int] = None,
+        duplicates: str = INGEST_DUPLICATES,
+    ) -> TaggingJob:
+        """Сохраняет задачу и ставит её в очередь."""
+        job = TaggingJob(text=text, status=JOB_QUEUED, created_by=created_by, duplicates=duplicates)
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        if self._executor is not None:
+            self._executor.submit(self._run, job.id)
+        return job
+
+    def submit_import(
+        self,
+        db: Session,
+        source_path: str,
+        created_by: Optional[int] = None,
+        duplicates: str = INGEST_DUPLICATES,
+    ) -> TaggingJob:
+        """Ставит в очередь импорт файла из IMPORT_DIR (см. save_import_upload); файл удаляется по завершении."""
+        job = TaggingJob(
+            kind=JOB_KIND_IMPORT,
+            source_path=source_path,
+            status=JOB_QUEUED,
+            created_by=created_by,
+            duplicates=duplicates,
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        if self._executor is not None:
+            self._executor.submit(self._run, job.id)
+        return job
+
+    def get(self, db: Session, job_id: int) -> TaggingJob:
+        job = db.query(TaggingJob).filter(TaggingJob.id == job_id).first()
+        if not job:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+        return job
+
+    def cancel(self, db: Session, job_id: int) -> TaggingJob:
+        """Отменяет задачу: queued — сразу, running — на ближайшей проверке прогресса."""
+        job = self.get(db, job_id)
+        if job.status in FINISHED_STATUSES:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Job is already {job.status}")
+
+        # условный UPDATE: воркер мог взять задачу между чтением статуса и записью
+        source_path = job.source_path
+        cancelled = db.execute(
+            update(TaggingJob)
+            .where(TaggingJob.id == job_id, TaggingJob.status == JOB_QUEUED)
+            .values(status=JOB_CANCELLED, finished_at=_utcnow(), text=None, source_path=None)
+        ).rowcount
+        db.commit()
+        if cancelled:
+            _remove_file(source_path)
+        else:
+            with self._lock:
+                self._cancel_requested.add(job_id)
+        db.refresh(job)
+        if not cancelled and job.status in FINISHED_STATUSES:
+            with self._lock:
+                self._cancel_requested.discard(job_id)
+        return job
+
+    def live_progress(self, job_id: int) -> Optional[Tuple[int, int]]:
+        with self._lock:
+            return self._progress.get(job_id)
+
+    def cancel_requested(self, job_id: int) -> bool:
+        with self._lock:
+            return job_id in self._cancel_requested
+
+    def _discard_source(self, job: TaggingJob) -> None:
+        """Удаляет загруженный файл завершённого импорта."""
+        _remove_file(job.source_path)
+        job.source_path = None
+
+    def _run(self, job_id: int) -> None:
+        db = self._session_factory()
+        kind = None
+        try:
+            # queued -> running условным UPDATE, чтобы не разойтись с одновременной отменой
+            started = db.execute(
+                update(TaggingJob)
+                .where(TaggingJob.id == job_id, TaggingJob.status == JOB_QUEUED)
+                .values(status=JOB_RUNNING, started_at=_utcnow())
+            ).rowcount
+            db.commit()
+            if not started:
+                return
+            job = db.query(TaggingJob).filter(TaggingJob.id == job_id).first()
+            kind = job.kind
+            JOBS_RUNNING.inc((kind,))
+
+            def on_progress(done: int, total: int) -> None:
+                with self._lock:
+                    self._progress[job_id] = (done, total)
+                    if job_id in self._cancel_requested:
+                        raise TaggingCancelled()
+
+            service = TaggingService(db, duplicates=job.duplicates)
+            try:
+                if job.kind == JOB_KIND_IMPORT:
+                    service.import_conllu(job.source_path, on_progress=on_progress)
+                else:
+                    service.tag_and_store(job.text, on_progress=on_progress)
+            except TaggingCancelled:
+                job.status = JOB_CANCELLED
+            except Exception as exc:
+                db.rollback()
+                logger.exception("Tagging job %s failed", job_id)
+                job.status = JOB_FAILED
+                job.error = str(exc) or exc.__class__.__name__
+            else:
+                job.status = JOB_COMPLETED
+
+            # пачки коммитятся по ходу, поэтому учитываем уже записанное и при отмене/ошибке
+            job.sentences_created = service.sentences_stored
+            job.tokens_created = service.tokens_stored
+            job.sentences_skipped = service.sentences_skipped
+            job.sentences_replaced = service.sentences_replaced
+
+            done, total = self.live_progress(job_id) or (0, 0)
+            job.progress_done = done
+            job.progress_total = total
+            job.finished_at = _utcnow()
+            job.text = None
+            self._discard_source(job)
+            db.commit()
+            JOBS_FINISHED.inc((kind, job.status))
+        finally:
+            if kind is not None:
+                JOBS_RUNNING.dec((kind,))
+            with self._lock:
+                self._progress.pop(job_id, None)
+                self._cancel_requested.discard(job_id)
+            db.close()
+
+
+tagging_jobs = TaggingJobQueue()
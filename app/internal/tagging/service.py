@@ -1,9 +1,50 @@
-import requests
+import gzip
+import hashlib
+import io
+import os
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import bindparam, delete, insert
 from sqlalchemy.orm import Session
-from typing import Tuple, List, Optional, Dict
+from typing import Tuple, List, Optional, Dict, Callable, Iterator, Iterable
 from app.database.models import Sentence, Token
+from app.internal.tagging import counters, dedup, tagger_cache
+from app.internal.tagging.tagger_client import get_tagger_client
+from app.internal.tagging.tagger_cache import TAGGER_CACHE_ENABLED
+from app.internal.tagging.features import resolve_bundle_ids
+from app.shared.metrics import STAGE_SECONDS, observe_stage
 
-TAGGER_URL = "http://80.72.180.130:8040/api/tagging"
+# Максимальный размер части текста (в символах), отправляемой в теггер одним запросом
+TAGGER_CHUNK_CHARS = int(os.getenv("TAGGER_CHUNK_CHARS", "20000"))
+# Границы частей выбираются по содержимому: после абзаца, чей хэш делится на TAGGER_CHUNK_BOUNDARY_EVERY,
+# если часть уже не короче TAGGER_CHUNK_CHARS / 4. Правка абзаца меняет только свою часть — остальные берутся из кэша
+TAGGER_CHUNK_BOUNDARY_EVERY = 4
+# Сколько запросов к теггеру выполняется одновременно (общий лимит на процесс)
+TAGGER_CONCURRENCY = int(os.getenv("TAGGER_CONCURRENCY", "4"))
+# Сколько предложений записывается в БД одной пачкой (и одной транзакцией)
+TAGGING_BATCH_SIZE = int(os.getenv("TAGGING_BATCH_SIZE", "1000"))
+# Как часто (в предложениях) импорт conllu сообщает о прогрессе
+IMPORT_PROGRESS_EVERY = 1000
+_GZIP_MAGIC = b"\x1f\x8b"
+
+_PARAGRAPH_SPLIT_RE = re.compile(r'\n\s*\n')
+_SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?…])\s+')
+
+_tagger_lock = threading.Lock()
+_tagger_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _get_tagger_executor() -> ThreadPoolExecutor:
+    global _tagger_executor
+    with _tagger_lock:
+        if _tagger_executor is None:
+            _tagger_executor = ThreadPoolExecutor(
+                max_workers=max(1, TAGGER_CONCURRENCY), thread_name_prefix="tagger"
+            )
+        return _tagger_executor
 
 FEATURES_DICTIONARY = {
     "NOUN": ["Case", "Number", "Poss"],
@@ -18,29 +59,73 @@ FEATURES_DICTIONARY = {
 }
 
 
+class TaggingCancelled(Exception):
+    """Теггинг прерван по запросу (см. on_progress в tag_and_store)."""
+
+
+def _timed_parse(parsed: Iterator[Tuple[str, List[Dict]]]) -> Iterator[Tuple[str, List[Dict]]]:
+    """
+    Пропускает предложения потокового парсера, считая в этап parse только
+    время самого разбора (не время записи, которое идёт между next()).
+    """
+    elapsed = 0.0
+    while True:
+        started = time.perf_counter()
+        item = next(parsed, None)
+        elapsed += time.perf_counter() - started
+        if item is None:
+            break
+        yield item
+    STAGE_SECONDS.observe(elapsed, ("parse",))
+
+
+_sentences = Sentence.__table__
+_REPLACE_SENTENCE_TEXT = (
+    _sentences.update()
+    .where(_sentences.c.id == bindparam("sid"))
+    .values(text=bindparam("text"), occurrences=_sentences.c.occurrences + 1)
+)
+
+
 class TaggingService:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, duplicates: str = dedup.INGEST_DUPLICATES):
         self.db = db
+        # что делать с предложениями, текст которых уже есть в корпусе (см. dedup)
+        self.duplicates = duplicates
+        self.sentences_stored = 0
+        self.tokens_stored = 0
+        self.sentences_skipped = 0
+        self.sentences_replaced = 0
 
     def _parse_conllu(self, conllu_text: str) -> List[Tuple[str, List[Dict]]]:
         """
         Парсит ответ в формате conllu. Возвращает список кортежей: (sentence_text, tokens)
         token: { token_index, form, lemma, pos, xpos, feats(dict|None) }
         """
-        result = []
+        return list(self._iter_conllu(io.StringIO(conllu_text)))
+
+    def _iter_conllu(self, lines: Iterable[str]) -> Iterator[Tuple[str, List[Dict]]]:
+        """
+        Потоковый парсер conllu: читает строки по одной (файл, тело ответа,
+        StringIO) и отдаёт предложения (sentence_text, tokens) по мере готовности.
+        """
         current_sentence_text: Optional[str] = None
         current_tokens: List[Dict] = []
+        # текст из форм токенов — для файлов без "# text = " (учитывается SpaceAfter=No)
+        rebuilt_text: List[str] = []
 
-        lines = conllu_text.splitlines()
         current_index = 1
         for line in lines:
             line = line.strip()
             if not line:
                 # конец предложения, если были токены — сохраняем
+                if current_sentence_text is None and current_tokens:
+                    current_sentence_text = "".join(rebuilt_text).strip()
                 if current_sentence_text is not None:
-                    result.append((current_sentence_text, current_tokens))
+                    yield current_sentence_text, current_tokens
                 current_sentence_text = None
                 current_tokens = []
+                rebuilt_text = []
                 current_index = 1
                 continue
 
@@ -89,45 +174,330 @@ class TaggingService:
                 'feats': feats,
             })
             current_index += 1
+            misc = parts[9] if len(parts) > 9 else '_'
+            rebuilt_text.append(form if 'SpaceAfter=No' in misc.split('|') else form + ' ')
 
         # если файл не заканчивается пустой строкой, добиваем последнее предложение
+        if current_sentence_text is None and current_tokens:
+            current_sentence_text = "".join(rebuilt_text).strip()
         if current_sentence_text is not None:
-            result.append((current_sentence_text, current_tokens))
+            yield current_sentence_text, current_tokens
 
+    def tag_and_store(
+        self,
+        text: str,
+        on_progress: Optional[Callable[[int, int], None]] = None,
+    ) -> Tuple[int, int]:
+        """
+        Отправляет текст на теггер, парсит conllu и сохраняет в БД.
+        Текст режется на части по абзацам/предложениям, части теггируются
+        параллельно, а результаты в исходном порядке потоково разбираются
+        и сохраняются через bulk_store.
+        on_progress(done, total) вызывается после каждой части;
+        если он бросает TaggingCancelled — текущая пачка откатывается.
+        """
+        chunks = self._split_text(text)
+        result = self.bulk_store(self._iter_tagged(chunks, on_progress))
+        if TAGGER_CACHE_ENABLED:
+            with self._cache_session() as cache_db:
+                tagger_cache.evict(cache_db)
+                cache_db.commit()
         return result
 
-    def tag_and_store(self, text: str) -> Tuple[int, int]:
-        """Отправляет текст на теггер, парсит conllu и сохраняет в БД."""
-        response = requests.post(TAGGER_URL, json={'text': text}, timeout=120)
-        response.raise_for_status()
-        data = response.json()
-        conllu = data.get('conllu', '')
-
-        parsed = self._parse_conllu(conllu)
-        sentences_created = 0
-        tokens_created = 0
-
-        for sentence_text, tokens in parsed:
-            sentence = Sentence(text=sentence_text, is_corrected=0)
-            self.db.add(sentence)
-            self.db.flush()  # получить sentence.id
-            sentences_created += 1
-
-            for token in tokens:
-                db_token = Token(
-                    token_index=token['token_index'],
-                    form=token['form'],
-                    lemma=token['lemma'],
-                    pos=token['pos'],
-                    xpos=token['xpos'],
-                    feats=token['feats'],
-                    sentence_id=sentence.id,
-                )
-                self.db.add(db_token)
-                tokens_created += 1
+    def _cache_session(self) -> Session:
+        """
+        Короткая сессия для записей в tagger_cache: коммитится сразу, поэтому
+        сессия импорта не открывает транзакцию записи, пока ждёт ответов теггера.
+        """
+        return Session(bind=self.db.get_bind())
+
+    def import_conllu(
+        self,
+        path: str,
+        on_progress: Optional[Callable[[int, int], None]] = None,
+        batch_size: int = TAGGING_BATCH_SIZE,
+    ) -> Tuple[int, int]:
+        """
+        Импорт готового conllu-файла (в том числе .gz) без обращения к теггеру:
+        файл разбирается потоково и пишется через bulk_store.
+        on_progress(done, total) получает прочитанные/всего байт файла.
+        """
+        total = os.path.getsize(path)
+        with open(path, "rb") as raw:
+            is_gzip = raw.read(2) == _GZIP_MAGIC
+            raw.seek(0)
+            stream = gzip.GzipFile(fileobj=raw) if is_gzip else raw
+            lines = io.TextIOWrapper(stream, encoding="utf-8-sig", errors="replace")
+
+            def with_progress() -> Iterator[Tuple[str, List[Dict]]]:
+                if on_progress:
+                    on_progress(0, total)
+                for n, parsed_sentence in enumerate(self._iter_conllu(lines), start=1):
+                    yield parsed_sentence
+                    if on_progress and n % IMPORT_PROGRESS_EVERY == 0:
+                        on_progress(raw.tell(), total)
+                if on_progress:
+                    on_progress(total, total)
+
+            return self.bulk_store(with_progress(), batch_size=batch_size)
+
+    def _iter_tagged(
+        self,
+        chunks: List[str],
+        on_progress: Optional[Callable[[int, int], None]] = None,
+    ) -> Iterator[Tuple[str, List[Dict]]]:
+        total_chunks = len(chunks)
+        if on_progress:
+            on_progress(0, total_chunks)
+        for chunk_no, conllu in enumerate(self._tag_chunks(chunks), start=1):
+            yield from _timed_parse(self._iter_conllu(io.StringIO(conllu)))
+            if on_progress:
+                on_progress(chunk_no, total_chunks)
+
+    def bulk_store(
+        self,
+        sentences: Iterable[Tuple[str, List[Dict]]],
+        batch_size: int = TAGGING_BATCH_SIZE,
+    ) -> Tuple[int, int]:
+        """
+        Массовая запись разобранных предложений: пачками по batch_size через
+        executemany-вставки Core, каждая пачка — отдельная транзакция, чтобы
+        большой импорт не держал блокировку записи целиком.
+        При ошибке откатывается только текущая пачка; уже записанное
+        доступно в self.sentences_stored / self.tokens_stored.
+        Дубликаты обрабатываются по self.duplicates, их число —
+        в self.sentences_skipped / self.sentences_replaced.
+        """
+        self.sentences_stored = 0
+        self.tokens_stored = 0
+        self.sentences_skipped = 0
+        self.sentences_replaced = 0
+        batch: List[Tuple[str, List[Dict]]] = []
+        try:
+            for parsed_sentence in sentences:
+                batch.append(parsed_sentence)
+                if len(batch) >= batch_size:
+                    with observe_stage("store"):
+                        self._store_batch(batch)
+                    batch = []
+            if batch:
+                with observe_stage("store"):
+                    self._store_batch(batch)
+        except BaseException:
+            self.db.rollback()
+            raise
+        return self.sentences_stored, self.tokens_stored
 
+    def _store_batch(self, batch: List[Tuple[str, List[Dict]]]) -> None:
+        """
+        Одна пачка: поиск дубликатов одним запросом по индексу content_hash,
+        INSERT новых предложений с RETURNING id (в порядке параметров),
+        затем executemany-вставка токенов пачки (feats — ссылкой на набор признаков) и commit.
+        """
+        new_rows: List[Dict] = []
+        new_tokens: List[List[Dict]] = []
+        replaced: Dict[int, Tuple[str, List[Dict]]] = {}
+        linked: Dict[int, int] = {}
+        skipped = 0
+
+        hashes = [dedup.sentence_hash(sentence_text) for sentence_text, _ in batch]
+        check = self.duplicates != dedup.DUPLICATES_ALLOW
+        existing = dedup.existing_sentences(self.db, hashes) if check else {}
+        # дубликаты внутри самой пачки: hash -> индекс в new_rows
+        seen: Dict[str, int] = {}
+
+        for (sentence_text, tokens), content_hash in zip(batch, hashes):
+            if check and content_hash in existing:
+                sentence_id, is_corrected = existing[content_hash]
+                if self.duplicates == dedup.DUPLICATES_LINK:
+                    linked[sentence_id] = linked.get(sentence_id, 0) + 1
+                elif self.duplicates == dedup.DUPLICATES_REPLACE and is_corrected != 1:
+                    already_replaced = sentence_id in replaced
+                    replaced[sentence_id] = (sentence_text, tokens)
+                    if not already_replaced:
+                        continue
+                skipped += 1
+                continue
+            if check and content_hash in seen:
+                index = seen[content_hash]
+                if self.duplicates == dedup.DUPLICATES_LINK:
+                    new_rows[index]['occurrences'] += 1
+                elif self.duplicates == dedup.DUPLICATES_REPLACE:
+                    new_rows[index]['text'] = sentence_text
+                    new_tokens[index] = tokens
+                skipped += 1
+                continue
+            seen[content_hash] = len(new_rows)
+            new_rows.append({'text': sentence_text, 'is_corrected': 0, 'content_hash': content_hash, 'occurrences': 1})
+            new_tokens.append(tokens)
+
+        sentence_ids: List[int] = []
+        if new_rows:
+            sentence_ids = self.db.execute(
+                insert(_sentences).returning(_sentences.c.id, sort_by_parameter_order=True),
+                new_rows,
+            ).scalars().all()
+
+        tokens_deleted = 0
+        if replaced:
+            # повторная разметка неисправленных предложений: токены заменяются целиком
+            tokens_deleted = self.db.execute(
+                delete(Token).where(Token.sentence_id.in_(list(replaced)))
+            ).rowcount
+            self.db.execute(
+                _REPLACE_SENTENCE_TEXT,
+                [{'sid': sentence_id, 'text': sentence_text} for sentence_id, (sentence_text, _) in replaced.items()],
+            )
+        dedup.add_occurrences(self.db, linked)
+
+        targets = list(zip(sentence_ids, new_tokens)) + [
+            (sentence_id, tokens) for sentence_id, (_, tokens) in replaced.items()
+        ]
+        feats_ids = iter(resolve_bundle_ids(self.db, (token['feats'] for _, tokens in targets for token in tokens)))
+        token_rows = [
+            {
+                'token_index': token['token_index'],
+                'form': token['form'],
+                'lemma': token['lemma'],
+                'pos': token['pos'],
+                'xpos': token['xpos'],
+                'feats_id': next(feats_ids),
+                'sentence_id': sentence_id,
+            }
+            for sentence_id, tokens in targets
+            for token in tokens
+        ]
+        if token_rows:
+            self.db.execute(insert(Token.__table__), token_rows)
+
+        counters.increment(self.db, {
+            counters.sentences_key(0): len(sentence_ids),
+            counters.TOKENS: len(token_rows) - tokens_deleted,
+        })
         self.db.commit()
-        return sentences_created, tokens_created
+        self.sentences_stored += len(sentence_ids)
+        self.tokens_stored += len(token_rows) - tokens_deleted
+        self.sentences_skipped += skipped
+        self.sentences_replaced += len(replaced)
+
+    def _split_text(self, text: str, max_chars: int = TAGGER_CHUNK_CHARS) -> List[str]:
+        """
+        Режет текст на части не длиннее max_chars: границы частей совпадают
+        с границами абзацев, слишком длинные абзацы режутся по предложениям.
+        Абзацы нормализуются (tagger_cache.normalize_segment), границы частей
+        зависят от содержимого абзацев, а не от их позиции в тексте.
+        """
+        min_chars = max_chars // 4
+        chunks: List[str] = []
+        current: List[str] = []
+        current_len = 0
+
+        def flush() -> None:
+            nonlocal current, current_len
+            if current:
+                chunks.append("\n\n".join(current))
+            current = []
+            current_len = 0
+
+        for paragraph in _PARAGRAPH_SPLIT_RE.split(text):
+            paragraph = tagger_cache.normalize_segment(paragraph)
+            if not paragraph:
+                continue
+            pieces = [paragraph] if len(paragraph) <= max_chars else self._split_paragraph(paragraph, max_chars)
+            for piece in pieces:
+                if current and current_len + len(piece) + 2 > max_chars:
+                    flush()
+                current.append(piece)
+                current_len += len(piece) + 2
+                if current_len >= min_chars and self._is_chunk_boundary(piece):
+                    flush()
+            if len(pieces) > 1:
+                # хвост длинного абзаца не склеиваем со следующим абзацем
+                flush()
+        flush()
+        return chunks
+
+    def _is_chunk_boundary(self, piece: str) -> bool:
+        digest = hashlib.blake2b(piece.encode("utf-8"), digest_size=4).digest()
+        return int.from_bytes(digest, "big") % TAGGER_CHUNK_BOUNDARY_EVERY == 0
+
+    def _split_paragraph(self, paragraph: str, max_chars: int) -> List[str]:
+        """Режет длинный абзац по границам предложений (в крайнем случае — по пробелам)."""
+        pieces: List[str] = []
+        current = ""
+        for sentence in _SENTENCE_SPLIT_RE.split(paragraph):
+            while len(sentence) > max_chars:
+                cut = sentence.rfind(" ", 0, max_chars)
+                if cut <= 0:
+                    cut = max_chars
+                if current:
+                    pieces.append(current)
+                    current = ""
+                pieces.append(sentence[:cut].strip())
+                sentence = sentence[cut:].strip()
+            if current and len(current) + len(sentence) + 1 > max_chars:
+                pieces.append(current)
+                current = ""
+            current = f"{current} {sentence}" if current else sentence
+        if current:
+            pieces.append(current)
+        return [p for p in pieces if p]
+
+    def _tag_chunk(self, chunk: str) -> str:
+        """Один запрос к теггеру (пул соединений, повторы и предохранитель — в TaggerClient)."""
+        return get_tagger_client().tag(chunk)
+
+    def _tag_chunks(self, chunks: List[str]) -> Iterator[str]:
+        """
+        Теггирует части параллельно (не более TAGGER_CONCURRENCY запросов)
+        и отдаёт результаты строго в исходном порядке. Одновременно в памяти
+        держится ограниченное окно ответов. Части, уже бывшие в кэше
+        (tagger_cache), в теггер не отправляются; новые ответы кэшируются
+        отдельными короткими транзакциями, попадания учитываются в конце.
+        """
+        use_cache = TAGGER_CACHE_ENABLED
+        keys = [tagger_cache.cache_key(chunk) for chunk in chunks] if use_cache else [None] * len(chunks)
+        cached = tagger_cache.existing_keys(self.db, keys) if use_cache else set()
+
+        executor = _get_tagger_executor()
+        window = max(1, TAGGER_CONCURRENCY) * 2
+        pending = deque()
+        chunk_iter = iter(zip(chunks, keys))
+        hits: Dict[str, int] = {}
+
+        def submit(chunk: str, key: Optional[str]) -> None:
+            # для попадания запрос не отправляется: ответ читается из кэша при выдаче
+            future = None if key in cached else executor.submit(self._tag_chunk, chunk)
+            pending.append((chunk, key, future))
+
+        try:
+            for chunk, key in chunk_iter:
+                submit(chunk, key)
+                if len(pending) >= window:
+                    break
+            while pending:
+                chunk, key, future = pending.popleft()
+                conllu = tagger_cache.get(self.db, key, chunk) if future is None else None
+                if conllu is not None:
+                    hits[key] = hits.get(key, 0) + 1
+                else:
+                    conllu = future.result() if future is not None else self._tag_chunk(chunk)
+                    if use_cache:
+                        with self._cache_session() as cache_db:
+                            tagger_cache.put(cache_db, key, conllu)
+                            cache_db.commit()
+                next_item = next(chunk_iter, None)
+                if next_item is not None:
+                    submit(*next_item)
+                yield conllu
+        finally:
+            for _, _, future in pending:
+                if future is not None:
+                    future.cancel()
+            if hits:
+                with self._cache_session() as cache_db:
+                    tagger_cache.touch(cache_db, hits)
+                    cache_db.commit()
 
 
     def _validate_feats(self, pos: str, xpos: str, feats: Optional[Dict[str, str]]) -> Optional[Dict[str, str]]:
@@ -0,0 +1,211 @@
+"""
+Синтетический корпус для нагрузочных замеров на больших объёмах.
+
+Распределения близки к реальной разметке: частоты лемм — по закону Ципфа,
+у леммы фиксированная часть речи, длина предложений — логнормальная,
+наборы признаков — только из FEATURES_DICTIONARY, тоже с перекошенными
+частотами (немногие наборы покрывают большую часть токенов).
+Генерация детерминирована по seed; запись — через TaggingService.bulk_store.
+
+    python -m app.cli generate-corpus --tokens 1000000
+"""
+import itertools
+import random
+from bisect import bisect
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.internal.tagging import counters, dedup
+from app.internal.tagging.service import FEATURES_DICTIONARY, TAGGING_BATCH_SIZE, TaggingService
+
+VOCABULARY_SIZE = 50_000
+ZIPF_EXPONENT = 1.07
+SENTENCE_LENGTH_MU = 2.3  # медиана ~10 слов
+SENTENCE_LENGTH_SIGMA = 0.5
+MAX_SENTENCE_LENGTH = 60
+
+# доли частей речи среди слов (знаки препинания добавляются отдельно)
+POS_WEIGHTS = {
+    "NOUN": 30, "VERB": 17, "ADJ": 9, "PRON": 6, "PROPN": 5, "ADV": 5, "NUM": 3,
+    "AUX": 5, "ADP": 4, "CCONJ": 3, "PART": 2, "ATOOCH": 1, "KTOOCH": 1,
+}
+
+# значения признаков с весами; признак без записи здесь не генерируется
+FEATURE_VALUES = {
+    "Case": {"Nom": 40, "Gen": 12, "Dat": 12, "Acc": 14, "Loc": 10, "Abl": 7},
+    "Number": {"Sing": 75, "Plur": 25},
+    "Poss": {"Yes": 20},
+    "PronType": {"Prs": 60, "Dem": 30, "Int": 10},
+    "Degree": {"Pos": 85, "Cmp": 15},
+    "NumType": {"Card": 80, "Ord": 20},
+    "Tense": {"Past": 45, "Pres": 40, "Fut": 15},
+    "Person": {"3": 70, "1": 20, "2": 10},
+    "Mood": {"Ind": 80, "Imp": 10, "Cnd": 10},
+    "Polarity": {"Pos": 85, "Neg": 15},
+    "Voice": {"Act": 85, "Pass": 10, "Cau": 5},
+    "VerbForm": {"Fin": 60, "Part": 20, "Conv": 15, "Inf": 5},
+}
+
+# окончания словоформ по признакам (в порядке присоединения)
+_SUFFIXES = {
+    ("Number", "Plur"): "лар",
+    ("Poss", "Yes"): "ы",
+    ("Case", "Gen"): "дын",
+    ("Case", "Dat"): "га",
+    ("Case", "Acc"): "ды",
+    ("Case", "Loc"): "да",
+    ("Case", "Abl"): "дан",
+    ("Degree", "Cmp"): "ырак",
+    ("Polarity", "Neg"): "ба",
+    ("Voice", "Pass"): "ыл",
+    ("Voice", "Cau"): "дыр",
+    ("Tense", "Past"): "ды",
+    ("Tense", "Pres"): "йт",
+    ("Tense", "Fut"): "ат",
+    ("Person", "1"): "м",
+    ("Person", "2"): "ң",
+}
+
+_SYLLABLES = [c + v for c in "бгджзклмнпрстчш" for v in "аеиоуыөү"] + list("аоуы")
+_SENTENCE_END = [(".", 90), ("?", 6), ("!", 4)]
+_COMMA_RATE = 0.08
+
+
+def _cumulative(weights: List[float]) -> List[float]:
+    return list(itertools.accumulate(weights))
+
+
+def _pick(rnd: random.Random, items: list, cum_weights: List[float]):
+    return items[bisect(cum_weights, rnd.random() * cum_weights[-1])]
+
+
+class SyntheticCorpus:
+    """Словарь и распределения корпуса; sentences() выдаёт (текст, токены) в формате bulk_store."""
+
+    def __init__(self, seed: int = 42, vocabulary_size: int = VOCABULARY_SIZE):
+        self.seed = seed
+        rnd = random.Random(seed)
+
+        pos_names = list(POS_WEIGHTS)
+        pos_cum = _cumulative([POS_WEIGHTS[pos] for pos in pos_names])
+        lemmas = set()
+        self.lemmas: List[str] = []  # по убыванию частоты
+        self.lemma_pos: List[str] = []
+        while len(self.lemmas) < vocabulary_size:
+            lemma = "".join(rnd.choice(_SYLLABLES) for _ in range(rnd.choice((1, 2, 2, 3, 3, 4))))
+            if lemma in lemmas:
+                continue
+            lemmas.add(lemma)
+            self.lemmas.append(lemma)
+            self.lemma_pos.append(_pick(rnd, pos_names, pos_cum))
+        self._lemma_cum = _cumulative([1 / rank ** ZIPF_EXPONENT for rank in range(1, vocabulary_size + 1)])
+
+        # наборы признаков по части речи: (feats, окончание) и накопленные веса
+        self._bundles: Dict[str, Tuple[List[Tuple[Optional[Dict[str, str]], str]], List[float]]] = {}
+        for pos in pos_names:
+            names = [name for name in FEATURES_DICTIONARY.get(pos, []) if name in FEATURE_VALUES]
+            self._bundles[pos] = self._bundles_for(names)
+
+    def _bundles_for(self, names: List[str]):
+        if not names:
+            return [(None, "")], [1.0]
+        # отсутствие признака — тоже вариант (например, Poss только у части существительных)
+        options = []
+        for name in names:
+            values = FEATURE_VALUES[name]
+            absent = 100 - sum(values.values()) if sum(values.values()) < 100 else 0
+            choices = [(value, weight) for value, weight in values.items()]
+            if absent:
+                choices.append((None, absent))
+            options.append(choices)
+
+        bundles, weights = [], []
+        for combination in itertools.product(*options):
+            feats = {name: value for name, (value, _) in zip(names, combination) if value is not None}
+            weight = 1.0
+            for _, w in combination:
+                weight *= w
+            suffix = "".join(s for (name, value), s in _SUFFIXES.items() if feats.get(name) == value)
+            bundles.append((feats or None, suffix))
+            weights.append(weight)
+        return bundles, _cumulative(weights)
+
+    def sentences(self, total_tokens: int) -> Iterator[Tuple[str, List[Dict]]]:
+        """Предложения, пока не набрано total_tokens токенов (включая пунктуацию)."""
+        rnd = random.Random(self.seed + 1)
+        end_marks = [mark for mark, _ in _SENTENCE_END]
+        end_cum = _cumulative([weight for _, weight in _SENTENCE_END])
+        produced = 0
+        while produced < total_tokens:
+            length = int(rnd.lognormvariate(SENTENCE_LENGTH_MU, SENTENCE_LENGTH_SIGMA))
+            length = max(2, min(MAX_SENTENCE_LENGTH, length, total_tokens - produced - 1))
+            tokens: List[Dict] = []
+            parts: List[str] = []
+            for position in range(length):
+                index = bisect(self._lemma_cum, rnd.random() * self._lemma_cum[-1])
+                lemma, pos = self.lemmas[index], self.lemma_pos[index]
+                feats, suffix = _pick(rnd, *self._bundles[pos])
+                form = lemma + suffix
+                if position == 0 or pos == "PROPN":
+                    form = form.capitalize()
+                tokens.append(self._token(len(tokens) + 1, form, lemma, pos, feats))
+                parts.append(form)
+                if position < length - 1 and rnd.random() < _COMMA_RATE:
+                    tokens.append(self._token(len(tokens) + 1, ",", ",", "PUNCT", None))
+                    parts[-1] += ","
+            mark = _pick(rnd, end_marks, end_cum)
+            tokens.append(self._token(len(tokens) + 1, mark, mark, "PUNCT", None))
+            produced += len(tokens)
+            yield " ".join(parts) + mark, tokens
+
+    @staticmethod
+    def _token(index: int, form: str, lemma: str, pos: str, feats: Optional[Dict[str, str]]) -> Dict:
+        return {'token_index': str(index), 'form': form, 'lemma': lemma, 'pos': pos, 'xpos': pos, 'feats': feats}
+
+
+def mark_corrected(db: Session, fraction: float) -> int:
+    """Помечает исправленными ~fraction предложений (детерминированно по id) и пересчитывает счётчики."""
+    per_mille = int(round(fraction * 1000))
+    updated = 0
+    if per_mille > 0:
+        updated = db.execute(
+            text("UPDATE sentences SET is_corrected = 1 WHERE (id * 2654435761) % 1000 < :per_mille"),
+            {"per_mille": per_mille},
+        ).rowcount
+    counters.rebuild(db)
+    db.commit()
+    return updated
+
+
+def generate_corpus(
+    db: Session,
+    total_tokens: int,
+    seed: int = 42,
+    batch_size: int = TAGGING_BATCH_SIZE,
+    corrected_fraction: float = 0.1,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+) -> Tuple[int, int]:
+    """Записывает синтетический корпус в БД; возвращает (предложений, токенов)."""
+    corpus = SyntheticCorpus(seed)
+    stream = corpus.sentences(total_tokens)
+    if on_progress is not None:
+        stream = _with_progress(stream, total_tokens, on_progress)
+    # дубликатов в синтетике почти нет, проверка по хэшу только замедлила бы запись
+    service = TaggingService(db, duplicates=dedup.DUPLICATES_ALLOW)
+    sentences, tokens = service.bulk_store(stream, batch_size=batch_size)
+    mark_corrected(db, corrected_fraction)
+    return sentences, tokens
+
+
+def _with_progress(stream, total_tokens: int, on_progress: Callable[[int, int], None]):
+    done = 0
+    reported = 0
+    for sentence_text, tokens in stream:
+        done += len(tokens)
+        if done - reported >= 100_000:
+            on_progress(done, total_tokens)
+            reported = done
+        yield sentence_text, tokens
+    on_progress(done, total_tokens)
@@ -0,0 +1,142 @@
+"""
+Кэш ответов теггера по содержимому.
+
+Ключ — sha256 от версии теггера и нормализованной части текста, значение —
+возвращённый CoNLL-U. Хранится в таблице tagger_cache, объём ограничен
+TAGGER_CACHE_MAX_BYTES: при превышении вытесняются давно не использованные записи.
+Попадания, промахи, сэкономленные байты и вытеснения — в метриках tagger_cache_*.
+Функции работают в сессии вызывающего (без commit); при теггинге записи
+делаются в отдельной короткой сессии, чтобы не держать блокировку записи SQLite
+на время ожидания теггера.
+"""
+import hashlib
+import os
+import re
+import unicodedata
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Optional, Set
+
+from sqlalchemy import bindparam, delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.database.models import TaggerCacheEntry
+from app.shared.metrics import TAGGER_CACHE_BYTES_SAVED, TAGGER_CACHE_EVICTIONS, TAGGER_CACHE_HITS, TAGGER_CACHE_MISSES
+
+TAGGER_CACHE_ENABLED = os.getenv("TAGGER_CACHE_ENABLED", "1") not in ("0", "false", "no")
+TAGGER_CACHE_MAX_BYTES = int(os.getenv("TAGGER_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+# Меняется при обновлении модели теггера — старые записи перестают совпадать
+TAGGER_VERSION = os.getenv("TAGGER_VERSION", "1")
+
+_SPACES_RE = re.compile(r"\s+")
+
+def normalize_segment(text: str) -> str:
+    """NFC и схлопнутые пробелы: правки переносов строк и пробелов не сбивают кэш."""
+    return _SPACES_RE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def cache_key(segment: str) -> str:
+    return hashlib.sha256(f"{TAGGER_VERSION}\0{segment}".encode("utf-8")).hexdigest()
+
+
+_entries = TaggerCacheEntry.__table__
+_TOUCH = (
+    _entries.update()
+    .where(_entries.c.key == bindparam("b_key"))
+    .values(hits=_entries.c.hits + bindparam("b_hits"), last_used_at=bindparam("b_now"))
+)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def existing_keys(db: Session, keys: Iterable[str]) -> Set[str]:
+    keys = list(set(keys))
+    found: Set[str] = set()
+    for start in range(0, len(keys), 500):
+        found.update(db.execute(
+            select(TaggerCacheEntry.key).where(TaggerCacheEntry.key.in_(keys[start:start + 500]))
+        ).scalars())
+    return found
+
+
+def get(db: Session, key: str, segment: str) -> Optional[str]:
+    """CoNLL-U из кэша (только чтение; использование записи отмечает touch)."""
+    conllu = db.execute(select(TaggerCacheEntry.conllu).where(TaggerCacheEntry.key == key)).scalar()
+    if conllu is None:
+        return None
+    record_hit(len(segment.encode("utf-8")) + len(conllu.encode("utf-8")))
+    return conllu
+
+
+def touch(db: Session, hits: Dict[str, int]) -> None:
+    """Прибавляет попадания (key -> число) и обновляет last_used_at одним executemany."""
+    if not hits:
+        return
+    now = _utcnow()
+    db.execute(
+        _TOUCH,
+        [{"b_key": key, "b_hits": count, "b_now": now} for key, count in hits.items()],
+    )
+
+
+def put(db: Session, key: str, conllu: str) -> None:
+    now = _utcnow()
+    db.execute(
+        insert(TaggerCacheEntry.__table__).prefix_with("OR IGNORE", dialect="sqlite"),
+        [{"key": key, "conllu": conllu, "size": len(conllu.encode("utf-8")),
+          "hits": 0, "created_at": now, "last_used_at": now}],
+    )
+    record_miss()
+
+
+def evict(db: Session, max_bytes: int = TAGGER_CACHE_MAX_BYTES) -> int:
+    """Вытесняет давно не использованные записи, пока объём больше max_bytes (до 90% лимита)."""
+    total = db.execute(select(func.coalesce(func.sum(TaggerCacheEntry.size), 0))).scalar()
+    if total <= max_bytes:
+        return 0
+    to_free = total - int(max_bytes * 0.9)
+    victims = []
+    for key, size in db.execute(
+        select(TaggerCacheEntry.key, TaggerCacheEntry.size).order_by(TaggerCacheEntry.last_used_at.asc())
+    ):
+        victims.append(key)
+        to_free -= size
+        if to_free <= 0:
+            break
+    for start in range(0, len(victims), 500):
+        db.execute(delete(TaggerCacheEntry).where(TaggerCacheEntry.key.in_(victims[start:start + 500])))
+    TAGGER_CACHE_EVICTIONS.inc(amount=len(victims))
+    return len(victims)
+
+
+def record_hit(bytes_saved: int) -> None:
+    TAGGER_CACHE_HITS.inc()
+    TAGGER_CACHE_BYTES_SAVED.inc(amount=bytes_saved)
+
+
+def record_miss() -> None:
+    TAGGER_CACHE_MISSES.inc()
+
+
+def stats(db: Session) -> Dict[str, Any]:
+    """Попадания/промахи с момента запуска процесса (из метрик tagger_cache_*) и текущий объём кэша."""
+    entries, size = db.execute(
+        select(func.count(), func.coalesce(func.sum(TaggerCacheEntry.size), 0)).select_from(TaggerCacheEntry)
+    ).one()
+    current = {
+        "hits": int(TAGGER_CACHE_HITS.value()),
+        "misses": int(TAGGER_CACHE_MISSES.value()),
+        "bytes_saved": int(TAGGER_CACHE_BYTES_SAVED.value()),
+        "evicted": int(TAGGER_CACHE_EVICTIONS.value()),
+    }
+    lookups = current["hits"] + current["misses"]
+    current.update(
+        enabled=TAGGER_CACHE_ENABLED,
+        tagger_version=TAGGER_VERSION,
+        hit_rate=round(current["hits"] / lookups, 4) if lookups else 0.0,
+        entries=entries,
+        size_bytes=size,
+        max_bytes=TAGGER_CACHE_MAX_BYTES,
+    )
+    return current
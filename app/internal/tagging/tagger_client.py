@@ -0,0 +1,250 @@
+"""
+HTTP-клиент удалённого теггера (POST {"text": ...} -> {"conllu": ...}).
+
+Пул keep-alive соединений на процесс, раздельные таймауты подключения и чтения,
+повтор с экспоненциальной задержкой (full jitter) при временных сбоях и
+предохранитель (circuit breaker): после TAGGER_BREAKER_FAILURES неудачных вызовов
+подряд (вызов со всеми его повторами — один сбой) запросы
+TAGGER_BREAKER_RESET_SECONDS секунд сразу завершаются TaggerUnavailable,
+затем пропускается один пробный запрос. Латентность, ошибки, повторы и
+состояние предохранителя — в метриках tagger_*.
+"""
+import os
+import random
+import threading
+import time
+from typing import Callable, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.shared.metrics import TAGGER_CIRCUIT_STATE, TAGGER_ERRORS, TAGGER_REQUEST_SECONDS, TAGGER_RETRIES
+
+TAGGER_URL = os.getenv("TAGGER_URL", "http://80.72.180.130:8040/api/tagging")
+TAGGER_CONNECT_TIMEOUT = float(os.getenv("TAGGER_CONNECT_TIMEOUT", "5"))
+TAGGER_READ_TIMEOUT = float(os.getenv("TAGGER_READ_TIMEOUT", "120"))
+# Соединений в пуле (обычно = TAGGER_CONCURRENCY)
+TAGGER_POOL_SIZE = int(os.getenv("TAGGER_POOL_SIZE", os.getenv("TAGGER_CONCURRENCY", "4")))
+# Повторов после первой попытки; задержка — случайная в [0, base * 2^n], не больше max
+TAGGER_MAX_RETRIES = int(os.getenv("TAGGER_MAX_RETRIES", "3"))
+TAGGER_BACKOFF_BASE = float(os.getenv("TAGGER_BACKOFF_BASE", "0.5"))
+TAGGER_BACKOFF_MAX = float(os.getenv("TAGGER_BACKOFF_MAX", "10"))
+TAGGER_BREAKER_FAILURES = int(os.getenv("TAGGER_BREAKER_FAILURES", "5"))
+TAGGER_BREAKER_RESET_SECONDS = float(os.getenv("TAGGER_BREAKER_RESET_SECONDS", "30"))
+
+# Ответы, которые стоит повторить: теггер перегружен или перезапускается
+RETRYABLE_STATUSES = frozenset({429, 502, 503, 504})
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+_STATE_VALUES = {CLOSED: 0, OPEN: 1, HALF_OPEN: 2}
+
+
+class TaggerError(Exception):
+    """Запрос к теггеру не удался (после всех повторов)."""
+
+    def __init__(self, message: str, reason: str):
+        super().__init__(message)
+        self.reason = reason
+
+
+class TaggerUnavailable(TaggerError):
+    """Предохранитель разомкнут: теггер недавно не отвечал, запрос не отправлялся."""
+
+
+class CircuitBreaker:
+    """
+    closed — запросы идут, сбои подряд считаются; open — запросы отклоняются
+    до истечения reset_seconds; half_open — пропускается один пробный запрос:
+    успех замыкает цепь, сбой снова размыкает.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = TAGGER_BREAKER_FAILURES,
+        reset_seconds: float = TAGGER_BREAKER_RESET_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    @property
+    def failures(self) -> int:
+        """Неудачных вызовов подряд."""
+        with self._lock:
+            return self._failures
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and self._clock() - self._opened_at >= self.reset_seconds:
+                return HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """Можно ли отправить запрос сейчас."""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN:
+                if self._clock() - self._opened_at < self.reset_seconds:
+                    return False
+                self._set_state(HALF_OPEN)
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._probe_in_flight = False
+            self._set_state(CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+                self._set_state(OPEN)
+
+    def _set_state(self, state: str) -> None:
+        self._state = state
+        TAGGER_CIRCUIT_STATE.set(_STATE_VALUES[state])
+
+
+class TaggerClient:
+    """Потокобезопасный клиент: один экземпляр на процесс (get_tagger_client)."""
+
+    def __init__(
+        self,
+        url: str = TAGGER_URL,
+        connect_timeout: float = TAGGER_CONNECT_TIMEOUT,
+        read_timeout: float = TAGGER_READ_TIMEOUT,
+        pool_size: int = TAGGER_POOL_SIZE,
+        retries: int = TAGGER_MAX_RETRIES,
+        backoff_base: float = TAGGER_BACKOFF_BASE,
+        backoff_max: float = TAGGER_BACKOFF_MAX,
+        breaker: Optional[CircuitBreaker] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.url = url
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = max(0, retries)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        self._sleep = sleep
+        self.session = requests.Session()
+        # повторы делает сам клиент, чтобы их видели метрики и предохранитель
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_size), max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def tag(self, text: str) -> str:
+        """CoNLL-U для text; TaggerUnavailable — цепь разомкнута, TaggerError — прочие сбои."""
+        # предохранитель проверяется и считает сбой один раз на вызов: повторы внутри
+        # вызова не размыкают цепь и не обрывают его на полпути
+        if not self.breaker.allow():
+            TAGGER_ERRORS.inc(("circuit_open",))
+            raise TaggerUnavailable("Tagger is unavailable (circuit open), retry later", "circuit_open")
+        attempt = 0
+        while True:
+            try:
+                return self._request(text)
+            except _Retryable as exc:
+                if attempt >= self.retries:
+                    self.breaker.record_failure()
+                    raise TaggerError(str(exc), exc.reason) from exc.__cause__
+                attempt += 1
+                TAGGER_RETRIES.inc()
+                self._sleep(self._backoff(attempt, exc.retry_after))
+
+    def _request(self, text: str) -> str:
+        started = time.perf_counter()
+        try:
+            response = self.session.post(self.url, json={'text': text}, timeout=self.timeout)
+        except requests.ConnectTimeout as exc:
+            self._record_error(started, "timeout")
+            raise _Retryable(f"Tagger connect timeout: {exc}", "timeout") from exc
+        except requests.Timeout as exc:
+            # долгий ответ повторять не стоит: перегруженный теггер получит ту же работу ещё раз
+            self._record_error(started, "timeout")
+            self.breaker.record_failure()
+            raise TaggerError(f"Tagger read timeout after {self.timeout[1]:g} s", "timeout") from exc
+        except requests.RequestException as exc:
+            self._record_error(started, "connection")
+            raise _Retryable(f"Tagger connection error: {exc}", "connection") from exc
+
+        status_code = response.status_code
+        if status_code >= 500 or status_code in RETRYABLE_STATUSES:
+            self._record_error(started, "http_status")
+            message = f"Tagger returned HTTP {status_code}"
+            if status_code in RETRYABLE_STATUSES:
+                raise _Retryable(message, "http_status", _retry_after(response))
+            # 500 и т.п.: повтор того же текста, скорее всего, упадёт так же
+            self.breaker.record_failure()
+            raise TaggerError(message, "http_status")
+        if status_code >= 400:
+            # ошибка запроса, а не теггера: цепь не размыкается
+            self._record_error(started, "http_status")
+            self.breaker.record_success()
+            raise TaggerError(f"Tagger rejected the request: HTTP {status_code}", "http_status")
+        try:
+            conllu = response.json().get('conllu', '')
+        except (ValueError, AttributeError) as exc:
+            self._record_error(started, "invalid_response")
+            self.breaker.record_failure()
+            raise TaggerError("Tagger returned an invalid response", "invalid_response") from exc
+
+        TAGGER_REQUEST_SECONDS.observe(time.perf_counter() - started, ("ok",))
+        self.breaker.record_success()
+        return conllu
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.backoff_max))
+        return delay
+
+    def _record_error(self, started: float, reason: str) -> None:
+        TAGGER_REQUEST_SECONDS.observe(time.perf_counter() - started, ("error",))
+        TAGGER_ERRORS.inc((reason,))
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class _Retryable(Exception):
+    def __init__(self, message: str, reason: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def _retry_after(response: requests.Response) -> Optional[float]:
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return None
+
+
+_client_lock = threading.Lock()
+_client: Optional[TaggerClient] = None
+
+
+def get_tagger_client() -> TaggerClient:
+    """Общий клиент процесса (пул соединений и предохранитель — одни на все задачи)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = TaggerClient()
+        return _client
@@ -2,9 +2,11 @@ from fastapi import Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import Optional
 
+from app.database.config import run_db
 from app.internal.users.user_service import UserService
-from app.domain.schemas import UserCreate, UserResponse, PaginatedUsersResponse
-from app.shared.dependencies import get_admin_user
+from app.domain.schemas import UserCreate, UserResponse, PaginatedUsersResponse, CursorUsersResponse
+from app.shared.dependencies import get_admin_user, auth_cache, get_password_hash_async
+from app.shared.profiling import SQL_PROFILING, recent_profiles
 
 
 class AdminController:
@@ -14,29 +16,30 @@ class AdminController:
     async def create_user(
         self,
         user_data: UserCreate,
-        db: Session,
         admin_user=Depends(get_admin_user)
     ) -> UserResponse:
         """Создание пользователя (только для администраторов)"""
-        user_service = UserService(db)
-        return await user_service.create_user(user_data)
+        # хэш считается в своём пуле до открытия сессии
+        hashed_password = await get_password_hash_async(user_data.password)
+        return await run_db(self._insert_user, user_data, hashed_password)
 
     async def create_admin_user(
         self,
         user_data: UserCreate,
-        db: Session,
         admin_user = Depends(get_admin_user)
     ) -> UserResponse:
         """Создание администратора (для первичной настройки)"""
-        user_service = UserService(db)
         user_creation_data = UserCreate(
             username=user_data.username,
             password=user_data.password,
             role="admin"
         )
-        return await user_service.create_user(user_creation_data)
+        return await self.create_user(user_creation_data)
+
+    def _insert_user(self, db: Session, user_data: UserCreate, hashed_password: str) -> UserResponse:
+        return UserService(db).create_user(user_data, hashed_password)
 
-    async def get_users(
+    def get_users(
         self,
         db: Session,
         page: int = 1,
@@ -45,14 +48,44 @@ class AdminController:
     ) -> PaginatedUsersResponse:
         """Получение списка пользователей с пагинацией (только для администраторов)"""
         user_service = UserService(db)
-        return await user_service.get_users(page=page, page_size=page_size)
+        return user_service.get_users(page=page, page_size=page_size)
 
-    async def delete_user(
+    def get_users_by_cursor(
+        self,
+        db: Session,
+        cursor: Optional[str],
+        page_size: int = 20,
+        with_total: bool = False,
+        admin_user=Depends(get_admin_user)
+    ) -> CursorUsersResponse:
+        """Получение списка пользователей с курсорной пагинацией (только для администраторов)"""
+        user_service = UserService(db)
+        return user_service.get_users_by_cursor(cursor=cursor, page_size=page_size, with_total=with_total)
+
+    def delete_user(
         self,
-        user_id: int,
         db: Session,
+        user_id: int,
         admin_user=Depends(get_admin_user)
     ) -> dict:
         """Удаление пользователя по id (только для администраторов)"""
         user_service = UserService(db)
-        return await user_service.delete_user(user_id)
+        return user_service.delete_user(user_id)
+
+    async def get_auth_cache_stats(
+        self,
+        admin_user=Depends(get_admin_user)
+    ) -> dict:
+        """Статистика кэша авторизации: попадания, промахи, размер (только для администраторов)"""
+        return auth_cache.stats()
+
+    async def get_sql_profiles(
+        self,
+        limit: int,
+        with_statements: bool = False,
+        admin_user=Depends(get_admin_user)
+    ) -> list:
+        """Последние профили SQL по запросам, новые первыми (только при SQL_PROFILING=1)"""
+        if not SQL_PROFILING:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="SQL profiling is disabled")
+        return [profile.summary(with_statements=with_statements) for profile in recent_profiles(limit)]
@@ -1,7 +1,5 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.responses import Response
-from sqlalchemy.orm import Session
-from app.database.config import get_db
 from app.internal.auth.auth_service import AuthService
 from app.domain.schemas import UserLogin, Token
 from app.shared.dependencies import get_current_user
@@ -11,9 +9,9 @@ class AuthController:
     def __init__(self):
         pass
 
-    async def login(self, user_data: UserLogin, response:Response, db: Session = Depends(get_db)) -> Token:
+    async def login(self, user_data: UserLogin, response:Response) -> Token:
         """Вход в систему"""
-        auth_service = AuthService(db)
+        auth_service = AuthService()
         token = await auth_service.authenticate_user(user_data)
         
         # Устанавливаем токен в httpOnly cookie
@@ -1,17 +1,20 @@
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from app.database.models import User
-from app.domain.schemas import UserCreate, UserResponse, PageMeta, PaginatedUsersResponse
-from app.shared.dependencies import get_password_hash
+from app.domain.schemas import UserCreate, UserResponse, PageMeta, PaginatedUsersResponse, CursorPageMeta, CursorUsersResponse
+from app.shared.dependencies import invalidate_user
+from app.shared.pagination import encode_cursor, decode_cursor
+from typing import Optional
 import math
 
 class UserService:
     def __init__(self, db: Session):
         self.db = db
 
-    async def get_user_by_username(self, username: str) -> User:
+    def get_user_by_username(self, username: str) -> User:
         """Получение пользователя по username"""
-        user = self.db.query(User).filter(User.username == username).first()
+        user = self.db.scalars(select(User).where(User.username == username)).first()
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -19,10 +22,10 @@ class UserService:
             )
         return user
 
-    async def create_user(self, user_data: UserCreate) -> UserResponse:
-        """Создание нового пользователя"""
+    def create_user(self, user_data: UserCreate, hashed_password: str) -> UserResponse:
+        """Создание нового пользователя (пароль уже захэширован вне сессии)"""
         # Проверка существования пользователя
-        existing_user = self.db.query(User).filter(User.username == user_data.username).first()
+        existing_user = self.db.scalars(select(User).where(User.username == user_data.username)).first()
         if existing_user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -30,7 +33,6 @@ class UserService:
             )
 
         # Создание пользователя
-        hashed_password = get_password_hash(user_data.password)
         db_user = User(
             username=user_data.username,
             password=hashed_password,
@@ -47,7 +49,7 @@ class UserService:
         """Получение информации о текущем пользователе"""
         return UserResponse(**user.__dict__)
     
-    async def get_users(
+    def get_users(
         self, 
         page: int = 1, 
         page_size: int = 20
@@ -59,11 +61,11 @@ class UserService:
                 detail="Page and page_size must be positive integers"
             )
 
-        total_items = self.db.query(User).count()
+        total_items = self.db.execute(select(func.count()).select_from(User)).scalar_one()
         total_pages = math.ceil(total_items / page_size)
         offset = (page - 1) * page_size
 
-        users = self.db.query(User).offset(offset).limit(page_size).all()
+        users = self.db.scalars(select(User).order_by(User.id.asc()).offset(offset).limit(page_size)).all()
 
         meta = PageMeta(
             current_page=page,
@@ -77,16 +79,54 @@ class UserService:
             items=[UserResponse(**user.__dict__) for user in users]
         )
     
-    async def delete_user(self, user_id: int) -> dict:
+    def get_users_by_cursor(
+        self,
+        cursor: Optional[str],
+        page_size: int = 20,
+        with_total: bool = False
+    ) -> CursorUsersResponse:
+        """Получение списка пользователей с курсорной (keyset) пагинацией по id"""
+        if page_size < 1:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="page_size must be a positive integer"
+            )
+
+        after_id = decode_cursor(cursor)
+        total_items = self.db.execute(select(func.count()).select_from(User)).scalar_one() if with_total else None
+
+        query = select(User)
+        if after_id is not None:
+            query = query.where(User.id > after_id)
+        users = self.db.scalars(query.order_by(User.id.asc()).limit(page_size + 1)).all()
+
+        has_more = len(users) > page_size
+        users = users[:page_size]
+
+        meta = CursorPageMeta(
+            page_size=page_size,
+            next_cursor=encode_cursor(users[-1].id) if has_more else None,
+            has_more=has_more,
+            total_items=total_items
+        )
+
+        return CursorUsersResponse(
+            meta=meta,
+            items=[UserResponse(**user.__dict__) for user in users]
+        )
+
+    def delete_user(self, user_id: int) -> dict:
         """Удаление пользователя по id"""
-        user = self.db.query(User).filter(User.id == user_id).first()
+        user = self.db.scalars(select(User).where(User.id == user_id)).first()
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found"
             )
 
+        username = user.username
         self.db.delete(user)
         self.db.commit()
+        invalidate_user(username)
 
         return {"detail": "User deleted successfully"}
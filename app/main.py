@@ -1,12 +1,18 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from sqlalchemy.orm import Session
-from app.database.config import engine, get_db
+from app.database.config import engine, async_engine, get_db, describe_engine
 from app.database.models import Base, User
 from app.presentation.api.v1 import auth, admin, tagging
 from app.internal.users.http.admin_controller import AdminController
 from app.domain.schemas import UserCreate
 from app.shared.dependencies import get_password_hash
+from app.internal.tagging.jobs import tagging_jobs
+from app.internal.tagging import counters
+from app.shared.metrics import METRICS_ENABLED, MetricsMiddleware, registry
+from app.shared.profiling import SQLProfilerMiddleware
+from app.shared.responses import FastJSONResponse
 
 # Создание таблиц
 Base.metadata.create_all(bind=engine)
@@ -14,7 +20,8 @@ Base.metadata.create_all(bind=engine)
 app = FastAPI(
     title="FastAPI Backend",
     description="Backend API with clean architecture",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse,
 )
 
 # CORS middleware
@@ -26,6 +33,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Профиль SQL на запрос (SQL_PROFILING=1 или QueryBudget в тестах)
+app.add_middleware(SQLProfilerMiddleware)
+# Метрики HTTP-запросов для /metrics
+app.add_middleware(MetricsMiddleware)
+
 # Подключение роутов
 app.include_router(auth.router)
 app.include_router(admin.router)
@@ -34,6 +46,9 @@ app.include_router(tagging.router)
 @app.on_event("startup")
 async def startup_event():
     """Создание администратора при первом запуске приложения"""
+    # Отчёт о фактических настройках БД
+    print("Database settings: " + ", ".join(f"{k}={v}" for k, v in describe_engine().items()))
+
     db = next(get_db())
     
     # Проверяем, есть ли уже администратор
@@ -51,9 +66,21 @@ async def startup_event():
         db.commit()
         print("Created default admin user: username=admin, role=admin")
         print("Default password: admin123")
-    
+
+    # Счётчики корпуса на существующей БД заполняются один раз
+    counters.ensure_initialized(db)
+
     db.close()
 
+    # Запуск воркеров теггинга (подхватывают незавершённые задачи)
+    tagging_jobs.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    tagging_jobs.shutdown()
+    if async_engine is not None:
+        await async_engine.dispose()
+
 @app.get("/")
 async def root():
     return {"message": "FastAPI Backend is running!"}
@@ -61,3 +88,9 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+if METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        """Метрики в текстовом формате Prometheus"""
+        return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,10 +1,9 @@
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from typing import Optional
+from typing import Optional, Union
 
-from app.database.config import get_db
+from app.database.config import run_db
 from app.internal.users.http.admin_controller import AdminController
-from app.domain.schemas import UserCreate, UserResponse, PaginatedUsersResponse
+from app.domain.schemas import UserCreate, UserResponse, PaginatedUsersResponse, CursorUsersResponse
 from app.shared.dependencies import get_admin_user
 
 router = APIRouter(prefix="/admin", tags=["admin"])
@@ -15,38 +14,55 @@ admin_controller = AdminController()
 @router.post("/users", response_model=UserResponse)
 async def create_user(
     user_data: UserCreate,
-    db: Session = Depends(get_db),
     admin_user = Depends(get_admin_user)
 ):
     """Создание пользователя (только для администраторов)"""
-    return await admin_controller.create_user(user_data, db, admin_user)
+    return await admin_controller.create_user(user_data, admin_user)
 
 
 @router.post("/create-admin", response_model=UserResponse)
 async def create_admin_user(
-    user_data: UserCreate,
-    db: Session = Depends(get_db)
+    user_data: UserCreate
 ):
     """Создание администратора (для первичной настройки)"""
-    return await admin_controller.create_admin_user(user_data, db)
+    return await admin_controller.create_admin_user(user_data)
 
 
-@router.get("/users", response_model=PaginatedUsersResponse)
+@router.get("/users", response_model=Union[PaginatedUsersResponse, CursorUsersResponse])
 async def get_users(
     page: int = Query(1, ge=1, description="Номер страницы"),
     page_size: int = Query(20, ge=1, le=100, description="Количество элементов на странице"),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Курсорная пагинация: пустое значение — первая страница, далее meta.next_cursor"),
+    with_total: bool = Query(False, description="Считать total_items в курсорном режиме"),
     admin_user = Depends(get_admin_user)
 ):
     """Получение списка пользователей с пагинацией (только для администраторов)"""
-    return await admin_controller.get_users(db, page=page, page_size=page_size, admin_user=admin_user)
+    if cursor is not None:
+        return await run_db(admin_controller.get_users_by_cursor, cursor, page_size, with_total)
+    return await run_db(admin_controller.get_users, page, page_size)
 
 
 @router.delete("/users/{user_id}", response_model=dict)
 async def delete_user(
     user_id: int,
-    db: Session = Depends(get_db),
     admin_user = Depends(get_admin_user)
 ):
     """Удаление пользователя по ID (только для администраторов)"""
-    return await admin_controller.delete_user(user_id, db, admin_user)
+    return await run_db(admin_controller.delete_user, user_id)
+
+
+@router.get("/auth-cache", response_model=dict)
+async def get_auth_cache_stats(admin_user = Depends(get_admin_user)):
+    """Статистика кэша авторизованных пользователей (только для администраторов)"""
+    return await admin_controller.get_auth_cache_stats(admin_user)
+
+
+@router.get("/sql-profiles", response_model=list)
+async def get_sql_profiles(
+    limit: int = Query(20, ge=1, le=1000, description="Сколько последних запросов вернуть"),
+    with_statements: bool = Query(False, description="Включить текст SQL и время каждого запроса"),
+    admin_user = Depends(get_admin_user)
+):
+    """Профили SQL последних запросов и подозрения на N+1 (только при SQL_PROFILING=1)"""
+    return await admin_controller.get_sql_profiles(limit, with_statements, admin_user)
+
@@ -1,6 +1,4 @@
 from fastapi import APIRouter, Depends, Response
-from sqlalchemy.orm import Session
-from app.database.config import get_db
 from app.internal.users.http.auth_controller import AuthController
 from app.domain.schemas import UserLogin, Token, UserResponse
 from app.shared.dependencies import get_current_user
@@ -10,9 +8,9 @@ router = APIRouter(prefix="/auth", tags=["authentication"])
 auth_controller = AuthController()
 
 @router.post("/login", response_model=Token)
-async def login(user_data: UserLogin, response: Response, db: Session = Depends(get_db)):
+async def login(user_data: UserLogin, response: Response):
     """Вход в систему"""
-    return await auth_controller.login(user_data, response, db)
+    return await auth_controller.login(user_data, response)
 
 @router.post("/logout")
 async def logout(response: Response):
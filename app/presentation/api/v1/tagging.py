@@ -1,23 +1,23 @@
 from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, status
-from sqlalchemy.orm import Session
 from fastapi import Query
-from app.database.config import get_db
-from app.domain.tagging_schemas import TagTextRequest, TagTextResponse, PaginatedSentencesResponse, SentenceWithTokensResponse, UpdateSentenceRequest
+from app.database.config import run_db
+from app.domain.tagging_schemas import TagTextRequest, TaggingJobResponse, PaginatedSentencesResponse, CursorSentencesResponse, TokenSearchResponse, SentenceWithTokensResponse, SentencesWithTokensResponse, UpdateSentenceRequest, BatchUpdateRequest, BatchUpdateResponse
 from app.internal.tagging.http.controller import TaggingController
 from app.shared.dependencies import get_admin_user, get_current_user
-from typing import Optional, List
+from typing import Optional, List, Union
 from fastapi import Form, Body
 
 router = APIRouter(prefix="/tagging", tags=["tagging"])
 
 controller = TaggingController()
 
-@router.post("/run", response_model=TagTextResponse, dependencies=[Depends(get_admin_user)])
+@router.post("/run", response_model=TaggingJobResponse, status_code=status.HTTP_202_ACCEPTED)
 async def run_tagging(
     text_form: Optional[str] = Form(None),                       # text из multipart
     file: Optional[UploadFile] = File(None),                     # файл из multipart
     payload: Optional[TagTextRequest] = Body(None),              # JSON { "text": "..." }
-    db: Session = Depends(get_db),
+    duplicates: Optional[str] = Query(None, description="Дубликаты: skip, link, replace или allow"),
+    admin_user = Depends(get_admin_user),
 ):
     text: Optional[str] = None
 
@@ -45,27 +45,101 @@ async def run_tagging(
             detail="Provide text in JSON, form-data or upload a .txt file",
         )
 
-    # Теперь у тебя всегда есть text
-    return await controller.tag_text(TagTextRequest(text=text), db)
+    # Теперь у тебя всегда есть text — ставим в очередь, результат смотреть в /tagging/jobs/{id}
+    return await run_db(controller.tag_text, TagTextRequest(text=text), admin_user.id, duplicates)
+
+
+@router.post("/import", response_model=TaggingJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def import_conllu(
+    file: UploadFile = File(..., description="Готовая разметка: .conllu или .conllu.gz"),
+    duplicates: Optional[str] = Query(None, description="Дубликаты: skip, link, replace или allow"),
+    admin_user = Depends(get_admin_user),
+):
+    """Импорт размеченного CoNLL-U без теггера; прогресс — в /tagging/jobs/{id}"""
+    return await controller.import_conllu(file, created_by=admin_user.id, duplicates=duplicates)
+
+
+@router.get("/jobs/{job_id}", response_model=TaggingJobResponse, dependencies=[Depends(get_admin_user)])
+async def get_tagging_job(job_id: int):
+    """Статус и прогресс задачи теггинга"""
+    return await run_db(controller.get_job, job_id)
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=TaggingJobResponse, dependencies=[Depends(get_admin_user)])
+async def cancel_tagging_job(job_id: int):
+    """Отмена задачи теггинга"""
+    return await run_db(controller.cancel_job, job_id)
+
+@router.get("/cache/stats", response_model=dict, dependencies=[Depends(get_admin_user)])
+async def get_tagger_cache_stats():
+    """Статистика кэша ответов теггера"""
+    return await run_db(controller.get_tagger_cache_stats)
 
 # User routes (authenticated, not admin-only)
-@router.get("/sentences", response_model=PaginatedSentencesResponse)
+@router.get("/sentences", response_model=Union[PaginatedSentencesResponse, CursorSentencesResponse])
 async def get_sentences(
     page: int = 1,
     page_size: int = 20,
-    search: Optional[str] = Query(None, description="Поиск по тексту"),
+    search: Optional[str] = Query(None, description="Поиск по тексту: слова ищутся по префиксу, \"фраза\" — точная фраза"),
     status: Optional[int] = Query(None, description="Фильтр по статусу (0 - не исправлено, 1 - исправлено)"),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Курсорная пагинация: пустое значение — первая страница, далее meta.next_cursor"),
+    with_total: bool = Query(False, description="Считать total_items в курсорном режиме"),
     current_user = Depends(get_current_user)
 ):
-    return await controller.list_sentences(page, page_size, search, status, db)
+    if cursor is not None:
+        return await run_db(controller.list_sentences_by_cursor, cursor, page_size, search, status, with_total)
+    return await run_db(controller.list_sentences, page, page_size, search, status)
+
+
+@router.get("/tokens/search", response_model=TokenSearchResponse)
+async def search_tokens(
+    form: Optional[str] = Query(None, description="Словоформа"),
+    lemma: Optional[str] = Query(None, description="Лемма"),
+    pos: Optional[str] = Query(None, description="Часть речи (UPOS)"),
+    xpos: Optional[str] = Query(None, description="XPOS"),
+    feats: Optional[str] = Query(None, description="Признаки в формате conllu, например Tense=Past|Person=1"),
+    context: int = Query(5, ge=0, le=50, description="Число токенов контекста слева и справа"),
+    cursor: Optional[str] = Query(None, description="meta.next_cursor предыдущей страницы"),
+    page_size: int = Query(20, ge=1, le=200),
+    current_user = Depends(get_current_user)
+):
+    """Поиск токенов с контекстом (KWIC)"""
+    return await run_db(controller.search_tokens, form, lemma, pos, xpos, feats, context, cursor, page_size)
+
+
+@router.get("/export")
+async def export_corpus(
+    is_corrected: Optional[int] = Query(None, description="Фильтр по статусу (0 - не исправлено, 1 - исправлено)"),
+    id_from: Optional[int] = Query(None, ge=1, description="Начальный id предложения (включительно)"),
+    id_to: Optional[int] = Query(None, ge=1, description="Конечный id предложения (включительно)"),
+    search: Optional[str] = Query(None, description="Полнотекстовый поиск, как в /tagging/sentences"),
+    gzip: bool = Query(False, description="Сжать ответ gzip"),
+    current_user = Depends(get_current_user)
+):
+    """Потоковая выгрузка корпуса в формате CoNLL-U"""
+    return controller.export_conllu(is_corrected, id_from, id_to, search, compress=gzip)
+
+
+@router.patch("/sentences", response_model=BatchUpdateResponse)
+async def patch_sentences(payload: BatchUpdateRequest, current_user = Depends(get_current_user)):
+    """Исправление нескольких предложений и их токенов одной транзакцией"""
+    return await run_db(controller.update_sentences_batch, payload)
+
+
+@router.get("/sentences/multi", response_model=SentencesWithTokensResponse)
+async def get_sentences_multi(
+    ids: List[str] = Query(..., description="id предложений: ids=1&ids=2 или ids=1,2,3"),
+    current_user = Depends(get_current_user),
+):
+    """Несколько предложений с токенами одним запросом к БД"""
+    return await run_db(controller.get_sentences_with_tokens, ids)
 
 
 @router.get("/sentences/{sentence_id}", response_model=SentenceWithTokensResponse)
-async def get_sentence(sentence_id: int, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
-    return await controller.get_sentence_with_tokens(sentence_id, db)
+async def get_sentence(sentence_id: int, current_user = Depends(get_current_user)):
+    return await run_db(controller.get_sentence_with_tokens, sentence_id)
 
 
 @router.patch("/sentences/{sentence_id}", response_model=SentenceWithTokensResponse)
-async def patch_sentence(sentence_id: int, payload: UpdateSentenceRequest, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
-    return await controller.update_sentence_and_tokens(sentence_id, payload, db)
+async def patch_sentence(sentence_id: int, payload: UpdateSentenceRequest, current_user = Depends(get_current_user)):
+    return await run_db(controller.update_sentence_and_tokens, sentence_id, payload)
@@ -1,12 +1,21 @@
-from typing import Optional
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional, Tuple
 from fastapi import Depends, HTTPException, status, Request, Cookie
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from app.database.config import get_db
+import bcrypt
+from app.database.config import run_db
 from app.database.models import User
 from app.domain.schemas import TokenData
+from app.shared.cache import TTLCache
+from app.shared.metrics import observe_stage
 import os
+import time
 from datetime import datetime, timedelta
 
 # Security settings
@@ -14,18 +23,83 @@ SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 4320  # 30 days
 
-# Password hashing
+# Кэш проверенных токенов: token -> UserPrincipal
+AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "300"))
+AUTH_CACHE_MAX_SIZE = int(os.getenv("AUTH_CACHE_MAX_SIZE", "1024"))
+
+# Password hashing: bcrypt (по умолчанию) или sha256_crypt.
+# Хэши другой схемы или с другой стоимостью пересчитываются при входе.
+PASSWORD_HASH_SCHEME = os.getenv("PASSWORD_HASH_SCHEME", "bcrypt")
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))  # параллельных хэширований
+
+if PASSWORD_HASH_SCHEME not in ("bcrypt", "sha256_crypt"):
+    raise ValueError(f"Unsupported PASSWORD_HASH_SCHEME: {PASSWORD_HASH_SCHEME}")
+
+# sha256_crypt — через passlib; bcrypt вызывается напрямую (passlib 1.7 не работает с bcrypt 5)
 pwd_context = CryptContext(schemes=["sha256_crypt"], deprecated="auto")
 
+_BCRYPT_PREFIXES = ("$2a$", "$2b$", "$2y$")
+
+_hash_lock = threading.Lock()
+_hash_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _bcrypt_secret(password: str) -> bytes:
+    # bcrypt учитывает только первые 72 байта пароля
+    return password.encode("utf-8")[:72]
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
+    if hashed_password.startswith(_BCRYPT_PREFIXES):
+        return bcrypt.checkpw(_bcrypt_secret(plain_password), hashed_password.encode("utf-8"))
     return pwd_context.verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
+    if PASSWORD_HASH_SCHEME == "bcrypt":
+        return bcrypt.hashpw(_bcrypt_secret(password), bcrypt.gensalt(BCRYPT_ROUNDS)).decode("utf-8")
     return pwd_context.hash(password)
 
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Хэш сделан не текущей схемой или с другой стоимостью"""
+    if hashed_password.startswith(_BCRYPT_PREFIXES):
+        return PASSWORD_HASH_SCHEME != "bcrypt" or int(hashed_password.split("$")[2]) != BCRYPT_ROUNDS
+    return PASSWORD_HASH_SCHEME != "sha256_crypt" or pwd_context.needs_update(hashed_password)
+
+
+def _get_hash_executor() -> ThreadPoolExecutor:
+    global _hash_executor
+    with _hash_lock:
+        if _hash_executor is None:
+            _hash_executor = ThreadPoolExecutor(
+                max_workers=max(1, PASSWORD_HASH_WORKERS), thread_name_prefix="password-hash"
+            )
+        return _hash_executor
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password в отдельном пуле, не блокируя event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_hash_executor(), verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash в отдельном пуле, не блокируя event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_hash_executor(), get_password_hash, password)
+
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Проверяет пароль; если хэш устарел — возвращает новый хэш для сохранения"""
+    if not await verify_password_async(plain_password, hashed_password):
+        return False, None
+    if password_needs_rehash(hashed_password):
+        return True, await get_password_hash_async(plain_password)
+    return True, None
+
+
 def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
@@ -33,7 +107,7 @@ def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
-def verify_token(token: str) -> TokenData:
+def _decode_token(token: str) -> dict:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -41,12 +115,45 @@ def verify_token(token: str) -> TokenData:
     )
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-        return TokenData(username=username)
     except JWTError:
         raise credentials_exception
+    if payload.get("sub") is None:
+        raise credentials_exception
+    return payload
+
+
+def verify_token(token: str) -> TokenData:
+    return TokenData(username=_decode_token(token)["sub"])
+
+
+@dataclass(frozen=True)
+class UserPrincipal:
+    """Неизменяемый снимок пользователя, который отдают зависимости авторизации"""
+    id: int
+    username: str
+    role: str
+    is_active: bool
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserPrincipal":
+        return cls(
+            id=user.id,
+            username=user.username,
+            role=user.role,
+            is_active=user.is_active,
+            created_at=user.created_at,
+            updated_at=user.updated_at,
+        )
+
+
+auth_cache = TTLCache(max_size=AUTH_CACHE_MAX_SIZE, ttl=AUTH_CACHE_TTL_SECONDS)
+
+
+def invalidate_user(username: str) -> int:
+    """Сбрасывает закэшированные токены пользователя (удаление, деактивация)"""
+    return auth_cache.remove_where(lambda principal: principal.username == username)
 
 
 def get_token_from_request(
@@ -69,20 +176,33 @@ def get_token_from_request(
     raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
 
 
-def get_current_user(
-    token: str = Depends(get_token_from_request),
-    db: Session = Depends(get_db)
-) -> User:
-    token_data = verify_token(token)
-    user = db.query(User).filter(User.username == token_data.username).first()
-    if not user:
+def _load_principal(db: Session, username: str) -> Optional[UserPrincipal]:
+    user = db.scalars(select(User).where(User.username == username)).first()
+    return UserPrincipal.from_user(user) if user else None
+
+
+async def get_current_user(
+    token: str = Depends(get_token_from_request)
+) -> UserPrincipal:
+    # попадание в кэш — без сессии и без перехода в пул потоков
+    principal = auth_cache.get(token)
+    if principal is not None:
+        return principal
+
+    with observe_stage("auth_lookup"):
+        payload = _decode_token(token)
+        principal = await run_db(_load_principal, payload["sub"])
+    if not principal:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-    return user
+
+    # Запись не должна пережить сам токен
+    auth_cache.set(token, principal, ttl=payload["exp"] - time.time() if "exp" in payload else None)
+    return principal
 
 
-def get_admin_user(
-    current_user: User = Depends(get_current_user)
-) -> User:
+async def get_admin_user(
+    current_user: UserPrincipal = Depends(get_current_user)
+) -> UserPrincipal:
     if current_user.role != "admin":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
     return current_user
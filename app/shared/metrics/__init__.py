@@ -0,0 +1,291 @@
+"""
+Метрики процесса в текстовом формате Prometheus (GET /metrics).
+
+Свой небольшой реестр без внешних зависимостей: счётчики, gauge и гистограммы
+с метками, запись — под одним lock'ом за единицы микросекунд.
+Источники: MetricsMiddleware (HTTP), instrument_engine (запросы к БД),
+хуки теггинга и аутентификации (observe_stage и метрики ниже).
+"""
+import contextvars
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, labels: LabelValues = (), amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels: LabelValues = ()) -> float:
+        with self._lock:
+            return self._values.get(labels, 0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(v)}" for labels, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, labels: LabelValues = (), amount: float = 1) -> None:
+        self.inc(labels, -amount)
+
+    def set(self, value: float, labels: LabelValues = ()) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [счётчики по корзинам (последняя — +Inf)..., sum]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, labels: LabelValues = ()) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            state[index] += 1
+            state[-1] += value
+
+    def count(self, labels: LabelValues = ()) -> int:
+        with self._lock:
+            state = self._values.get(labels)
+            return int(sum(state[:-1])) if state else 0
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = [(labels, list(state)) for labels, state in sorted(self._values.items())]
+        lines = []
+        for labels, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), state[:-1]):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(state[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "http_request_duration_seconds", "Время обработки HTTP-запроса", ("method", "route", "status")
+)
+HTTP_REQUESTS_IN_FLIGHT = registry.gauge("http_requests_in_flight", "Запросы в обработке")
+HTTP_DB_QUERIES = registry.histogram(
+    "http_request_db_queries", "Число запросов к БД на HTTP-запрос", ("method", "route"), buckets=COUNT_BUCKETS
+)
+HTTP_DB_SECONDS = registry.histogram(
+    "http_request_db_seconds", "Суммарное время запросов к БД на HTTP-запрос", ("method", "route")
+)
+DB_QUERIES = registry.counter("db_queries_total", "Запросы к БД (включая фоновые задачи)")
+DB_QUERY_SECONDS = registry.counter("db_query_seconds_total", "Суммарное время запросов к БД")
+TAGGER_REQUEST_SECONDS = registry.histogram(
+    "tagger_request_duration_seconds", "Время запроса к удалённому теггеру", ("outcome",)
+)
+TAGGER_ERRORS = registry.counter("tagger_errors_total", "Ошибки запросов к теггеру", ("reason",))
+TAGGER_RETRIES = registry.counter("tagger_retries_total", "Повторные запросы к теггеру после временных сбоев")
+TAGGER_CIRCUIT_STATE = registry.gauge(
+    "tagger_circuit_state", "Предохранитель теггера: 0 — замкнут, 1 — разомкнут, 2 — пробный запрос"
+)
+TAGGER_CACHE_HITS = registry.counter("tagger_cache_hits_total", "Части текста, взятые из кэша теггера")
+TAGGER_CACHE_MISSES = registry.counter("tagger_cache_misses_total", "Части текста, отправленные в теггер и записанные в кэш")
+TAGGER_CACHE_BYTES_SAVED = registry.counter(
+    "tagger_cache_bytes_saved_total", "Байты запросов и ответов теггера, сэкономленные кэшем"
+)
+TAGGER_CACHE_EVICTIONS = registry.counter("tagger_cache_evictions_total", "Записи, вытесненные из кэша теггера")
+STAGE_SECONDS = registry.histogram(
+    "pipeline_stage_duration_seconds", "Время этапов обработки (теггинг, разбор, запись, аутентификация)", ("stage",)
+)
+JOBS_RUNNING = registry.gauge("tagging_jobs_running", "Выполняющиеся задачи теггинга/импорта", ("kind",))
+JOBS_FINISHED = registry.counter("tagging_jobs_finished_total", "Завершённые задачи", ("kind", "status"))
+
+# счётчики запросов к БД текущего HTTP-запроса: [число, секунды]
+_request_db: contextvars.ContextVar[Optional[List[float]]] = contextvars.ContextVar("request_db", default=None)
+
+
+@contextmanager
+def observe_stage(stage: str) -> Iterator[None]:
+    """Замер этапа конвейера в pipeline_stage_duration_seconds{stage=...}."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - started, (stage,))
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    elapsed = time.perf_counter() - started
+    DB_QUERIES.inc()
+    DB_QUERY_SECONDS.inc(amount=elapsed)
+    current = _request_db.get()
+    if current is not None:
+        current[0] += 1
+        current[1] += elapsed
+
+
+def _handle_error(exception_context):
+    stack = exception_context.connection.info.get("query_started") if exception_context.connection else None
+    if stack:
+        stack.pop()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Считает запросы и время БД (для async-движка передавайте async_engine.sync_engine)."""
+    if not METRICS_ENABLED or event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+class MetricsMiddleware:
+    """
+    ASGI-middleware: латентность по шаблону маршрута и статусу, запросы в обработке,
+    число и время запросов к БД на HTTP-запрос. Маршрут берётся из scope["route"]
+    (шаблон вида /tagging/sentences/{sentence_id}), несовпавшие пути — "unmatched".
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        db_stats = [0, 0.0]
+        token = _request_db.set(db_stats)
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            _request_db.reset(token)
+            route = scope.get("route")
+            route_label = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            HTTP_REQUEST_SECONDS.observe(elapsed, (method, route_label, str(status_code)))
+            HTTP_DB_QUERIES.observe(db_stats[0], (method, route_label))
+            HTTP_DB_SECONDS.observe(db_stats[1], (method, route_label))
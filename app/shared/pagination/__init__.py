@@ -0,0 +1,36 @@
+import base64
+import hashlib
+import json
+from typing import Any, Optional
+
+from fastapi import HTTPException, status
+
+
+def _fingerprint(filters: Any) -> str:
+    raw = json.dumps(filters, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:8]
+
+
+def encode_cursor(last_id: int, filters: Any = None) -> str:
+    """
+    Непрозрачный курсор keyset-пагинации: id последнего элемента страницы
+    и отпечаток фильтров, с которыми он был получен.
+    """
+    payload = json.dumps({"id": last_id, "f": _fingerprint(filters)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], filters: Any = None) -> Optional[int]:
+    """Возвращает id, после которого начинается страница (None — первая страница)."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        last_id = int(payload["id"])
+        fingerprint = payload["f"]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    if fingerprint != _fingerprint(filters):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor does not match current filters")
+    return last_id
@@ -0,0 +1,206 @@
+"""
+Профилировщик SQL по запросам (включается SQL_PROFILING=1).
+
+Каждый HTTP-запрос получает QueryProfile: все выполненные SQL с временем.
+Повторяющиеся формы запроса (тот же SQL без значений параметров) от
+SQL_N_PLUS_ONE_THRESHOLD раз помечаются как подозрение на N+1.
+Итог — в заголовках X-SQL-Queries / X-SQL-Time-Ms / X-SQL-N-Plus-One
+и в GET /admin/sql-profiles (последние SQL_PROFILE_HISTORY запросов).
+
+В тестах бюджет запросов проверяет QueryBudget — он работает и без SQL_PROFILING:
+
+    with QueryBudget(max_queries=2):
+        client.get("/tagging/sentences/1")
+"""
+import contextvars
+import os
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+SQL_PROFILING = os.getenv("SQL_PROFILING", "0") == "1"
+SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "3"))
+SQL_PROFILE_HISTORY = int(os.getenv("SQL_PROFILE_HISTORY", "50"))
+
+_SPACES_RE = re.compile(r"\s+")
+_PLACEHOLDER_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_NUMBER_RE = re.compile(r"\b\d+\b")
+
+
+def statement_shape(statement: str) -> str:
+    """SQL без значений: списки IN (?, ?, ...) и числа схлопываются, пробелы нормализуются."""
+    shape = _SPACES_RE.sub(" ", statement).strip()
+    shape = _PLACEHOLDER_LIST_RE.sub("(?)", shape)
+    return _NUMBER_RE.sub("?", shape)
+
+
+class QueryProfile:
+    """SQL одного запроса (или блока кода): (statement, секунды, executemany)."""
+
+    def __init__(self, label: str = ""):
+        self.label = label
+        self.statements: List[Tuple[str, float, bool]] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(duration for _, duration, _ in self.statements)
+
+    def n_plus_one(self, threshold: int = SQL_N_PLUS_ONE_THRESHOLD) -> Dict[str, int]:
+        """Формы SQL, выполненные не менее threshold раз: shape -> число повторов."""
+        shapes = Counter(statement_shape(statement) for statement, _, _ in self.statements)
+        return {shape: count for shape, count in shapes.items() if count >= threshold}
+
+    def summary(self, with_statements: bool = False) -> dict:
+        result = {
+            "label": self.label,
+            "queries": self.count,
+            "time_ms": round(self.total_seconds * 1000, 3),
+            "n_plus_one": self.n_plus_one(),
+        }
+        if with_statements:
+            result["statements"] = [
+                {"sql": statement, "time_ms": round(duration * 1000, 3), "executemany": executemany}
+                for statement, duration, executemany in self.statements
+            ]
+        return result
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+_current_profile: contextvars.ContextVar[Optional[QueryProfile]] = contextvars.ContextVar("sql_profile", default=None)
+
+_lock = threading.Lock()
+_history: "deque[QueryProfile]" = deque(maxlen=max(1, SQL_PROFILE_HISTORY))
+# активные QueryBudget: получают профили всех HTTP-запросов, пока открыты
+_watchers: List["QueryBudget"] = []
+
+
+@contextmanager
+def profile_queries(label: str = "") -> Iterator[QueryProfile]:
+    """Записывает SQL, выполненные внутри блока (в этом же потоке/задаче)."""
+    profile = QueryProfile(label)
+    token = _current_profile.set(profile)
+    try:
+        yield profile
+    finally:
+        _current_profile.reset(token)
+
+
+def recent_profiles(limit: int = SQL_PROFILE_HISTORY) -> List[QueryProfile]:
+    with _lock:
+        return list(_history)[-limit:][::-1]
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_profile.get() is not None:
+        context._profile_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current_profile.get()
+    started = getattr(context, "_profile_started", None)
+    if profile is not None and started is not None:
+        profile.statements.append((statement, time.perf_counter() - started, executemany))
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Подключает профилировщик к движку (для async — async_engine.sync_engine)."""
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class QueryBudget:
+    """
+    Бюджет SQL для тестов: каждый HTTP-запрос (и код внутри блока) должен уложиться
+    в max_queries; при allow_n_plus_one=False повторяющиеся формы SQL тоже ошибка.
+    Нарушение — QueryBudgetExceeded (AssertionError) при выходе из блока.
+    """
+
+    def __init__(self, max_queries: int, allow_n_plus_one: bool = False):
+        self.max_queries = max_queries
+        self.allow_n_plus_one = allow_n_plus_one
+        self.profiles: List[QueryProfile] = []
+        self._direct: Optional[QueryProfile] = None
+        self._token = None
+
+    def record(self, profile: QueryProfile) -> None:
+        with _lock:
+            self.profiles.append(profile)
+
+    def __enter__(self) -> "QueryBudget":
+        self._direct = QueryProfile("direct")
+        self._token = _current_profile.set(self._direct)
+        with _lock:
+            _watchers.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        _current_profile.reset(self._token)
+        with _lock:
+            _watchers.remove(self)
+        if self._direct.count:
+            self.profiles.append(self._direct)
+        if exc_type is not None:
+            return
+        problems = []
+        for profile in self.profiles:
+            if profile.count > self.max_queries:
+                problems.append(f"{profile.label or 'block'}: {profile.count} queries > {self.max_queries}")
+            if not self.allow_n_plus_one:
+                for shape, repeats in profile.n_plus_one().items():
+                    problems.append(f"{profile.label or 'block'}: N+1 suspect x{repeats}: {shape}")
+        if problems:
+            raise QueryBudgetExceeded("Query budget exceeded:\n" + "\n".join(problems))
+
+
+class SQLProfilerMiddleware:
+    """
+    ASGI-middleware: профиль SQL на каждый HTTP-запрос, если включён SQL_PROFILING
+    или открыт QueryBudget. Итог добавляется в заголовки ответа (только при SQL_PROFILING).
+    Запросы, выполненные после начала ответа (потоковые ответы), в заголовки не попадают.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not (SQL_PROFILING or _watchers):
+            await self.app(scope, receive, send)
+            return
+
+        profile = QueryProfile(f"{scope['method']} {scope['path']}")
+
+        async def send_with_summary(message):
+            if SQL_PROFILING and message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-sql-queries", str(profile.count).encode()))
+                headers.append((b"x-sql-time-ms", f"{profile.total_seconds * 1000:.3f}".encode()))
+                headers.append((b"x-sql-n-plus-one", str(len(profile.n_plus_one())).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = _current_profile.set(profile)
+        try:
+            await self.app(scope, receive, send_with_summary)
+        finally:
+            _current_profile.reset(token)
+            with _lock:
+                if SQL_PROFILING:
+                    _history.append(profile)
+                watchers = list(_watchers)
+            for watcher in watchers:
+                watcher.record(profile)
@@ -0,0 +1,22 @@
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # без orjson — стандартный json Starlette
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON-ответ через orjson. Класс ответа по умолчанию для всего приложения (app/main.py):
+    response_model по-прежнему проверяется FastAPI, меняется только кодирование в байты.
+    Горячие эндпоинты собирают dict прямо из строк БД и возвращают этот ответ
+    сами — тогда проверка и сериализация по response_model пропускаются.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
@@ -0,0 +1,80 @@
+"""
+Бенчмарк пакетного исправления: N запросов PATCH /tagging/sentences/{id}
+против одного PATCH /tagging/sentences с теми же N изменениями.
+В каждом изменении — статус, лемма и признаки двух токенов.
+
+Запуск:
+    python -m benchmarks.bench_batch_patch --sentences 20000 --batch 10,100,500
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import requests
+
+from benchmarks.bench_concurrency import free_port, seed, start_server
+
+
+def make_items(session, base_url, n_sentences, count, rnd):
+    """Изменения для count случайных предложений (id токенов читаются до замера)."""
+    items = []
+    for sentence_id in rnd.sample(range(1, n_sentences + 1), count):
+        tokens = session.get(f"{base_url}/tagging/sentences/{sentence_id}").json()["tokens"][:2]
+        items.append({
+            "id": sentence_id,
+            "is_corrected": 1,
+            "tokens": [
+                {"id": token["id"], "lemma": f"түз{rnd.randint(0, 999)}", "feats": {"Case": "Gen", "Number": "Plur"}}
+                for token in tokens
+            ],
+        })
+    return items
+
+
+def patch_one_by_one(session, base_url, items):
+    for item in items:
+        payload = {key: value for key, value in item.items() if key != "id"}
+        session.patch(f"{base_url}/tagging/sentences/{item['id']}", json=payload).raise_for_status()
+
+
+def patch_batch(session, base_url, items):
+    response = session.patch(f"{base_url}/tagging/sentences", json={"items": items})
+    response.raise_for_status()
+    assert response.json()["updated"] == len(items)
+
+
+def measure(fn, *args):
+    started = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sentences", type=int, default=20_000)
+    parser.add_argument("--batch", default="10,100,500", help="размеры пачек через запятую")
+    args = parser.parse_args()
+
+    rnd = random.Random(7)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        seed(db_path, args.sentences)
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = start_server(db_path, port)
+        try:
+            with requests.Session() as session:
+                session.post(f"{base_url}/auth/login", json={"username": "admin", "password": "admin123"}).raise_for_status()
+
+                print(f"Корпус: {args.sentences} предложений")
+                print("=" * 30)
+                print(f"{'пачка':>6} {'N x PATCH, ms':>14} {'batch, ms':>10} {'ускорение':>10}")
+                for size in (int(n) for n in args.batch.split(",")):
+                    single = measure(patch_one_by_one, session, base_url, make_items(session, base_url, args.sentences, size, rnd))
+                    batch = measure(patch_batch, session, base_url, make_items(session, base_url, args.sentences, size, rnd))
+                    print(f"{size:>6} {single * 1000:>14.1f} {batch * 1000:>10.1f} {single / batch:>9.1f}x")
+        finally:
+            server.terminate()
+            server.wait()
@@ -0,0 +1,94 @@
+"""
+Бенчмарк записи корпуса: старый путь (ORM, flush на каждое предложение)
+против TaggingService.bulk_store (executemany-вставки пачками).
+
+Запуск:
+    python -m benchmarks.bench_bulk_insert --sentences 100000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database.models import Base, Sentence, Token
+from app.internal.tagging.features import resolve_bundle_ids
+from app.internal.tagging.service import TaggingService
+
+POS_TAGS = ["NOUN", "VERB", "ADJ", "PRON", "ADV", "NUM", "PUNCT"]
+
+
+def make_corpus(n_sentences: int, tokens_per_sentence: int, seed: int = 42):
+    rnd = random.Random(seed)
+    corpus = []
+    for i in range(n_sentences):
+        tokens = []
+        for j in range(tokens_per_sentence):
+            pos = rnd.choice(POS_TAGS)
+            tokens.append({
+                'token_index': str(j + 1),
+                'form': f"сөз{rnd.randint(0, 5000)}",
+                'lemma': f"сөз{rnd.randint(0, 2000)}",
+                'pos': pos,
+                'xpos': pos,
+                'feats': {"Case": "Nom", "Number": "Sing"} if pos == "NOUN" else None,
+            })
+        corpus.append((f"Сүйлөм {i}", tokens))
+    return corpus
+
+
+def make_session(path: str):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+
+
+def store_orm_per_row(db, corpus):
+    """Путь до изменений: add + flush на каждое предложение, токены — ORM-объектами."""
+    for sentence_text, tokens in corpus:
+        sentence = Sentence(text=sentence_text, is_corrected=0)
+        db.add(sentence)
+        db.flush()
+        feats_ids = resolve_bundle_ids(db, [token['feats'] for token in tokens])
+        for token, feats_id in zip(tokens, feats_ids):
+            fields = {k: v for k, v in token.items() if k != 'feats'}
+            db.add(Token(sentence_id=sentence.id, feats_id=feats_id, **fields))
+    db.commit()
+
+
+def run(label, fn, corpus):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, db = make_session(os.path.join(tmp, "bench.db"))
+        started = time.perf_counter()
+        fn(db, corpus)
+        elapsed = time.perf_counter() - started
+        db.close()
+        engine.dispose()
+
+    n_sentences = len(corpus)
+    n_rows = n_sentences + sum(len(tokens) for _, tokens in corpus)
+    print(f"{label:<22} {elapsed:8.2f} s  {n_sentences / elapsed:10.0f} sent/s  {n_rows / elapsed:10.0f} rows/s")
+    return elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sentences", type=int, default=100_000)
+    parser.add_argument("--tokens-per-sentence", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.sentences, args.tokens_per_sentence)
+    print(f"Корпус: {args.sentences} предложений, {args.sentences * args.tokens_per_sentence} токенов")
+    print("=" * 30)
+
+    before = run("ORM, flush per row", store_orm_per_row, corpus)
+    after = run(
+        f"bulk_store ({args.batch_size})",
+        lambda db, c: TaggingService(db).bulk_store(c, batch_size=args.batch_size),
+        corpus,
+    )
+    print(f"\nУскорение: x{before / after:.1f}")
@@ -0,0 +1,171 @@
+"""
+Бенчмарк конкурентности: пропускная способность API при росте числа
+одновременных клиентов. Сервер (uvicorn, один воркер) запускается отдельным
+процессом на временной БД с синтетическим корпусом; клиенты — потоки
+с keep-alive сессиями, смесь запросов аннотатора (предложение с токенами,
+список, полнотекстовый поиск, KWIC, PATCH).
+
+--writer имитирует фоновый импорт: отдельное соединение периодически держит
+блокировку записи SQLite. PATCH в это время ждёт блокировку в своём потоке
+пула, остальные запросы продолжают обслуживаться.
+
+--async-db запускает сервер с ASYNC_DB_ENABLED=1 (обработчики через
+async-движок) для сравнения с синхронным путём по умолчанию.
+
+Запуск:
+    python -m benchmarks.bench_concurrency --sentences 20000 --clients 1,4,16,32 --seconds 10
+    python -m benchmarks.bench_concurrency --writer
+    python -m benchmarks.bench_concurrency --async-db
+"""
+import argparse
+import os
+import random
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database.models import Base
+from app.internal.tagging.service import TaggingService
+from benchmarks.bench_bulk_insert import make_corpus
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def seed(path: str, n_sentences: int) -> None:
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    TaggingService(db).bulk_store(make_corpus(n_sentences, 10))
+    db.close()
+    engine.dispose()
+
+
+def start_server(db_path: str, port: int, async_db: bool) -> subprocess.Popen:
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}", ASYNC_DB_ENABLED="1" if async_db else "0")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(200):
+        try:
+            requests.get(f"{base_url}/health", timeout=1)
+            return server
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("server did not start")
+
+
+def make_requests(n_sentences: int):
+    """Случайный запрос аннотатора: (method, path, params, json)."""
+    rnd = random.Random()
+
+    def next_request():
+        kind = rnd.random()
+        if kind < 0.1:
+            return "PATCH", f"/tagging/sentences/{rnd.randint(1, n_sentences)}", None, {"is_corrected": 1}
+        if kind < 0.5:
+            return "GET", f"/tagging/sentences/{rnd.randint(1, n_sentences)}", None, None
+        if kind < 0.75:
+            last_page = min(50, max(1, n_sentences // 20))  # не дальше конца корпуса
+            return "GET", "/tagging/sentences", {"page": rnd.randint(1, last_page), "page_size": 20}, None
+        if kind < 0.9:
+            return "GET", "/tagging/sentences", {"search": f"Сүйлөм {rnd.randint(0, n_sentences)}"}, None
+        return "GET", "/tagging/tokens/search", {"lemma": f"сөз{rnd.randint(0, 2000)}", "page_size": 20}, None
+
+    return next_request
+
+
+def writer(db_path: str, stop: threading.Event, hold: float = 0.05, pause: float = 0.05) -> None:
+    """Периодически держит блокировку записи, как пачка фонового импорта."""
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    while not stop.is_set():
+        conn.execute("BEGIN IMMEDIATE")
+        time.sleep(hold)
+        conn.execute("COMMIT")
+        time.sleep(pause)
+    conn.close()
+
+
+def client(base_url, cookies, n_sentences, deadline, latencies, errors):
+    next_request = make_requests(n_sentences)
+    with requests.Session() as session:
+        session.cookies.update(cookies)
+        while time.perf_counter() < deadline:
+            method, path, params, body = next_request()
+            started = time.perf_counter()
+            response = session.request(method, base_url + path, params=params, json=body)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                errors.append(response.status_code)
+
+
+def run_level(base_url, cookies, n_sentences, n_clients, seconds):
+    latencies, errors = [], []
+    deadline = time.perf_counter() + seconds
+    threads = [
+        threading.Thread(target=client, args=(base_url, cookies, n_sentences, deadline, latencies, errors))
+        for _ in range(n_clients)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return len(latencies) / elapsed, percentile(latencies, 0.5), percentile(latencies, 0.99), len(errors)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sentences", type=int, default=20_000)
+    parser.add_argument("--clients", default="1,2,4,8,16,32")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--writer", action="store_true", help="фоновая запись, держащая блокировку SQLite")
+    parser.add_argument("--async-db", action="store_true", help="сервер с ASYNC_DB_ENABLED=1")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        seed(db_path, args.sentences)
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = start_server(db_path, port, args.async_db)
+        try:
+            login = requests.post(f"{base_url}/auth/login", json={"username": "admin", "password": "admin123"})
+            login.raise_for_status()
+
+            stop = threading.Event()
+            if args.writer:
+                threading.Thread(target=writer, args=(db_path, stop), daemon=True).start()
+
+            print(f"Корпус: {args.sentences} предложений, {args.seconds:.0f} с на уровень"
+                  + (", фоновая запись" if args.writer else "")
+                  + (", async-движок" if args.async_db else ""))
+            print("=" * 30)
+            print(f"{'клиентов':>8} {'req/s':>10} {'p50, ms':>10} {'p99, ms':>10} {'ошибок':>8}")
+            for n_clients in (int(n) for n in args.clients.split(",")):
+                rps, p50, p99, n_errors = run_level(base_url, login.cookies, args.sentences, n_clients, args.seconds)
+                print(f"{n_clients:>8} {rps:>10.1f} {p50 * 1000:>10.1f} {p99 * 1000:>10.1f} {n_errors:>8}")
+            stop.set()
+        finally:
+            server.terminate()
+            server.wait()
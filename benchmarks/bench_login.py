@@ -0,0 +1,114 @@
+"""
+Бенчмарк входа: пропускная способность и p99 задержки /auth/login при
+одновременных входах, а также задержка /health на фоне (отзывчивость event loop).
+
+--inline воспроизводит прежнее поведение: проверка пароля прямо в обработчике.
+
+Запуск:
+    python -m benchmarks.bench_login --concurrency 32 --logins 400
+    PASSWORD_HASH_SCHEME=sha256_crypt python -m benchmarks.bench_login --inline
+"""
+import argparse
+import os
+import socket
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_tmp.name, 'bench.db')}")
+
+import uvicorn  # noqa: E402
+
+from app.main import app  # noqa: E402
+from app.internal.auth import auth_service  # noqa: E402
+from app.shared import dependencies  # noqa: E402
+
+CREDENTIALS = {"username": "admin", "password": "admin123"}
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def make_inline():
+    """Проверка и пересчёт хэша синхронно в event loop — как было раньше."""
+    async def verify_inline(plain_password, hashed_password):
+        if not dependencies.verify_password(plain_password, hashed_password):
+            return False, None
+        if dependencies.password_needs_rehash(hashed_password):
+            return True, dependencies.get_password_hash(plain_password)
+        return True, None
+    return verify_inline
+
+
+def login(base_url: str) -> float:
+    started = time.perf_counter()
+    response = requests.post(f"{base_url}/auth/login", json=CREDENTIALS)
+    response.raise_for_status()
+    return time.perf_counter() - started
+
+
+def probe_health(base_url: str, stop: threading.Event, latencies: list) -> None:
+    with requests.Session() as session:
+        while not stop.is_set():
+            started = time.perf_counter()
+            session.get(f"{base_url}/health")
+            latencies.append(time.perf_counter() - started)
+            time.sleep(0.01)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--logins", type=int, default=400)
+    parser.add_argument("--inline", action="store_true", help="хэшировать в event loop (старое поведение)")
+    args = parser.parse_args()
+
+    if args.inline:
+        auth_service.verify_and_update_password = make_inline()
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = start_server(port)
+    login(base_url)  # прогрев и перевод хэша admin на текущую схему
+
+    stop = threading.Event()
+    health = []
+    prober = threading.Thread(target=probe_health, args=(base_url, stop, health), daemon=True)
+    prober.start()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        latencies = list(pool.map(lambda _: login(base_url), range(args.logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    prober.join()
+    server.should_exit = True
+
+    mode = "inline" if args.inline else f"executor ({dependencies.PASSWORD_HASH_WORKERS} workers)"
+    print(f"Схема: {dependencies.PASSWORD_HASH_SCHEME}, режим: {mode}, одновременно: {args.concurrency}")
+    print("=" * 30)
+    print(f"Входов/с:          {args.logins / elapsed:10.1f}")
+    print(f"login p50:         {statistics.median(latencies) * 1000:10.1f} ms")
+    print(f"login p99:         {percentile(latencies, 0.99) * 1000:10.1f} ms")
+    print(f"/health p99:       {percentile(health, 0.99) * 1000:10.1f} ms  ({len(health)} запросов)")
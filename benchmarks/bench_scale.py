@@ -0,0 +1,209 @@
+"""
+Замер путей чтения на корпусах разного объёма: как растёт время списка,
+курсора, поиска, подсчётов, KWIC и карточки предложения с числом токенов.
+
+Для каждой точки строится синтетический корпус (app.internal.tagging.synthetic),
+методы TaggingController вызываются напрямую на сессии к этой БД
+(без HTTP, но с рендерингом ответа). Итог — медиана по каждому пути и точке
+и показатель роста: наклон log(время)/log(объём) между первой и последней точкой
+(≈0 — не зависит от объёма, ≈1 — линейно). С --max-slope путь с наклоном выше
+порога считается регрессией, код выхода 1.
+
+Запуск:
+    python -m benchmarks.bench_scale --scales 10k,100k,1M
+    python -m benchmarks.bench_scale --scales 10k,1M,10M --db-dir /var/tmp/corpora --output scale.json
+"""
+import argparse
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.database.config import apply_sqlite_pragmas
+from app.database.models import Base, Sentence, Token
+from app.internal.tagging.http.controller import TaggingController
+from app.internal.tagging.synthetic import SyntheticCorpus, generate_corpus
+from app.shared.pagination import encode_cursor
+
+PAGE_SIZE = 50
+
+_MAX_ID = select(func.max(Sentence.id))
+_TOKEN_COUNT = select(func.count()).select_from(Token)
+
+
+def parse_scale(value: str) -> int:
+    """10k, 2.5M, 1000000 -> число токенов"""
+    value = value.strip().lower()
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(value[-1:], 1)
+    number = value[:-1] if multiplier > 1 else value
+    return int(float(number) * multiplier)
+
+
+def format_scale(tokens: int) -> str:
+    if tokens >= 1_000_000 and tokens % 100_000 == 0:
+        return f"{tokens / 1_000_000:g}M"
+    if tokens >= 1_000 and tokens % 100 == 0:
+        return f"{tokens / 1_000:g}k"
+    return str(tokens)
+
+
+def build_corpus(path: str, tokens: int, seed: int) -> float:
+    """Синтетический корпус в файле path; возвращает время генерации (0 — взят готовый)."""
+    if os.path.exists(path):
+        return 0.0
+    engine = create_engine(f"sqlite:///{path}")
+    event.listen(engine, "connect", apply_sqlite_pragmas)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    started = time.perf_counter()
+    try:
+        generate_corpus(db, tokens, seed=seed, batch_size=5000)
+    finally:
+        db.close()
+        engine.dispose()
+    return time.perf_counter() - started
+
+
+def search_terms(corpus: SyntheticCorpus) -> Dict[str, str]:
+    """Частое и редкое существительное (в начальной форме форма совпадает с леммой)."""
+    nouns = [lemma for lemma, pos in zip(corpus.lemmas, corpus.lemma_pos) if pos == "NOUN"]
+    return {"frequent": nouns[0], "rare": nouns[min(len(nouns) - 1, 2000)]}
+
+
+def read_paths(controller: TaggingController, terms: Dict[str, str], max_id: int, rnd: random.Random):
+    """Путь чтения -> фабрика корутины (session) -> ответ."""
+    last_page = max(1, max_id // PAGE_SIZE)
+    frequent, rare = terms["frequent"], terms["rare"]
+
+    def random_id() -> int:
+        return rnd.randint(1, max_id)
+
+    cursor_filters = {"search": None, "status": None}
+    return {
+        "list: first page": lambda db: controller.list_sentences(db, 1, PAGE_SIZE, None, None),
+        "list: last page (offset)": lambda db: controller.list_sentences(db, last_page, PAGE_SIZE, None, None),
+        "list: corrected only": lambda db: controller.list_sentences(db, 1, PAGE_SIZE, None, 1),
+        "cursor: deep page": lambda db: controller.list_sentences_by_cursor(
+            db, encode_cursor(max(1, max_id - 2 * PAGE_SIZE), cursor_filters), PAGE_SIZE, None, None, False
+        ),
+        "search: frequent word": lambda db: controller.list_sentences(db, 1, PAGE_SIZE, frequent, None),
+        "search: rare word": lambda db: controller.list_sentences(db, 1, PAGE_SIZE, rare, None),
+        "count: frequent word": lambda db: controller.list_sentences_by_cursor(db, None, 1, frequent, None, True),
+        "kwic: lemma": lambda db: controller.search_tokens(db, None, frequent, None, None, None, 5, None, PAGE_SIZE),
+        "kwic: feats": lambda db: controller.search_tokens(db, None, None, None, None, "Case=Dat", 5, None, PAGE_SIZE),
+        "kwic: pos+feats": lambda db: controller.search_tokens(
+            db, None, None, "VERB", None, "Tense=Fut|Polarity=Neg", 5, None, PAGE_SIZE
+        ),
+        "detail": lambda db: controller.get_sentence_with_tokens(db, random_id()),
+        "multi-get (100)": lambda db: controller.get_sentences_with_tokens(
+            db, [str(random_id()) for _ in range(100)]
+        ),
+    }
+
+
+def measure(path: str, terms: Dict[str, str], repeat: int, seed: int) -> Tuple[int, int, Dict[str, List[float]]]:
+    engine = create_engine(f"sqlite:///{path}")
+    event.listen(engine, "connect", apply_sqlite_pragmas)
+    session_factory = sessionmaker(autoflush=False, bind=engine)
+    controller = TaggingController()
+    try:
+        with session_factory() as db:
+            max_id = db.execute(_MAX_ID).scalar_one()
+            n_tokens = db.execute(_TOKEN_COUNT).scalar_one()
+        paths = read_paths(controller, terms, max_id, random.Random(seed))
+        timings: Dict[str, List[float]] = {}
+        for name, call in paths.items():
+            samples = []
+            for attempt in range(repeat + 1):
+                with session_factory() as db:
+                    started = time.perf_counter()
+                    call(db)
+                    elapsed = time.perf_counter() - started
+                if attempt:  # первый вызов — прогрев кэша страниц
+                    samples.append(elapsed)
+            timings[name] = samples
+        return max_id, n_tokens, timings
+    finally:
+        engine.dispose()
+
+
+def slope(points: List[Tuple[int, float]]) -> float:
+    """Наклон log(время)/log(объём) между первой и последней точкой."""
+    (n0, t0), (n1, t1) = points[0], points[-1]
+    if n1 == n0 or t0 <= 0:
+        return 0.0
+    return math.log(t1 / t0) / math.log(n1 / n0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", default="10k,100k,1M", help="объёмы корпуса в токенах через запятую (10k, 1M, 10M)")
+    parser.add_argument("--repeat", type=int, default=20, help="замеров на путь и точку")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db-dir", help="каталог для корпусов; готовые файлы переиспользуются между запусками")
+    parser.add_argument("--output", help="записать результаты в JSON")
+    parser.add_argument("--max-slope", type=float, help="порог наклона роста; при превышении код выхода 1")
+    args = parser.parse_args()
+
+    scales = sorted(parse_scale(value) for value in args.scales.split(","))
+    tmp = None
+    db_dir = args.db_dir
+    if db_dir is None:
+        tmp = tempfile.TemporaryDirectory()
+        db_dir = tmp.name
+    os.makedirs(db_dir, exist_ok=True)
+    terms = search_terms(SyntheticCorpus(args.seed))
+
+    results: Dict[int, Dict[str, dict]] = {}
+    corpora = []
+    for tokens in scales:
+        path = os.path.join(db_dir, f"synthetic_{tokens}_{args.seed}.db")
+        build_seconds = build_corpus(path, tokens, args.seed)
+        sentences, actual_tokens, timings = measure(path, terms, args.repeat, args.seed)
+        label = "reused" if not build_seconds else f"built in {build_seconds:.1f} s"
+        print(f"{format_scale(tokens):>6}: {sentences} sentences, {actual_tokens} tokens ({label})", file=sys.stderr)
+        corpora.append({"tokens": tokens, "sentences": sentences, "build_seconds": round(build_seconds, 2)})
+        results[tokens] = {
+            name: {
+                "p50_ms": round(statistics.median(samples) * 1000, 3),
+                "max_ms": round(max(samples) * 1000, 3),
+            }
+            for name, samples in timings.items()
+        }
+
+    names = list(results[scales[0]])
+    header = f"{'path':<26}" + "".join(f"{format_scale(tokens):>10}" for tokens in scales) + f"{'slope':>8}"
+    print("\np50, ms (наклон: 0 — не зависит от объёма, 1 — линейный рост)")
+    print(header)
+    print("-" * len(header))
+    report_paths = {}
+    violations = []
+    for name in names:
+        points = [(tokens, results[tokens][name]["p50_ms"]) for tokens in scales]
+        path_slope = slope(points)
+        marker = ""
+        if args.max_slope is not None and len(scales) > 1 and path_slope > args.max_slope:
+            marker = "  !"
+            violations.append(f"{name}: slope {path_slope:.2f} > {args.max_slope}")
+        print(f"{name:<26}" + "".join(f"{ms:>10.2f}" for _, ms in points) + f"{path_slope:>8.2f}{marker}")
+        report_paths[name] = {
+            "slope": round(path_slope, 3),
+            "scales": {str(tokens): results[tokens][name] for tokens in scales},
+        }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"corpora": corpora, "repeat": args.repeat, "paths": report_paths}, f, ensure_ascii=False, indent=2)
+    if tmp is not None:
+        tmp.cleanup()
+    if violations:
+        print("\nРост выше порога:\n  " + "\n  ".join(violations), file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,97 @@
+"""
+Микробенчмарк сериализации ответов: предложение из 200 токенов
+и страница из 100 предложений.
+
+  pydantic + json     — прежний путь: модель из dict, проверка и сериализация
+                        по response_model, json.dumps (JSONResponse)
+  pydantic + orjson   — тот же путь с FastJSONResponse (класс по умолчанию)
+  dict + orjson       — горячие эндпоинты: dict из строк БД сразу в FastJSONResponse
+
+Запуск:
+    python -m benchmarks.bench_serialization --repeat 2000
+"""
+import argparse
+import asyncio
+import timeit
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.domain.tagging_schemas import PaginatedSentencesResponse, SentenceWithTokensResponse
+from app.shared.responses import FastJSONResponse
+
+
+def make_sentence(n_tokens: int) -> dict:
+    return {
+        "id": 1,
+        "text": " ".join(f"сөз{i}" for i in range(n_tokens)),
+        "is_corrected": 0,
+        "tokens": [
+            {
+                "id": i + 1,
+                "token_index": str(i + 1),
+                "form": f"сөз{i}",
+                "lemma": f"сөз{i % 50}",
+                "pos": "NOUN",
+                "xpos": "NOUN",
+                "feats": {"Case": "Nom", "Number": "Sing"} if i % 2 else None,
+            }
+            for i in range(n_tokens)
+        ],
+    }
+
+
+def make_page(n_items: int) -> dict:
+    return {
+        "meta": {"current_page": 1, "page_size": n_items, "total_pages": 10, "total_items": n_items * 10},
+        "items": [
+            {"id": i + 1, "text": f"Сүйлөм {i}: " + "сөз " * 20, "is_corrected": i % 2}
+            for i in range(n_items)
+        ],
+    }
+
+
+def via_response_model(model, response_class):
+    """Путь FastAPI для эндпоинта, возвращающего модель: модель → проверка → dict → байты."""
+    field = create_response_field(name="response", type_=model)
+    loop = asyncio.new_event_loop()
+
+    def run(data):
+        content = loop.run_until_complete(serialize_response(field=field, response_content=model.model_validate(data)))
+        return response_class(content).body
+
+    return run
+
+
+def direct(data):
+    return FastJSONResponse(data).body
+
+
+def measure(fn, data, repeat):
+    return min(timeit.repeat(lambda: fn(data), number=repeat, repeat=3)) / repeat
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    cases = [
+        ("предложение, 200 токенов", SentenceWithTokensResponse, make_sentence(200)),
+        ("страница, 100 предложений", PaginatedSentencesResponse, make_page(100)),
+    ]
+    for label, model, data in cases:
+        print(label)
+        print("=" * 30)
+        baseline = None
+        for name, fn in (
+            ("pydantic + json", via_response_model(model, JSONResponse)),
+            ("pydantic + orjson", via_response_model(model, FastJSONResponse)),
+            ("dict + orjson", direct),
+        ):
+            assert fn(data) and len(fn(data)) > 0
+            elapsed = measure(fn, data, args.repeat)
+            baseline = baseline or elapsed
+            print(f"{name:<20} {elapsed * 1e6:10.1f} us  x{baseline / elapsed:.1f}")
+        print()
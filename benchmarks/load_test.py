@@ -0,0 +1,320 @@
+"""
+Нагрузочный тест: приложение (uvicorn в этом же процессе) на временной БД
+с синтетическим корпусом и локальной заглушкой теггера (benchmarks.stub_tagger).
+
+Клиенты-потоки с keep-alive сессиями повторяют смесь действий:
+аннотаторы — вход, список, поиск, KWIC, предложение, пакет предложений, PATCH;
+админы — постановка текста в теггинг, опрос задачи, пользователи, список.
+Итог по каждому эндпоинту: req/s, доля ошибок, p50/p95/p99 — в таблице и JSON
+(--output). С --thresholds результат сравнивается с порогами, при нарушении
+код выхода 1.
+
+Запуск:
+    python -m benchmarks.load_test --annotators 8 --admins 1 --duration 30 \\
+        --output load.json --thresholds benchmarks/load_thresholds.json
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+# окружение приложения задаётся до его импорта
+_tmp = tempfile.TemporaryDirectory()
+STUB_TAGGER_PORT = free_port()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_tmp.name, 'load.db')}")
+os.environ.setdefault("IMPORT_DIR", os.path.join(_tmp.name, "imports"))
+os.environ["TAGGER_URL"] = f"http://127.0.0.1:{STUB_TAGGER_PORT}/api/tagging"
+
+import requests  # noqa: E402
+import uvicorn  # noqa: E402
+
+from app.database.config import SessionLocal  # noqa: E402
+from app.internal.tagging.service import TaggingService  # noqa: E402
+from app.main import app  # noqa: E402
+from benchmarks.bench_bulk_insert import make_corpus  # noqa: E402
+from benchmarks.stub_tagger import start_stub_tagger  # noqa: E402
+
+ADMIN = {"username": "admin", "password": "admin123"}
+LIST_PAGE_SIZE = 20
+ANNOTATOR_PASSWORD = "annotator123"
+
+# доли действий в смеси
+ANNOTATOR_MIX = {
+    "login": 2,
+    "list": 20,
+    "search": 10,
+    "kwic": 10,
+    "get": 35,
+    "multi": 5,
+    "patch": 18,
+}
+ADMIN_MIX = {
+    "run": 15,
+    "job": 35,
+    "users": 20,
+    "list": 30,
+}
+
+
+def percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def start_server(port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def seed(n_sentences: int) -> None:
+    db = SessionLocal()
+    try:
+        TaggingService(db).bulk_store(make_corpus(n_sentences, 10))
+    finally:
+        db.close()
+
+
+class Recorder:
+    """Задержки и ошибки по эндпоинтам; до конца прогрева ничего не пишется."""
+
+    def __init__(self, record_after: float):
+        self.record_after = record_after
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def add(self, name: str, started: float, ok: bool) -> None:
+        if started < self.record_after:
+            return
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.latencies[name].append(elapsed)
+            if not ok:
+                self.errors[name] += 1
+
+
+class Client:
+    def __init__(self, base_url: str, credentials: dict, mix: Dict[str, int], n_sentences: int, rnd: random.Random):
+        self.base_url = base_url
+        self.credentials = credentials
+        self.names = list(mix)
+        self.weights = list(mix.values())
+        self.n_sentences = n_sentences
+        self.rnd = rnd
+        self.session = requests.Session()
+        self.last_sentence: Optional[dict] = None
+        self.last_job_id: Optional[int] = None
+
+    def request(self, method: str, path: str, **kwargs) -> requests.Response:
+        return self.session.request(method, self.base_url + path, **kwargs)
+
+    def login(self) -> requests.Response:
+        return self.request("POST", "/auth/login", json=self.credentials)
+
+    def sentence_id(self) -> int:
+        return self.rnd.randint(1, self.n_sentences)
+
+    def step(self) -> Tuple[str, requests.Response]:
+        name = self.rnd.choices(self.names, self.weights)[0]
+        return name, getattr(self, f"do_{name}")()
+
+    def do_login(self):
+        return self.login()
+
+    def do_list(self):
+        # первые страницы, но не дальше конца корпуса (иначе 404 считались бы ошибками)
+        last_page = min(50, max(1, self.n_sentences // LIST_PAGE_SIZE))
+        return self.request("GET", "/tagging/sentences", params={"page": self.rnd.randint(1, last_page), "page_size": LIST_PAGE_SIZE})
+
+    def do_search(self):
+        return self.request("GET", "/tagging/sentences", params={"search": f"Сүйлөм {self.sentence_id()}"})
+
+    def do_kwic(self):
+        return self.request("GET", "/tagging/tokens/search", params={"lemma": f"сөз{self.rnd.randint(0, 2000)}", "page_size": 20})
+
+    def do_get(self):
+        response = self.request("GET", f"/tagging/sentences/{self.sentence_id()}")
+        if response.status_code == 200:
+            self.last_sentence = response.json()
+        return response
+
+    def do_multi(self):
+        ids = ",".join(str(self.sentence_id()) for _ in range(20))
+        return self.request("GET", "/tagging/sentences/multi", params={"ids": ids})
+
+    def do_patch(self):
+        sentence = self.last_sentence
+        if not sentence or not sentence["tokens"]:
+            return self.request("PATCH", f"/tagging/sentences/{self.sentence_id()}", json={"is_corrected": 1})
+        token = self.rnd.choice(sentence["tokens"])
+        return self.request("PATCH", f"/tagging/sentences/{sentence['id']}", json={
+            "is_corrected": 1,
+            "tokens": [{"id": token["id"], "lemma": f"түз{self.rnd.randint(0, 999)}"}],
+        })
+
+    def do_run(self):
+        text = " ".join(f"Жаңы сүйлөм {self.rnd.randint(0, 10 ** 9)} китеп окуйт." for _ in range(self.rnd.randint(3, 20)))
+        response = self.request("POST", "/tagging/run", data={"text_form": text}, params={"duplicates": "allow"})
+        if response.status_code == 202:
+            self.last_job_id = response.json()["id"]
+        return response
+
+    def do_job(self):
+        if self.last_job_id is None:
+            return self.do_run()
+        return self.request("GET", f"/tagging/jobs/{self.last_job_id}")
+
+    def do_users(self):
+        return self.request("GET", "/admin/users", params={"page_size": 20})
+
+
+def run_client(client: Client, deadline: float, recorder: Recorder) -> None:
+    client.login().raise_for_status()
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            name, response = client.step()
+            ok = response.status_code < 400
+        except requests.RequestException:
+            name, ok = "connection", False
+        recorder.add(name, started, ok)
+    client.session.close()
+
+
+def summarize(recorder: Recorder, seconds: float) -> Dict[str, dict]:
+    def stats(latencies: List[float], errors: int) -> dict:
+        return {
+            "requests": len(latencies),
+            "errors": errors,
+            "error_rate": round(errors / len(latencies), 4) if latencies else 0.0,
+            "rps": round(len(latencies) / seconds, 2),
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        }
+
+    result = {name: stats(latencies, recorder.errors[name]) for name, latencies in sorted(recorder.latencies.items())}
+    everything = [value for latencies in recorder.latencies.values() for value in latencies]
+    if everything:
+        result["total"] = stats(everything, sum(recorder.errors.values()))
+    return result
+
+
+def check_thresholds(endpoints: Dict[str, dict], thresholds: Dict[str, dict]) -> List[str]:
+    """Нарушения порогов: p50_ms/p95_ms/p99_ms — максимум, min_rps — минимум, max_error_rate — максимум."""
+    violations = []
+    for name, limits in thresholds.items():
+        measured = endpoints.get(name)
+        if measured is None:
+            violations.append(f"{name}: no requests measured")
+            continue
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            if key in limits and measured[key] > limits[key]:
+                violations.append(f"{name}: {key} {measured[key]} > {limits[key]}")
+        if "min_rps" in limits and measured["rps"] < limits["min_rps"]:
+            violations.append(f"{name}: rps {measured['rps']} < {limits['min_rps']}")
+        if "max_error_rate" in limits and measured["error_rate"] > limits["max_error_rate"]:
+            violations.append(f"{name}: error_rate {measured['error_rate']} > {limits['max_error_rate']}")
+    return violations
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sentences", type=int, default=20_000)
+    parser.add_argument("--annotators", type=int, default=8, help="одновременных аннотаторов")
+    parser.add_argument("--admins", type=int, default=1, help="одновременных админов")
+    parser.add_argument("--duration", type=float, default=30, help="секунд замера")
+    parser.add_argument("--warmup", type=float, default=3, help="секунд прогрева (не учитываются)")
+    parser.add_argument("--tagger-latency", type=float, default=50, help="задержка заглушки теггера, мс")
+    parser.add_argument("--tagger-jitter", type=float, default=10, help="разброс задержки теггера ±, мс")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="записать результаты в JSON")
+    parser.add_argument("--thresholds", help="JSON с порогами по эндпоинтам; при нарушении код выхода 1")
+    args = parser.parse_args()
+
+    tagger = start_stub_tagger(STUB_TAGGER_PORT, latency=args.tagger_latency / 1000, jitter=args.tagger_jitter / 1000)
+    seed(args.sentences)
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = start_server(port)
+
+    rnd = random.Random(args.seed)
+    with requests.Session() as admin_session:
+        admin_session.post(f"{base_url}/auth/login", json=ADMIN).raise_for_status()
+        annotators = []
+        for i in range(args.annotators):
+            credentials = {"username": f"annotator{i}", "password": ANNOTATOR_PASSWORD}
+            admin_session.post(f"{base_url}/admin/users", json={**credentials, "role": "annotator"}).raise_for_status()
+            annotators.append(credentials)
+
+    clients = [Client(base_url, credentials, ANNOTATOR_MIX, args.sentences, random.Random(rnd.random())) for credentials in annotators]
+    clients += [Client(base_url, ADMIN, ADMIN_MIX, args.sentences, random.Random(rnd.random())) for _ in range(args.admins)]
+
+    started = time.perf_counter()
+    recorder = Recorder(record_after=started + args.warmup)
+    deadline = started + args.warmup + args.duration
+    threads = [threading.Thread(target=run_client, args=(client, deadline, recorder)) for client in clients]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    measured_seconds = time.perf_counter() - recorder.record_after
+
+    server.should_exit = True
+    tagger.shutdown()
+
+    endpoints = summarize(recorder, measured_seconds)
+    report = {
+        "config": {
+            "sentences": args.sentences,
+            "annotators": args.annotators,
+            "admins": args.admins,
+            "duration_s": round(measured_seconds, 2),
+            "tagger_latency_ms": args.tagger_latency,
+            "tagger_requests": tagger.requests,
+        },
+        "endpoints": endpoints,
+    }
+
+    print(f"Корпус: {args.sentences} предложений, аннотаторов: {args.annotators}, админов: {args.admins}, "
+          f"{measured_seconds:.0f} с, запросов к теггеру: {tagger.requests}")
+    print("=" * 30)
+    print(f"{'эндпоинт':<12} {'запросов':>9} {'req/s':>8} {'ошибок':>7} {'p50, ms':>9} {'p95, ms':>9} {'p99, ms':>9}")
+    for name, row in endpoints.items():
+        print(f"{name:<12} {row['requests']:>9} {row['rps']:>8.1f} {row['errors']:>7} "
+              f"{row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f}")
+
+    exit_code = 0
+    if args.thresholds:
+        with open(args.thresholds, encoding="utf-8") as f:
+            violations = check_thresholds(endpoints, json.load(f))
+        report["violations"] = violations
+        if violations:
+            exit_code = 1
+            print("\nПороги нарушены:")
+            for violation in violations:
+                print(f"  {violation}")
+        else:
+            print("\nПороги соблюдены")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    sys.exit(exit_code)
@@ -0,0 +1,136 @@
+"""
+Локальная заглушка теггера с контрактом TAGGER_URL:
+POST {"text": "..."} -> {"conllu": "..."} с настраиваемой задержкой и долей ошибок.
+
+Разметка детерминированная (POS и признаки — по хэшу слова), предложения
+делятся по .!?, знаки препинания — отдельные токены.
+
+Запуск отдельно (приложение — с TAGGER_URL=http://127.0.0.1:8040/api/tagging):
+    python -m benchmarks.stub_tagger --port 8040 --latency 50 --jitter 20
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Tuple
+
+TAGGER_PATH = "/api/tagging"
+
+_SENTENCE_RE = re.compile(r"[^.!?…]+[.!?…]*")
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+# (UPOS, признаки) — набор, который пропускает валидация feats в TaggingService
+_TAGS = [
+    ("NOUN", "Case=Nom|Number=Sing"),
+    ("NOUN", "Case=Gen|Number=Plur"),
+    ("VERB", "Mood=Ind|Tense=Past|Person=3"),
+    ("VERB", "Mood=Ind|Tense=Pres|Person=1"),
+    ("ADJ", "_"),
+    ("PRON", "Case=Nom|Number=Sing|PronType=Prs"),
+    ("ADV", "_"),
+    ("NUM", "_"),
+]
+
+
+def _tag(word: str) -> Tuple[str, str, str]:
+    if not word[0].isalnum():
+        return word, "PUNCT", "_"
+    digest = hashlib.blake2b(word.lower().encode("utf-8"), digest_size=2).digest()
+    pos, feats = _TAGS[int.from_bytes(digest, "big") % len(_TAGS)]
+    return word.lower(), pos, feats
+
+
+def to_conllu(text: str) -> str:
+    lines = []
+    for sentence in _SENTENCE_RE.findall(text):
+        sentence = " ".join(sentence.split())
+        tokens = _TOKEN_RE.findall(sentence)
+        if not tokens:
+            continue
+        lines.append(f"# text = {sentence}")
+        for index, form in enumerate(tokens, start=1):
+            lemma, pos, feats = _tag(form)
+            lines.append(f"{index}\t{form}\t{lemma}\t{pos}\t{pos}\t{feats}\t_\t_\t_\t_")
+        lines.append("")
+    return "\n".join(lines) + "\n"
+
+
+class StubTaggerServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency: float = 0.05, jitter: float = 0.0, error_rate: float = 0.0):
+        super().__init__(address, _Handler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}{TAGGER_PATH}"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, как у настоящего теггера за пулом соединений
+
+    def do_POST(self):
+        server: StubTaggerServer = self.server
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with server._lock:
+            server.requests += 1
+        if self.path != TAGGER_PATH:
+            return self._reply(404, {"detail": "Not Found"})
+
+        time.sleep(max(0.0, server.latency + random.uniform(-server.jitter, server.jitter)))
+        if server.error_rate and random.random() < server.error_rate:
+            return self._reply(503, {"detail": "stub tagger: injected error"})
+        try:
+            text = json.loads(body)["text"]
+        except (ValueError, KeyError, TypeError):
+            return self._reply(422, {"detail": "expected {\"text\": ...}"})
+        self._reply(200, {"conllu": to_conllu(text)})
+
+    def _reply(self, status: int, payload: dict) -> None:
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_tagger(port: int = 0, latency: float = 0.05, jitter: float = 0.0, error_rate: float = 0.0) -> StubTaggerServer:
+    """Запускает заглушку в фоновом потоке; адрес — server.url, остановка — server.shutdown()."""
+    server = StubTaggerServer(("127.0.0.1", port), latency=latency, jitter=jitter, error_rate=error_rate)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8040)
+    parser.add_argument("--latency", type=float, default=50, help="задержка ответа, мс")
+    parser.add_argument("--jitter", type=float, default=0, help="разброс задержки ±, мс")
+    parser.add_argument("--error-rate", type=float, default=0, help="доля ответов 503")
+    args = parser.parse_args()
+
+    server = StubTaggerServer(
+        ("127.0.0.1", args.port),
+        latency=args.latency / 1000,
+        jitter=args.jitter / 1000,
+        error_rate=args.error_rate,
+    )
+    print(f"Stub tagger: {server.url} (latency {args.latency:.0f}±{args.jitter:.0f} ms, errors {args.error_rate:.0%})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
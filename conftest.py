@@ -0,0 +1,74 @@
+"""
+Общие настройки pytest: временная БД и быстрый bcrypt задаются до импорта приложения.
+
+    python -m pytest
+"""
+import os
+import tempfile
+
+import pytest
+
+_tmp = tempfile.TemporaryDirectory(prefix="backend-tests-")
+# всегда своя БД: тесты пишут и удаляют данные
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp.name, 'test.db')}"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+os.environ["IMPORT_DIR"] = os.path.join(_tmp.name, "imports")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("TAGGING_WORKERS", "1")
+
+# test_api.py — ручной скрипт против запущенного сервера, не тесты pytest
+collect_ignore = ["test_api.py"]
+
+ADMIN = {"username": "admin", "password": "admin123"}
+
+
+@pytest.fixture(scope="session")
+def client():
+    """TestClient приложения (со startup: таблицы, admin, воркеры задач)."""
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def admin_client(client):
+    response = client.post("/auth/login", json=ADMIN)
+    assert response.status_code == 200, response.text
+    return client
+
+
+@pytest.fixture
+def db():
+    from app.database.config import SessionLocal, engine
+    from app.database.models import Base
+
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.close()
+
+
+def store_sentences(db, sentences):
+    """Записывает [(text, tokens)] через bulk_store и возвращает id новых предложений."""
+    from sqlalchemy import func, select
+
+    from app.database.models import Sentence
+    from app.internal.tagging.dedup import DUPLICATES_ALLOW
+    from app.internal.tagging.service import TaggingService
+
+    before = db.execute(select(func.coalesce(func.max(Sentence.id), 0))).scalar()
+    TaggingService(db, duplicates=DUPLICATES_ALLOW).bulk_store(sentences)
+    return db.execute(select(Sentence.id).where(Sentence.id > before).order_by(Sentence.id)).scalars().all()
+
+
+def make_tokens(*words, pos="NOUN", feats=None):
+    return [
+        {'token_index': str(i), 'form': word, 'lemma': word.lower(), 'pos': pos, 'xpos': pos, 'feats': feats}
+        for i, word in enumerate(words, start=1)
+    ]
@@ -0,0 +1,78 @@
+"""Кэш авторизации: изменения пользователя видны после invalidate_user."""
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+
+from app.database.models import User
+from app.main import app
+from app.shared.dependencies import auth_cache, get_password_hash, invalidate_user
+
+
+@pytest.fixture
+def user_client(admin_client):
+    """Отдельный клиент (свои cookie) обычного пользователя и его токен."""
+    credentials = {"username": "cache-user", "password": "secret-1"}
+    response = admin_client.post("/admin/users", json={**credentials, "role": "user"})
+    assert response.status_code == 200, response.text
+    user_id = response.json()["id"]
+
+    client = TestClient(app)
+    response = client.post("/auth/login", json=credentials)
+    assert response.status_code == 200, response.text
+    yield client, response.json()["access_token"]
+    admin_client.delete(f"/admin/users/{user_id}")
+
+
+def set_user(db, **values):
+    db.execute(update(User).where(User.username == "cache-user").values(**values))
+    db.commit()
+
+
+def test_role_change_is_visible_after_invalidate(user_client, db):
+    client, token = user_client
+    assert client.get("/auth/me").json()["role"] == "user"
+    assert auth_cache.get(token).role == "user"
+    assert client.get("/admin/auth-cache").status_code == 403
+
+    set_user(db, role="admin")
+    # без сброса кэш отдаёт прежнюю роль до истечения TTL
+    assert client.get("/auth/me").json()["role"] == "user"
+
+    assert invalidate_user("cache-user") == 1
+    assert auth_cache.get(token) is None
+    assert client.get("/auth/me").json()["role"] == "admin"
+    assert client.get("/admin/auth-cache").status_code == 200
+
+
+def test_password_change_evicts_cached_token(user_client, db):
+    client, token = user_client
+    assert client.get("/auth/me").status_code == 200
+    assert auth_cache.get(token) is not None
+
+    set_user(db, password=get_password_hash("secret-2"))
+    assert invalidate_user("cache-user") == 1
+    assert auth_cache.get(token) is None
+    assert invalidate_user("cache-user") == 0
+
+    assert client.post("/auth/login", json={"username": "cache-user", "password": "secret-1"}).status_code == 401
+    assert client.post("/auth/login", json={"username": "cache-user", "password": "secret-2"}).status_code == 200
+
+
+def test_invalidate_only_touches_that_user(user_client, admin_client):
+    client, token = user_client
+    client.get("/auth/me")
+    admin_client.get("/auth/me")
+    size = auth_cache.stats()["size"]
+
+    assert invalidate_user("cache-user") == 1
+    assert auth_cache.stats()["size"] == size - 1
+    assert admin_client.get("/auth/me").json()["username"] == "admin"
+
+
+def test_deleted_user_loses_access(user_client, admin_client):
+    client, _ = user_client
+    assert client.get("/auth/me").status_code == 200
+    user_id = client.get("/auth/me").json()["id"]
+
+    assert admin_client.delete(f"/admin/users/{user_id}").status_code == 200
+    assert client.get("/auth/me").status_code == 401
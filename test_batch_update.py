@@ -0,0 +1,83 @@
+"""PATCH /tagging/sentences: элементы с разными наборами полей в одной пачке."""
+from sqlalchemy import select
+
+from app.database.models import Sentence
+from app.internal.tagging import counters, dedup
+from conftest import make_tokens, store_sentences
+
+
+def load(client, ids):
+    response = client.get("/tagging/sentences/multi", params={"ids": ",".join(map(str, ids))})
+    assert response.status_code == 200, response.text
+    return {item["id"]: item for item in response.json()["items"]}
+
+
+def test_batch_patch_with_mixed_column_sets(admin_client, db):
+    ids = store_sentences(db, [
+        (f"Бала {i} китеп окуйт.", make_tokens("Бала", str(i), "китеп", "окуйт", ".", feats={"Case": "Nom"}))
+        for i in range(5)
+    ])
+    before = load(admin_client, ids)
+    tokens = {sentence_id: [t["id"] for t in before[sentence_id]["tokens"]] for sentence_id in ids}
+    corrected_before = counters.sentence_total(db, 1)
+
+    items = [
+        {"id": ids[0], "sentence_text": "Бала китеп окуду."},
+        {"id": ids[1], "is_corrected": 1},
+        {"id": ids[2], "tokens": [
+            {"id": tokens[ids[2]][0], "form": "Балдар"},
+            {"id": tokens[ids[2]][2], "lemma": "китепкана", "pos": "PROPN"},
+            {"id": tokens[ids[2]][3], "feats": {"Tense": "Past", "Person": "3"}},
+        ]},
+        {"id": ids[3], "sentence_text": "Кыз окуду.", "is_corrected": 1, "tokens": [
+            {"id": tokens[ids[3]][0], "token_index": "1", "form": "Кыз", "lemma": "кыз", "pos": "NOUN",
+             "xpos": "NOUN", "feats": {"Case": "Nom", "Number": "Sing"}},
+            {"id": tokens[ids[3]][3], "form": "окуду", "feats": {"Tense": "Past"}},
+        ]},
+        {"id": 10 ** 9, "is_corrected": 1},
+        {"id": ids[4], "tokens": [{"id": tokens[ids[0]][0], "form": "чужой"}]},
+    ]
+    response = admin_client.patch("/tagging/sentences", json={"items": items})
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert (result["updated"], result["failed"]) == (4, 2)
+    assert [item["status"] for item in result["items"]] == ["updated"] * 4 + ["not_found", "invalid"]
+    assert [item["tokens_updated"] for item in result["items"][:4]] == [0, 0, 3, 2]
+
+    after = load(admin_client, ids)
+    db.expire_all()
+    hashes = dict(db.execute(select(Sentence.id, Sentence.content_hash).where(Sentence.id.in_(ids))).all())
+
+    # только текст
+    assert after[ids[0]]["text"] == "Бала китеп окуду."
+    assert after[ids[0]]["is_corrected"] == before[ids[0]]["is_corrected"]
+    assert hashes[ids[0]] == dedup.sentence_hash("Бала китеп окуду.")
+    assert after[ids[0]]["tokens"] == before[ids[0]]["tokens"]
+
+    # только статус
+    assert after[ids[1]]["is_corrected"] == 1
+    assert after[ids[1]]["text"] == before[ids[1]]["text"]
+    assert hashes[ids[1]] == dedup.sentence_hash(before[ids[1]]["text"])
+
+    # только токены, у каждого свой набор полей; остальные поля и токены не меняются
+    expected = [dict(t) for t in before[ids[2]]["tokens"]]
+    expected[0]["form"] = "Балдар"
+    expected[2].update(lemma="китепкана", pos="PROPN")
+    expected[3]["feats"] = {"Tense": "Past", "Person": "3"}
+    assert after[ids[2]]["tokens"] == expected
+    assert after[ids[2]]["text"] == before[ids[2]]["text"]
+    assert after[ids[2]]["is_corrected"] == before[ids[2]]["is_corrected"]
+
+    # всё сразу
+    assert after[ids[3]]["text"] == "Кыз окуду." and after[ids[3]]["is_corrected"] == 1
+    expected = [dict(t) for t in before[ids[3]]["tokens"]]
+    expected[0].update(token_index="1", form="Кыз", lemma="кыз", pos="NOUN", xpos="NOUN",
+                       feats={"Case": "Nom", "Number": "Sing"})
+    expected[3].update(form="окуду", feats={"Tense": "Past"})
+    assert after[ids[3]]["tokens"] == expected
+
+    # ошибочный элемент ничего не меняет, в том числе чужой токен
+    assert after[ids[4]] == before[ids[4]]
+    assert after[ids[0]]["tokens"][0]["form"] == "Бала"
+
+    assert counters.sentence_total(db, 1) == corrected_before + 2
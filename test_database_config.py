@@ -0,0 +1,20 @@
+"""Вывод async-URL из DATABASE_URL: известные драйверы и понятная ошибка для остальных."""
+import pytest
+
+from app.database.config import _async_url
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("sqlite:///./app.db", "sqlite+aiosqlite:///./app.db"),
+    ("postgresql://u:p@db:5432/corpus", "postgresql+asyncpg://u:p@db:5432/corpus"),
+    ("postgresql+psycopg2://u:p@db/corpus", "postgresql+asyncpg://u:p@db/corpus"),
+    ("mysql+pymysql://u:p@db/corpus?charset=utf8mb4", "mysql+aiomysql://u:p@db/corpus?charset=utf8mb4"),
+    ("postgresql+asyncpg://u:p@db/corpus", "postgresql+asyncpg://u:p@db/corpus"),
+])
+def test_async_url_maps_driver(url, expected):
+    assert _async_url(url) == expected
+
+
+def test_async_url_rejects_unknown_driver():
+    with pytest.raises(ValueError, match="ASYNC_DATABASE_URL"):
+        _async_url("mssql+pyodbc://u:p@db/corpus")
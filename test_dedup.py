@@ -0,0 +1,80 @@
+"""Дубликаты предложений: режимы записи bulk_store и разовая чистка dedup_existing."""
+from sqlalchemy import func, select, update
+
+from app.database.models import Sentence, Token
+from app.internal.tagging import dedup
+from app.internal.tagging.service import TaggingService
+from conftest import make_tokens, store_sentences
+
+
+def ingest(db, mode, sentences):
+    service = TaggingService(db, duplicates=mode)
+    service.bulk_store(sentences)
+    return service
+
+
+def rows(db, text):
+    """(id, is_corrected, occurrences, число токенов) предложений с текстом text."""
+    token_count = select(func.count()).where(Token.sentence_id == Sentence.id).scalar_subquery()
+    return db.execute(
+        select(Sentence.id, Sentence.is_corrected, Sentence.occurrences, token_count)
+        .where(Sentence.text == text)
+        .order_by(Sentence.id)
+    ).all()
+
+
+def test_sentence_hash_ignores_spacing():
+    assert dedup.sentence_hash("Мен  келдим.\n") == dedup.sentence_hash("Мен келдим.")
+    assert dedup.sentence_hash("Мен келдим.") != dedup.sentence_hash("Сен келдиң.")
+
+
+def test_skip_mode(db):
+    text = "Skip режими текшерилет."
+    service = ingest(db, dedup.DUPLICATES_SKIP, [(text, make_tokens("Skip", "режими", "текшерилет", "."))] * 2)
+    assert (service.sentences_stored, service.sentences_skipped) == (1, 1)
+
+    service = ingest(db, dedup.DUPLICATES_SKIP, [(text, make_tokens("Skip", "."))])
+    assert (service.sentences_stored, service.tokens_stored, service.sentences_skipped) == (0, 0, 1)
+    [(_, _, occurrences, tokens)] = rows(db, text)
+    assert (occurrences, tokens) == (1, 4)
+
+
+def test_link_mode_counts_occurrences(db):
+    text = "Link режими текшерилет."
+    sentence = (text, make_tokens("Link", "режими", "текшерилет", "."))
+    ingest(db, dedup.DUPLICATES_LINK, [sentence] * 3)
+    service = ingest(db, dedup.DUPLICATES_LINK, [sentence] * 2)
+    assert (service.sentences_stored, service.sentences_skipped) == (0, 2)
+    [(_, _, occurrences, _)] = rows(db, text)
+    assert occurrences == 5
+
+
+def test_replace_mode_keeps_corrected_sentences(db):
+    text, corrected_text = "Replace режими текшерилет.", "Replace оңдолгон сүйлөм."
+    ingest(db, dedup.DUPLICATES_REPLACE, [(text, make_tokens("Replace", ".")), (corrected_text, make_tokens("Replace", "."))])
+    [(corrected_id, _, _, _)] = rows(db, corrected_text)
+    db.execute(update(Sentence).where(Sentence.id == corrected_id).values(is_corrected=1))
+    db.commit()
+
+    service = ingest(db, dedup.DUPLICATES_REPLACE, [
+        (text, make_tokens("Replace", "режими", "текшерилет", ".")),
+        (corrected_text, make_tokens("Replace", "оңдолгон", "сүйлөм", ".")),
+    ])
+    assert (service.sentences_stored, service.sentences_replaced, service.sentences_skipped) == (0, 1, 1)
+    assert [tokens for *_, tokens in rows(db, text)] == [4]  # разметка заменена
+    assert [tokens for *_, tokens in rows(db, corrected_text)] == [2]  # исправленное не тронуто
+
+
+def test_dedup_existing_merges_copies(db):
+    text, other = "Эски дубликат тазаланат.", "Эски дубликат калат."
+    ids = store_sentences(db, [(text, make_tokens("Эски", "дубликат", "тазаланат", "."))] * 3 + [(other, make_tokens("Эски", "."))])
+    db.execute(update(Sentence).where(Sentence.id == ids[1]).values(is_corrected=1))
+    db.commit()
+
+    result = dedup.dedup_existing(db, batch_size=1)
+    assert result["sentences_removed"] >= 2 and result["tokens_removed"] >= 8
+
+    # остаётся исправленная копия, occurrences удалённых переносятся на неё
+    assert rows(db, text) == [(ids[1], 1, 3, 4)]
+    assert rows(db, other) == [(ids[3], 0, 1, 2)]
+    assert dedup.existing_sentences(db, [dedup.sentence_hash(text)]) == {dedup.sentence_hash(text): (ids[1], 1)}
@@ -0,0 +1,76 @@
+"""Экспорт CoNLL-U: разбор -> запись -> экспорт -> разбор даёт те же данные."""
+import io
+
+from sqlalchemy import insert
+
+from app.database.models import Token
+from app.internal.tagging.export import export_query, stream_conllu
+from app.internal.tagging.service import TaggingService
+from conftest import make_tokens, store_sentences
+
+SOURCE = """# text = Мен китеп окуйм, сен барасыңбы?
+1\tМен\tмен\tPRON\tPRON\tCase=Nom|Number=Sing|PronType=Prs\t_\t_\t_\t_
+2\tкитеп\tкитеп\tNOUN\tNOUN\tCase=Nom|Number=Sing\t_\t_\t_\t_
+3\tокуйм\tоку\tVERB\tVERB\tPerson=1|Tense=Pres\t_\t_\t_\tSpaceAfter=No
+4\t,\t,\tPUNCT\tPUNCT\t_\t_\t_\t_\t_
+5\tсен\tсен\tPRON\tPRON\tCase=Nom|Number=Sing|PronType=Prs\t_\t_\t_\t_
+6\tбарасыңбы\tбар\tVERB\tVERB\tPerson=2|Tense=Pres\t_\t_\t_\tSpaceAfter=No
+7\t?\t?\tPUNCT\tPUNCT\t_\t_\t_\t_\t_
+
+# text = "Салам", деди ал.
+1\t"\t"\tPUNCT\tPUNCT\t_\t_\t_\t_\tSpaceAfter=No
+2\tСалам\tсалам\tINTJ\tINTJ\t_\t_\t_\t_\tSpaceAfter=No
+3\t"\t"\tPUNCT\tPUNCT\t_\t_\t_\t_\tSpaceAfter=No
+4\t,\t,\tPUNCT\tPUNCT\t_\t_\t_\t_\t_
+5\tдеди\tде\tVERB\tVERB\tTense=Past\t_\t_\t_\t_
+6\tал\tал\tPRON\tPRON\tCase=Nom|PronType=Prs\t_\t_\t_\tSpaceAfter=No
+7\t.\t.\tPUNCT\tPUNCT\t_\t_\t_\t_\t_
+
+"""
+
+
+def parse(service, text):
+    return list(service._iter_conllu(io.StringIO(text)))
+
+
+def export(first_id, last_id):
+    return b"".join(stream_conllu(export_query(id_from=first_id, id_to=last_id))).decode("utf-8")
+
+
+def token_lines(conllu):
+    return [line.split("\t") for line in conllu.splitlines() if line and not line.startswith("#")]
+
+
+def test_round_trip_keeps_text_tokens_and_space_after(db):
+    service = TaggingService(db)
+    parsed = parse(service, SOURCE)
+    ids = store_sentences(db, parsed)
+
+    exported = export(ids[0], ids[-1])
+
+    assert parse(service, exported) == parsed
+    # MISC совпадает с исходным, в том числе SpaceAfter=No
+    assert [line[9] for line in token_lines(exported)] == [line[9] for line in token_lines(SOURCE)]
+    # без "# text =" текст восстанавливается по SpaceAfter так же
+    without_text = "\n".join(line for line in exported.splitlines() if not line.startswith("# text")) + "\n"
+    assert [text for text, _ in parse(service, without_text)] == [text for text, _ in parsed]
+
+
+def test_null_form_is_exported_as_underscore(db):
+    [sentence_id] = store_sentences(db, [("Бир эки.", make_tokens("Бир"))])
+    db.execute(insert(Token.__table__), [
+        {"sentence_id": sentence_id, "token_index": "2", "form": None, "lemma": "эки", "pos": "NUM", "xpos": "NUM"},
+    ])
+    db.commit()
+
+    lines = token_lines(export(sentence_id, sentence_id))
+
+    assert [line[0] for line in lines] == ["1", "2"]
+    assert lines[1][1] == "_" and lines[1][2] == "эки"
+    assert all(len(line) == 10 for line in lines)
+
+
+def test_sentence_without_tokens(db):
+    [sentence_id] = store_sentences(db, [("Бош.", [])])
+    exported = export(sentence_id, sentence_id)
+    assert exported == f"# sent_id = {sentence_id}\n# text = Бош.\n\n"
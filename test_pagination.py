@@ -0,0 +1,54 @@
+"""Курсорная (keyset) пагинация: курсор привязан к фильтрам, с которыми получен."""
+import pytest
+from fastapi import HTTPException
+
+from app.shared.pagination import decode_cursor, encode_cursor
+from conftest import make_tokens, store_sentences
+
+
+def test_cursor_round_trip_and_filter_mismatch():
+    filters = {"search": "китеп", "status": 1}
+    cursor = encode_cursor(42, filters)
+    assert decode_cursor(cursor, dict(reversed(filters.items()))) == 42  # порядок ключей не важен
+    assert decode_cursor(None, filters) is None
+    assert decode_cursor("", filters) is None
+
+    with pytest.raises(HTTPException) as info:
+        decode_cursor(cursor, {"search": "китеп", "status": 0})
+    assert info.value.status_code == 400
+    assert "filters" in info.value.detail
+
+    with pytest.raises(HTTPException) as info:
+        decode_cursor("not-a-cursor", filters)
+    assert info.value.detail == "Invalid cursor"
+
+
+def test_sentence_cursor_reused_with_other_filters_is_rejected(admin_client, db):
+    ids = store_sentences(db, [(f"Барак {i}.", make_tokens("Барак", str(i), ".")) for i in range(5)])
+
+    first = admin_client.get("/tagging/sentences", params={"cursor": "", "page_size": 2, "search": "барак"})
+    assert first.status_code == 200, first.text
+    page = first.json()
+    assert [item["id"] for item in page["items"]] == ids[:2]
+    cursor = page["meta"]["next_cursor"]
+
+    second = admin_client.get("/tagging/sentences", params={"cursor": cursor, "page_size": 2, "search": "барак"})
+    assert [item["id"] for item in second.json()["items"]] == ids[2:4]
+
+    for other in ({"search": "китеп"}, {"search": "барак", "status": 0}, {}):
+        response = admin_client.get("/tagging/sentences", params={"cursor": cursor, "page_size": 2, **other})
+        assert response.status_code == 400, other
+        assert response.json()["detail"] == "Cursor does not match current filters"
+
+
+def test_kwic_cursor_reused_with_other_filters_is_rejected(admin_client, db):
+    store_sentences(db, [(f"Курсор {i}.", make_tokens("Курсор", str(i), ".")) for i in range(3)])
+
+    first = admin_client.get("/tagging/tokens/search", params={"lemma": "курсор", "page_size": 1})
+    assert first.status_code == 200, first.text
+    cursor = first.json()["meta"]["next_cursor"]
+    assert cursor
+
+    response = admin_client.get("/tagging/tokens/search", params={"lemma": "курсор", "pos": "VERB", "cursor": cursor})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Cursor does not match current filters"
@@ -0,0 +1,83 @@
+"""Профилировщик SQL: формы запросов, N+1 и бюджеты запросов основных путей чтения."""
+import pytest
+from sqlalchemy import select
+
+from app.database.models import Sentence
+from app.shared.profiling import QueryBudget, QueryBudgetExceeded, QueryProfile, statement_shape
+from conftest import make_tokens, store_sentences
+
+
+def test_statement_shape_collapses_values():
+    assert statement_shape("SELECT *\n  FROM tokens\tWHERE id IN (?, ?,?)  LIMIT 20") == \
+        "SELECT * FROM tokens WHERE id IN (?) LIMIT ?"
+    assert statement_shape("SELECT * FROM tokens WHERE id IN (?)") == statement_shape("SELECT * FROM tokens WHERE id IN ( ?,\n ? )")
+    # числа внутри имён не трогаются
+    assert statement_shape("SELECT count_1 FROM t2 WHERE x = 15") == "SELECT count_1 FROM t2 WHERE x = ?"
+
+
+def test_n_plus_one_counts_repeated_shapes():
+    profile = QueryProfile("test")
+    profile.statements = [("SELECT * FROM sentences LIMIT 20", 0.001, False)]
+    profile.statements += [(f"SELECT * FROM tokens WHERE sentence_id = {i}", 0.001, False) for i in range(4)]
+    profile.statements += [("SELECT * FROM users WHERE id IN (?, ?)", 0.001, False)] * 2
+
+    assert profile.n_plus_one() == {"SELECT * FROM tokens WHERE sentence_id = ?": 4}
+    assert profile.n_plus_one(threshold=2) == {
+        "SELECT * FROM tokens WHERE sentence_id = ?": 4,
+        "SELECT * FROM users WHERE id IN (?)": 2,
+    }
+    assert profile.n_plus_one(threshold=5) == {}
+
+
+def test_budget_catches_n_plus_one_in_block(db):
+    store_sentences(db, [("Бир.", make_tokens("Бир", "."))])
+    with pytest.raises(QueryBudgetExceeded, match="N\\+1"):
+        with QueryBudget(max_queries=10):
+            for sentence_id in range(1, 4):
+                db.execute(select(Sentence.text).where(Sentence.id == sentence_id)).all()
+    with pytest.raises(QueryBudgetExceeded, match="4 queries > 3"):
+        with QueryBudget(max_queries=3, allow_n_plus_one=True):
+            for sentence_id in range(1, 5):
+                db.execute(select(Sentence.text).where(Sentence.id == sentence_id)).all()
+
+
+@pytest.fixture
+def corpus(admin_client, db):
+    ids = store_sentences(db, [
+        (f"Мен китеп окуйм {i}.", make_tokens("Мен", "китеп", "окуйм", str(i), ".", feats={"Case": "Nom"}))
+        for i in range(30)
+    ])
+    admin_client.get("/auth/me")  # пользователь в кэше авторизации: бюджет считает только сам путь
+    return ids
+
+
+def get_within_budget(client, url, max_queries):
+    with QueryBudget(max_queries=max_queries) as budget:
+        response = client.get(url)
+    assert response.status_code == 200, response.text
+    assert [profile.count for profile in budget.profiles if profile.label.startswith("GET")], "request was not profiled"
+    return response
+
+
+def test_sentence_detail_budget(admin_client, corpus):
+    response = get_within_budget(admin_client, f"/tagging/sentences/{corpus[0]}", max_queries=1)
+    assert len(response.json()["tokens"]) == 5
+
+
+def test_sentence_list_budget(admin_client, corpus):
+    # счётчик корпуса + страница; токены в списке не загружаются
+    get_within_budget(admin_client, "/tagging/sentences?page=1&page_size=20", max_queries=2)
+    get_within_budget(admin_client, "/tagging/sentences?page=1&page_size=20&search=китеп", max_queries=2)
+    get_within_budget(admin_client, "/tagging/sentences?cursor=&page_size=20", max_queries=1)
+
+
+def test_kwic_search_budget(admin_client, corpus):
+    # совпадения + контекст всех совпадений одним запросом, независимо от page_size
+    response = get_within_budget(admin_client, "/tagging/tokens/search?lemma=китеп&page_size=20", max_queries=2)
+    assert len(response.json()["items"]) == 20
+
+
+def test_export_budget(admin_client, corpus):
+    # потоковая выгрузка — один запрос через серверный курсор
+    response = get_within_budget(admin_client, f"/tagging/export?id_from={corpus[0]}&id_to={corpus[-1]}", max_queries=1)
+    assert response.text.count("# sent_id") == len(corpus)
@@ -0,0 +1,47 @@
+"""Кэш теггера: попадания, промахи и сэкономленные байты видны в /metrics."""
+import re
+
+from app.internal.tagging import tagger_cache
+
+CONLLU = "1\tСалам\tсалам\tINTJ\tINTJ\t_\t_\t_\t_\t_\n\n"
+
+
+def metric(client, name):
+    match = re.search(rf"^{name} (\S+)$", client.get("/metrics").text, re.M)
+    return float(match.group(1)) if match else 0.0
+
+
+def test_hits_misses_and_bytes_saved_are_exported(client, db):
+    names = ("tagger_cache_hits_total", "tagger_cache_misses_total", "tagger_cache_bytes_saved_total")
+    before = {name: metric(client, name) for name in names}
+    segment = "Салам  метрикалар."
+    key = tagger_cache.cache_key(tagger_cache.normalize_segment(segment))
+
+    assert tagger_cache.get(db, key, segment) is None  # промах считается при записи ответа теггера
+    tagger_cache.put(db, key, CONLLU)
+    db.commit()
+    for _ in range(2):
+        assert tagger_cache.get(db, key, segment) == CONLLU
+
+    saved = 2 * (len(segment.encode("utf-8")) + len(CONLLU.encode("utf-8")))
+    assert {name: metric(client, name) - before[name] for name in names} == {
+        "tagger_cache_hits_total": 2,
+        "tagger_cache_misses_total": 1,
+        "tagger_cache_bytes_saved_total": saved,
+    }
+
+    stats = tagger_cache.stats(db)
+    assert stats["hits"] == metric(client, "tagger_cache_hits_total")
+    assert stats["misses"] == metric(client, "tagger_cache_misses_total")
+
+
+def test_evictions_are_exported(client, db):
+    before = metric(client, "tagger_cache_evictions_total")
+    for i in range(3):
+        tagger_cache.put(db, tagger_cache.cache_key(f"вытеснение {i}"), CONLLU)
+    db.commit()
+
+    evicted = tagger_cache.evict(db, max_bytes=len(CONLLU.encode("utf-8")))
+    db.commit()
+    assert evicted >= 2
+    assert metric(client, "tagger_cache_evictions_total") - before == evicted
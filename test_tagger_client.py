@@ -0,0 +1,223 @@
+"""
+Тесты TaggerClient на локальном поддельном теггере.
+
+    python -m pytest test_tagger_client.py
+"""
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.internal.tagging.tagger_client import (
+    CLOSED, HALF_OPEN, OPEN, CircuitBreaker, TaggerClient, TaggerError, TaggerUnavailable,
+)
+from app.shared.metrics import TAGGER_ERRORS, TAGGER_RETRIES
+
+CONLLU = "# text = Салам.\n1\tСалам\tсалам\tINTJ\tINTJ\t_\t_\t_\t_\t_\n2\t.\t.\tPUNCT\tPUNCT\t_\t_\t_\t_\t_\n\n"
+
+
+class FakeTagger(ThreadingHTTPServer):
+    """Отвечает по сценарию: список (статус, задержка в секундах), дальше — 200."""
+    daemon_threads = True
+
+    def __init__(self, script=()):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.script = list(script)
+        self.requests = 0
+        self.connections = set()
+        self._lock = threading.Lock()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/api/tagging"
+
+    def next_step(self, client_address):
+        with self._lock:
+            self.requests += 1
+            self.connections.add(client_address)
+            return self.script.pop(0) if self.script else (200, 0)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        status, delay = self.server.next_step(self.client_address)
+        time.sleep(delay)
+        if status == 200:
+            payload = {"conllu": CONLLU if body["text"] else ""}
+        elif status == "garbage":
+            status, payload = 200, None
+        else:
+            payload = {"detail": "fake error"}
+        data = b"not json" if payload is None else json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def fake_tagger():
+    servers = []
+
+    def start(*script):
+        server = FakeTagger(script)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def make_client(url, sleeps=None, **kwargs):
+    kwargs.setdefault("retries", 3)
+    kwargs.setdefault("breaker", CircuitBreaker(failure_threshold=5, reset_seconds=60))
+    return TaggerClient(url, connect_timeout=1, sleep=(sleeps.append if sleeps is not None else lambda _: None), **kwargs)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_tag_returns_conllu_and_reuses_connection(fake_tagger):
+    server = fake_tagger()
+    client = make_client(server.url)
+    for _ in range(5):
+        assert client.tag("Салам.") == CONLLU
+    assert server.requests == 5
+    assert len(server.connections) == 1  # keep-alive: одно соединение на все запросы
+
+
+def test_retries_transient_errors_with_backoff(fake_tagger):
+    server = fake_tagger((503, 0), (502, 0))
+    sleeps = []
+    retries_before = TAGGER_RETRIES.value()
+    client = make_client(server.url, sleeps=sleeps, backoff_base=0.5, backoff_max=10)
+
+    assert client.tag("Салам.") == CONLLU
+    assert server.requests == 3
+    assert len(sleeps) == 2
+    assert 0 <= sleeps[0] <= 0.5 and 0 <= sleeps[1] <= 1.0
+    assert TAGGER_RETRIES.value() - retries_before == 2
+    assert client.breaker.state == CLOSED
+
+
+def test_gives_up_after_max_retries(fake_tagger):
+    server = fake_tagger(*[(503, 0)] * 10)
+    client = make_client(server.url, retries=2)
+    with pytest.raises(TaggerError) as info:
+        client.tag("Салам.")
+    assert info.value.reason == "http_status"
+    assert server.requests == 3
+
+
+def test_client_errors_and_server_errors_are_not_retried(fake_tagger):
+    server = fake_tagger((400, 0), (500, 0))
+    client = make_client(server.url)
+    with pytest.raises(TaggerError):
+        client.tag("Салам.")
+    with pytest.raises(TaggerError):
+        client.tag("Салам.")
+    assert server.requests == 2
+
+
+def test_invalid_response(fake_tagger):
+    server = fake_tagger(("garbage", 0))
+    errors_before = TAGGER_ERRORS.value(("invalid_response",))
+    with pytest.raises(TaggerError) as info:
+        make_client(server.url).tag("Салам.")
+    assert info.value.reason == "invalid_response"
+    assert TAGGER_ERRORS.value(("invalid_response",)) - errors_before == 1
+
+
+def test_read_timeout_is_not_retried(fake_tagger):
+    server = fake_tagger((200, 1.0))
+    client = make_client(server.url, read_timeout=0.2)
+    with pytest.raises(TaggerError) as info:
+        client.tag("Салам.")
+    assert info.value.reason == "timeout"
+    assert server.requests == 1
+
+
+def test_call_recovering_after_retries_is_not_a_breaker_failure(fake_tagger):
+    server = fake_tagger((503, 0), (503, 0), (503, 0))
+    client = make_client(server.url, retries=3, breaker=CircuitBreaker(failure_threshold=2, reset_seconds=60))
+    assert client.tag("Салам.") == CONLLU
+    assert server.requests == 4
+    assert client.breaker.failures == 0 and client.breaker.state == CLOSED
+
+
+def test_call_exhausting_retries_is_one_breaker_failure(fake_tagger):
+    server = fake_tagger(*[(503, 0)] * 10)
+    client = make_client(server.url, retries=3, breaker=CircuitBreaker(failure_threshold=2, reset_seconds=60))
+    with pytest.raises(TaggerError) as info:
+        client.tag("Салам.")
+    # все повторы выполнены, вызов завершился настоящей ошибкой, а не обрывом цепи
+    assert type(info.value) is TaggerError and info.value.reason == "http_status"
+    assert server.requests == 4
+    assert client.breaker.failures == 1 and client.breaker.state == CLOSED
+
+
+def test_circuit_opens_and_fails_fast_when_tagger_is_down():
+    client = make_client(f"http://127.0.0.1:{free_port()}/api/tagging", retries=2,
+                         breaker=CircuitBreaker(failure_threshold=3, reset_seconds=60))
+    for _ in range(3):
+        with pytest.raises(TaggerError) as info:
+            client.tag("Салам.")
+        assert info.value.reason == "connection"
+    assert client.breaker.state == OPEN
+
+    started = time.perf_counter()
+    with pytest.raises(TaggerUnavailable):
+        client.tag("Салам.")
+    assert time.perf_counter() - started < 0.05
+
+
+def test_circuit_half_open_probe(fake_tagger):
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=30, clock=lambda: now[0])
+    server = fake_tagger((503, 0), (503, 0), (503, 0))
+    client = make_client(server.url, retries=0, breaker=breaker)
+
+    for _ in range(2):
+        with pytest.raises(TaggerError):
+            client.tag("Салам.")
+    assert breaker.state == OPEN
+    with pytest.raises(TaggerUnavailable):
+        client.tag("Салам.")
+    assert server.requests == 2
+
+    now[0] = 31
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(TaggerError):
+        client.tag("Салам.")  # пробный запрос снова 503 — цепь размыкается
+    assert server.requests == 3 and breaker.state == OPEN
+
+    now[0] = 62
+    assert client.tag("Салам.") == CONLLU
+    assert breaker.state == CLOSED
+
+
+def test_half_open_allows_single_probe():
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=10, clock=lambda: now[0])
+    breaker.record_failure()
+    assert not breaker.allow()
+    now[0] = 10
+    assert breaker.allow()
+    assert not breaker.allow()  # второй запрос ждёт итога пробного
+    breaker.record_success()
+    assert breaker.allow()